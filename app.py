@@ -4,6 +4,7 @@ import sys
 import os
 import subprocess
 import argparse
+import importlib.util
 
 # Ajouter 'app/' au PYTHONPATH
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "app"))
@@ -13,9 +14,8 @@ def ensure_env_and_restart_if_needed():
     Vérifie si les dépendances critiques (ex: dotenv) sont manquantes.
     Si c’est le cas, crée un environnement virtuel `.venv`, installe les dépendances, puis relance le script.
     """
-    try:
-        from dotenv import load_dotenv  # test d'import
-    except ModuleNotFoundError:
+    # find_spec vérifie la présence du paquet sans l'importer
+    if importlib.util.find_spec("dotenv") is None:
         print("❗ Dépendance manquante détectée : 'python-dotenv'")
         print("📦 Création de l’environnement virtuel et installation des dépendances...")
 
@@ -37,17 +37,24 @@ def ensure_env_and_restart_if_needed():
 # 🔁 On s'assure que l'environnement est prêt
 ensure_env_and_restart_if_needed()
 
-# À partir d'ici, les imports sont garantis
-from controllers.gui_controller import launch_gui
-from utils.config import load_config
-from main_cli import main as run_cli_main
+# À partir d'ici, les imports sont garantis. Ils sont faits dans `dispatch`,
+# après la lecture des arguments : `--help` n'importe rien, et le mode CLI
+# n'importe jamais tkinter ni la GUI (serveurs sans affichage, tâches cron).
+
+def launch_gui(**kwargs):
+    from controllers.gui_controller import launch_gui as run_gui
+    run_gui(**kwargs)
 
 def create_parser():
     parser = argparse.ArgumentParser(description="Lance GeniePDF en mode CLI ou GUI.")
     parser.add_argument('--config', type=str, default='config.json', help="Fichier de configuration.")
     parser.add_argument('--input', type=str, help="Répertoire d'entrée des PDF.")
     parser.add_argument('--output', type=str, help="Fichier de sortie JSON.")
-    parser.add_argument('--workers', type=int, default=5, help="Nombre de threads (par défaut: 5).")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (par défaut : un par cœur).")
+    parser.add_argument('--format', type=str, choices=['json', 'jsonl', 'parquet', 'feather'], help="Format de sortie (jsonl = écriture au fil de l'eau ; parquet/feather = un jeu de données par modèle).")
+    parser.add_argument('--output-dir', type=str, help="Dossier des jeux de données parquet/feather.")
+    parser.add_argument('--db', type=str, help="Base SQLite indexée des enregistrements (en plus de la sortie).")
+    parser.add_argument('--incremental', action='store_true', help="Ne traiter que les PDF nouveaux ou modifiés.")
     parser.add_argument('--verbose', action='store_true', help="Mode verbeux.")
     parser.add_argument('--gui', type=str, default="false", help="Lancer la GUI (true/false).")
     return parser
@@ -71,12 +78,24 @@ def dispatch():
             workers=args.workers
         )
     else:
+        from utils.config import load_config
+        from main_cli import main as run_cli_main
+
         config = load_config(args.config)
         if args.input:
             config.pdf_input_directory = args.input
         if args.output:
             config.json_output_path = args.output
-        config.max_workers = args.workers
+        if args.workers:
+            config.max_workers = args.workers
+        if args.format:
+            config.output_format = args.format
+        if args.output_dir:
+            config.columnar_output_dir = args.output_dir
+        if args.incremental:
+            config.incremental = True
+        if args.db:
+            config.result_db = args.db
         config.log_level = 'DEBUG' if args.verbose else 'INFO'
 
         run_cli_main(config)
@@ -2,11 +2,18 @@
 
 import argparse
 import sys
-from main import main as run_cli_main  # main CLI
 from utils.config import load_config
 
-# Importe ta fonction GUI
-from controllers.gui_controller import launch_gui  
+
+def launch_gui(**kwargs):
+    # Importée à la demande : le mode CLI n'importe pas tkinter
+    from controllers.gui_controller import launch_gui as run_gui
+    run_gui(**kwargs)
+
+
+def run_cli_main(config):
+    from main_cli import main
+    main(config)
 
 def create_parser():
     """
@@ -17,7 +24,11 @@ def create_parser():
     parser.add_argument('--config', type=str, default='config.json', help="Fichier de configuration (par défaut: config.json)")
     parser.add_argument('--input', type=str, help="Répertoire d'entrée des PDF")
     parser.add_argument('--output', type=str, help="Fichier de sortie JSON")
-    parser.add_argument('--workers', type=int, default=5, help="Nombre de threads (par défaut: 5)")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (par défaut : un par cœur)")
+    parser.add_argument('--format', type=str, choices=['json', 'jsonl', 'parquet', 'feather'], help="Format de sortie (jsonl = écriture au fil de l'eau ; parquet/feather = un jeu de données par modèle).")
+    parser.add_argument('--output-dir', type=str, help="Dossier des jeux de données parquet/feather.")
+    parser.add_argument('--db', type=str, help="Base SQLite indexée des enregistrements (en plus de la sortie).")
+    parser.add_argument('--incremental', action='store_true', help="Ne traiter que les PDF nouveaux ou modifiés.")
     parser.add_argument('--verbose', action='store_true', help="Mode verbeux")
     parser.add_argument('--gui', type=str, default="false", help="Lancer la GUI (true/false)")
 
@@ -41,7 +52,16 @@ def handle_args(args):
             config.pdf_input_directory = args.input
         if args.output:
             config.json_output_path = args.output
-        config.max_workers = args.workers
+        if args.workers:
+            config.max_workers = args.workers
+        if args.format:
+            config.output_format = args.format
+        if args.output_dir:
+            config.columnar_output_dir = args.output_dir
+        if args.incremental:
+            config.incremental = True
+        if args.db:
+            config.result_db = args.db
         config.log_level = 'DEBUG' if args.verbose else 'INFO'
 
         # Lancement du traitement CLI
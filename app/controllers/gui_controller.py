@@ -1,22 +1,89 @@
 import os
 import json
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import concurrent.futures
-import pandas as pd
 
-from pdf_tools import pdf2image_wrapper, image_cleaner
-from ocr import tesseract_engine
-from services.regex_parser import extract_data_with_regex
+from services import engine
 from data_structuring.aggregator import aggregate_results
 from data_structuring import pandas_processor
-from utils.validator import validate_json
+from utils import metrics, time_budget
+from utils.validator import RecordValidator
 from utils.config import load_config
+from utils.progress import Cancelled, PageProgress, Snapshot, format_eta
+
+# Fréquence de relève de la file d'avancement par la boucle Tk (ms)
+POLL_MS = 100
+
+
+def process_data(files, config=None, on_progress=None, cancel=None):
+    """
+    Traite une liste de PDF avec le moteur parallèle de la CLI (pool de
+    processus ou pipeline par étapes, selon ENGINE) et agrège les résultats.
+
+    :param files: Chemins des PDF.
+    :param config: Objet Config (chargé depuis l'environnement si None).
+    :param on_progress: Appelé avec un `Snapshot` (pages traitées, débit,
+                        temps restant) à chaque avancée, depuis n'importe quel
+                        thread : à relayer vers Tk par une file.
+    :param cancel: threading.Event d'annulation ; lève `Cancelled`.
+    :return: (enregistrements agrégés, liste groupée par fichier pour le JSON
+             final). Aucun DataFrame n'est construit (voir `to_dataframe`).
+    """
+    config = config or load_config()
+    results = []
+    all_collections = []
+    tracker = PageProgress(len(files), on_progress)
+    for pdf, raws in engine.iter_documents(list(files), config, tracker, cancel):
+        with metrics.span("structurize", file=pdf, pages=len(raws)):
+            records, collections = pandas_processor.structurize(raws, pdf)
+        results.append(records)
+        all_collections.extend(collections)   # pour JSON final
+
+    return aggregate_results(results), all_collections
+
+
+def to_dataframe(records):
+    """
+    DataFrame du lot (à la demande : le JSON final n'en a pas besoin),
+    dédupliqué par (fichier, page, modèle).
+    """
+    ag = pandas_processor.to_dataframe(records)
+    if not ag.empty:
+        ag = ag.drop_duplicates(subset=["file", "page", "model"])
+    return ag
+
+
+def save_results(collections, output_path):
+    """
+    Valide les enregistrements (les invalides sont écartés, pas tout le lot)
+    puis écrit le JSON final.
+
+    :return: Le RecordValidator utilisé (compteurs et journal des erreurs).
+    """
+    with RecordValidator() as validator:
+        valid = [{**c, "pages": validator.filter(c["pages"])} for c in collections]
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(valid, f, indent=2, ensure_ascii=False)
+    return validator
+
+
+def format_status(snap):
+    """
+    Texte de statut : « 120/480 pages · 3/20 fichiers · 6.2 pages/s · reste 58 s (25%) ».
+    """
+    if not snap.pages_total:
+        return f"Analyse des fichiers… {snap.files_done}/{snap.files_total}"
+    return (f"{snap.pages_done}/{snap.pages_total} pages · {snap.files_done}/{snap.files_total} fichiers · "
+            f"{snap.rate:.1f} pages/s · reste {format_eta(snap.eta)} ({snap.percent}%)")
 
 
-def launch_gui(config_path=None, input_path=None, output_path=None, workers=5):
+def launch_gui(config_path=None, input_path=None, output_path=None, workers=None):
     selected_files = []
     config = load_config() if config_path is None else load_config(config_path)
+    if workers:
+        config.max_workers = workers
 
     # Précharge si on a passé --input
     if input_path:
@@ -93,92 +160,96 @@ def launch_gui(config_path=None, input_path=None, output_path=None, workers=5):
     ttk.Button(out_frame, text="Parcourir…", command=choose_output).pack(side=tk.LEFT, padx=5)
 
     # === barre de progression et statut ===
-    status_label = ttk.Label(root, text="")  # affichera "1/10 – fichier.pdf (10%)"
+    status_label = ttk.Label(root, text="")  # affichera "120/480 pages · … (25%)"
     status_label.pack(pady=(5, 0))
     progress = ttk.Progressbar(root, orient="horizontal", mode="determinate")
     progress.pack(fill="x", padx=10, pady=(0, 5))
 
     # === traitement ===
-    def process_data(files):
-        dfs = []
-        all_collections = [] 
-        total = len(files)
-        for i, pdf in enumerate(files, start=1):
-            # Calcul du pourcentage
-            percent = int((i - 1) / total * 100)
-            # Mise à jour du label et de la barre
-            status_label.config(text=f"{i}/{total} – {os.path.basename(pdf)} ({percent}%)")
-            progress['value'] = percent
-            root.update_idletasks()
-
-            # Pipeline d'extraction
-            imgs = pdf2image_wrapper.convert_pdf_to_images(pdf)
-            imgs = [image_cleaner.preprocess(im) for im in imgs]
-            txts = [tesseract_engine.extract_text(im) for im in imgs]
-            raws = [extract_data_with_regex(t) for t in txts]
-            df, collections = pandas_processor.structurize(raws, pdf)
-
-            if not isinstance(df, pd.DataFrame):
-                raise TypeError(f"Extraction pour « {pdf} » n’a pas renvoyé un DataFrame.")
-
-            # Injecter le chemin du fichier source
-            df['file'] = pdf
-            dfs.append(df)
-            all_collections.extend(collections)   # pour JSON final
-        # Dernière mise à jour à 100%
-        status_label.config(text=f"{total}/{total} – terminé (100%)")
-        progress['value'] = 100
-        root.update_idletasks()
-
-        # Agrégation & pré‑nettoyage
-        ag = aggregate_results(dfs)
-        if isinstance(ag, list):
-            ag = pd.concat(ag, ignore_index=True)
-        elif not isinstance(ag, pd.DataFrame):
-            ag = pd.DataFrame()
-        # Dé‑duplication stricte
-        ag = ag.drop_duplicates(subset=["file", "page", "model"])
-        # Conversion dict→records sans NaN
-        
-        return ag, all_collections
+    # Le thread de traitement ne touche jamais Tk : il dépose avancement et
+    # résultat dans `events`, relue par la boucle Tk (root.after)
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def run(files, outp):
+        since = len(metrics.spans())
+        try:
+            _, all_collections = process_data(files, config, events.put, cancel)
+            validator = save_results(all_collections, outp)
+            events.put(("done", (validator, time_budget.timed_out_pages(metrics.spans()[since:]))))
+        except Cancelled:
+            events.put(("cancelled", None))
+        except Exception as e:
+            events.put(("error", e))
+
+    def finish():
+        start_btn.config(state=tk.NORMAL)
+        cancel_btn.config(state=tk.DISABLED)
+
+    def poll():
+        outcome = None
+        try:
+            while True:
+                event = events.get_nowait()
+                if isinstance(event, Snapshot):
+                    status_label.config(text=format_status(event))
+                    progress['value'] = event.percent
+                else:
+                    outcome = event
+        except queue.Empty:
+            pass
+        if outcome is None:
+            root.after(POLL_MS, poll)
+            return
+        finish()
+        kind, value = outcome
+        if kind == "cancelled":
+            status_label.config(text="Traitement annulé.")
+        elif kind == "error":
+            messagebox.showerror("Erreur", f"Pendant le traitement : {value}")
+        else:
+            # Dernière mise à jour à 100%
+            status_label.config(text=f"{len(selected_files)}/{len(selected_files)} fichiers – terminé (100%)")
+            progress['value'] = 100
+            validator, timed_out = value
+            warnings = []
+            if validator.invalid:
+                warnings.append(f"{validator.invalid} enregistrement(s) invalide(s) écarté(s) "
+                                f"(voir {validator.sink.path}).")
+            if timed_out:
+                warnings.append(f"{len(timed_out)} page(s) hors budget de temps :\n"
+                                + time_budget.format_report(timed_out[:10]))
+            if not warnings:
+                messagebox.showinfo("Succès", "Terminé ! 🎉")
+            else:
+                messagebox.showwarning("Terminé", "Terminé, avec réserves :\n" + "\n".join(warnings))
 
     def start():
-        
         outp = output_entry.get().strip()
         if not selected_files:
             return messagebox.showwarning("Avertissement", "Aucun PDF sélectionné.")
         if not outp:
             return messagebox.showwarning("Avertissement", "Spécifiez un fichier de sortie.")
         start_btn.config(state=tk.DISABLED)
+        cancel_btn.config(state=tk.NORMAL)
         status_label.config(text="Initialisation…")
         progress['value'] = 0
-
-        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
-        future = executor.submit(process_data, list(selected_files))
-
-        def check():
-            if future.done():
-                try:
-                    df, all_collections = future.result()
-                    recs = df.to_dict(orient="records")
-                    with open(outp, "w", encoding="utf-8") as f:
-                        json.dump(all_collections, f, indent=2, ensure_ascii=False)
-                    if validate_json(recs):
-                        messagebox.showinfo("Succès", "Terminé ! 🎉")
-                    else:
-                        messagebox.showerror("Erreur", "Validation JSON échouée.")
-                except Exception as e:
-                    messagebox.showerror("Erreur", f"Pendant le traitement : {e}")
-                finally:
-                    start_btn.config(state=tk.NORMAL)
-                    executor.shutdown()
-            else:
-                root.after(100, check)
-
-        root.after(100, check)
-
-    start_btn = ttk.Button(root, text="Démarrer", command=start)
-    start_btn.pack(pady=5)
+        cancel.clear()
+        threading.Thread(target=run, args=(list(selected_files), outp), daemon=True).start()
+        root.after(POLL_MS, poll)
+
+    def stop():
+        # Le travail en file est abandonné tout de suite ; poll() constate l'arrêt
+        cancel.set()
+        cancel_btn.config(state=tk.DISABLED)
+        status_label.config(text="Annulation…")
+
+    action_frame = ttk.Frame(root)
+    action_frame.pack(pady=5)
+    start_btn = ttk.Button(action_frame, text="Démarrer", command=start)
+    start_btn.pack(side=tk.LEFT)
+    cancel_btn = ttk.Button(action_frame, text="Annuler", command=stop, state=tk.DISABLED)
+    cancel_btn.pack(side=tk.LEFT, padx=5)
 
     update_listbox()
     root.mainloop()
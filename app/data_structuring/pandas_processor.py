@@ -1,14 +1,43 @@
 # data_structuring/pandas_processor.py
-import pandas as pd
+import math
 from collections.abc import Mapping
 
+from utils.lazy import lazy_import
+
+# pandas n'est chargé que si un DataFrame est réellement demandé (`to_dataframe`)
+pd = lazy_import("pandas")
+
+# Colonnes d'identification (les autres sont les données du modèle)
+KEY_COLUMNS = ("file", "page", "model")
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _flatten(model, prefix=""):
+    # Même aplatissement que pd.json_normalize(sep="_") : {"a": {"b": 1}} → {"a_b": 1}
+    out = {}
+    for key, value in model.items():
+        key = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{key}_"))
+        else:
+            out[key] = value
+    return out
+
+
 def structurize(raw_pages, file_path):
     """
     Transforme raw_pages (liste par page) en :
-      1) DataFrame "long" (une ligne = 1 modèle extrait)
-      2) liste de dicts {"file":..., "pages":[…]}   — groupé par fichier
+      1) liste "longue" d'enregistrements (un dict = 1 modèle extrait)
+      2) liste de dicts {"file":..., "pages":[…]}   — groupé par fichier
+
+    Pur Python : pour un document de quelques pages, construire un DataFrame
+    coûtait plus cher que le parsing. Les champs vides (None / NaN) sont
+    omis et les modèles sans aucune donnée écartés ; le DataFrame du lot se
+    construit une seule fois, à l'agrégation (`to_dataframe`).
     """
-    # ---------- 1. Collecte des enregistrements ----------
     recs = []
     for p_idx, page in enumerate(raw_pages, start=1):
         if not page:                          # page OCR sans rien d'utile
@@ -17,41 +46,22 @@ def structurize(raw_pages, file_path):
             if not isinstance(model, Mapping):
                 # skip éléments non‑dict (None, [], NaN, etc.)
                 continue
-            item = model.copy()
+            item = {k: v for k, v in _flatten(model).items() if not _is_missing(v)}
             item["file"] = file_path
             item["page"] = p_idx
-            recs.append(item)
-
-    if not recs:            # Aucun modèle trouvé dans tout le PDF
-        return pd.DataFrame(), [{"file": file_path, "pages": []}]
-
-    # ---------- 2. DataFrame long ----------
-    df = pd.json_normalize(recs, sep="_")
-    df = df.dropna(axis=1, how="all")  # supprime colonnes entièrement vides
-    payload_cols = df.columns.difference(["file", "page", "model"])
-    df = df.dropna(how="all", subset=payload_cols)
-
-    # page en int, mais uniquement si elle existe et sans NaN
-    if "page" in df.columns:
-        df["page"] = df["page"].astype("Int64")   # type nullable
-
-    # ---------- 3. Regroupement par fichier ----------
-    # plus rapide et plus stable que .apply(lambda …)
-    grouped = (
-        df.sort_values(["file", "page"])
-          .groupby("file", sort=False, as_index=False)
-          .agg(pages=("model",  # 'model' juste pour compter, on remplace après
-                       lambda _: []))        # placeholder
-          .to_dict(orient="records")
-    )
-
-    # On remplit réellement la clé "pages"
-    pages_per_file = (
-        df.sort_values(["file", "page"])
-          .groupby("file", sort=False)
-          .apply(lambda g: g.to_dict(orient="records"))
-    )
-    for d in grouped:
-        d["pages"] = pages_per_file[d["file"]]
-
-    return df.reset_index(drop=True), grouped
+            if any(k not in KEY_COLUMNS for k in item):
+                recs.append(item)
+
+    # Un seul fichier : les enregistrements sont déjà dans l'ordre des pages
+    return recs, [{"file": file_path, "pages": list(recs)}]
+
+
+def to_dataframe(records):
+    """
+    DataFrame "long" d'un lot d'enregistrements (champs absents → NaN).
+    """
+    if not records:
+        return pd.DataFrame()
+    df = pd.DataFrame(records)
+    df["page"] = df["page"].astype("Int64")   # type nullable
+    return df
@@ -1,19 +1,25 @@
-import concurrent.futures
 import os
-import pandas as pd
 import json
-from tqdm import tqdm
-import importlib
+from contextlib import nullcontext
 
-from data_structuring import pandas_processor
 from data_structuring.aggregator import aggregate_results
-from ocr import tesseract_engine
-from pdf_tools import image_cleaner, pdf2image_wrapper
-from services.regex_parser import extract_data_with_regex
+from services import engine
+from services.jsonl_sink import JsonlWriter
+from utils import metrics, time_budget
+from utils.lazy import lazy_import
 from utils.logger import init_logger
-from utils.validator import validate_json
+from utils.manifest import Manifest, manifest_path
 from utils.schema_manager import load_schemas
 
+# Modules lourds chargés à leur première utilisation : un lot sans fichier à
+# traiter (mode incrémental, tâches cron) ne paie pas leur import
+tqdm = lazy_import("tqdm")
+pandas_processor = lazy_import("data_structuring.pandas_processor")
+pdf_pipeline = lazy_import("services.pdf_pipeline")
+validation = lazy_import("utils.validator")
+columnar_sink = lazy_import("services.columnar_sink")
+result_store = lazy_import("services.result_store")
+
 
 def main(config):
     """
@@ -21,40 +27,202 @@ def main(config):
     Prend un objet `config` contenant tous les paramètres configurables.
     """
     logger = init_logger()
+    metrics.keep_spans(config.metrics_spans)
     pdf_input_directory = config.pdf_input_directory
     pdf_files = get_pdf_files(pdf_input_directory)
 
-    if not pdf_files:
+    # Mode incrémental : on ne traite que les fichiers nouveaux ou modifiés et
+    # on conserve les enregistrements déjà produits pour les autres
+    manifest, previous_data, deleted = None, [], []
+    streaming = config.output_format == "jsonl"
+    columnar = config.output_format in ("parquet", "feather")
+    if streaming and not config.json_output_path.lower().endswith(".jsonl"):
+        # Des lignes JSONL ajoutées à un fichier JSON le rendraient illisible
+        logger.error(f"❌ Le format jsonl attend un fichier .jsonl en sortie (JSON_OUTPUT_PATH / --output), "
+                     f"pas {config.json_output_path}.")
+        return
+    if columnar and not config.columnar_output_dir:
+        # JSON_OUTPUT_PATH désigne un fichier : il ne sert jamais de dossier de jeux de données
+        logger.error("❌ Les formats parquet/feather écrivent dans un dossier : renseignez COLUMNAR_OUTPUT_DIR "
+                     "(ou --output-dir).")
+        return
+    if columnar and config.incremental:
+        # Le jeu de données colonnaire est réécrit à chaque lot
+        logger.error("❌ Le mode incrémental n'est pas disponible avec les formats parquet/feather.")
+        return
+    if config.incremental:
+        manifest = Manifest.load(manifest_path(config))
+        changes = manifest.diff(pdf_files)
+        deleted = changes.deleted
+        if not streaming:
+            previous_data = [
+                r for r in load_extracted_data(config.json_output_path)
+                if r.get("file") not in changes.stale
+            ]
+        print(f"♻️ Mode incrémental : {len(changes.new)} nouveaux, {len(changes.changed)} modifiés, "
+              f"{len(changes.deleted)} supprimés, {len(changes.unchanged)} inchangés.")
+        if not changes.to_process and not changes.deleted:
+            print("✅ Rien à faire : aucun fichier nouveau, modifié ou supprimé.")
+            return
+        pdf_files = changes.to_process
+    elif not pdf_files:
         logger.warning("Aucun fichier PDF trouvé dans le répertoire d'entrée.")
         return
 
-    print(f"🔍 {len(pdf_files)} fichiers PDF trouvés. Lancement du traitement...")
+    print(f"🔍 {len(pdf_files)} fichiers PDF à traiter. Lancement du traitement...")
+
+    # Charger le schéma dynamique pour validation
+    load_schemas(config.schema_file)  # Charge un seul schéma ou tous les schémas
+
+    if streaming:
+        stream_to_jsonl(pdf_files, config, manifest, deleted)
+        return
+    if columnar:
+        export_columnar(pdf_files, config)
+        return
 
+    # Toutes les pages de tous les documents sont réparties sur un pool de
+    # processus ; chaque document est restitué dès que sa dernière page est prête.
+    # Validation enregistrement par enregistrement : les invalides sont
+    # consignés et écartés, sans faire échouer le reste du lot
     results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=config.max_workers) as executor:
-        futures = {executor.submit(process_pdf, path): path for path in pdf_files}
-        for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="📄 Traitement"):
-            try:
-                results.append(future.result())
-            except Exception as e:
-                logger.error(f"Erreur lors du traitement de {futures[future]} : {e}")
-
-    final_data = aggregate_results(results)
-
-    json_ready_data = (
-        final_data.to_dict(orient="records")
-        if isinstance(final_data, pd.DataFrame) and not final_data.empty
-        else []
-    )
+    incomplete = set()
+    with open_store(config, deleted) as store, validation.RecordValidator() as validator:
+        documents = engine.iter_documents(pdf_files, config, incomplete=incomplete)
+        for pdf_path, pages in tqdm.tqdm(documents, total=len(pdf_files), desc="📄 Traitement"):
+            with metrics.span("structurize", file=pdf_path, pages=len(pages)):
+                records, _ = pandas_processor.structurize(pages, pdf_path)
+            records = validator.filter(records)
+            results.append(records)
+            if store is not None:
+                store.write_document(pdf_path, records)
+            record_processed(manifest, pdf_path, incomplete)
+    report_invalid(validator, logger)
+
+    # Sortie JSON : les enregistrements suffisent, aucun DataFrame n'est construit
+    json_ready_data = previous_data + aggregate_results(results)
+
+    save_extracted_data(json_ready_data, config.json_output_path)
+    if manifest is not None:
+        manifest.save()
+    print(f"✅ Données sauvegardées dans {config.json_output_path}")
+    if config.result_db:
+        print(f"🗄️ Base de résultats à jour : {config.result_db}")
+    report_metrics(config)
 
-    # Charger le schéma dynamique pour validation
-    schema = load_schemas(config.schema_file)  # Charge un seul schéma ou tous les schémas
 
-    if validate_json(json_ready_data, schema):
-        save_extracted_data(json_ready_data, config.json_output_path)
-        print(f"✅ Données sauvegardées dans {config.json_output_path}")
-    else:
-        logger.error("❌ Validation JSON échouée")
+def record_processed(manifest, pdf_path, incomplete):
+    """
+    Inscrit le document au manifeste (mode incrémental), sauf s'il a une page
+    en échec ou hors budget : il sera retraité à la prochaine exécution.
+    """
+    if manifest is None:
+        return
+    if pdf_path in incomplete:
+        init_logger().warning(f"⚠️ {pdf_path} incomplet (page en échec ou hors budget) : "
+                              f"non inscrit au manifeste, il sera retraité")
+        return
+    manifest.record(pdf_path)
+
+
+def open_store(config, deleted=()):
+    """
+    Base SQLite des résultats si RESULT_DB est renseignée (sinon contexte vide,
+    qui donne None). Les fichiers supprimés du lot y sont effacés.
+    """
+    if not config.result_db:
+        return nullcontext()
+    store = result_store.ResultStore(config.result_db, config.result_db_batch)
+    for path in deleted:
+        store.delete_file(path)
+    return store
+
+
+def report_invalid(validator, logger):
+    if validator.invalid:
+        logger.error(f"❌ {validator.invalid} enregistrement(s) invalide(s) écarté(s), "
+                     f"voir {validator.sink.path}")
+
+
+def report_timeouts(logger):
+    """
+    Bilan des pages ayant dépassé un budget de temps (rendu, OSD, OCR).
+    """
+    pages = time_budget.timed_out_pages()
+    if not pages:
+        return
+    failed = sum(p["failed"] for p in pages)
+    logger.warning(f"⏰ {len(pages)} page(s) hors budget de temps, dont {failed} abandonnée(s) :\n"
+                   + time_budget.format_report(pages))
+
+
+def report_metrics(config):
+    """
+    Fin d'exécution : bilan des pages hors budget, résumé p50/p95/p99 par
+    étape et export des mesures (JSON + format texte Prometheus).
+    """
+    report_timeouts(init_logger())
+    if not config.metrics or not metrics.summary():
+        return
+    print("\n⏱️ Temps par étape :")
+    print(metrics.format_summary())
+    json_path, prom_path = metrics.write(metrics.metrics_path(config))
+    print(f"📈 Mesures écrites dans {json_path} et {prom_path}")
+    metrics.reset()
+
+
+def stream_to_jsonl(pdf_files, config, manifest=None, deleted=()):
+    """
+    Mode flux : chaque document est ajouté au fichier JSONL dès qu'il est
+    terminé, sans accumuler les résultats du lot en mémoire. Le fichier est
+    repris à la suite en mode incrémental, réécrit sinon.
+    """
+    with JsonlWriter(config.json_output_path, append=config.incremental) as writer, validation.RecordValidator() as validator, \
+            open_store(config, deleted) as store:
+        for path in deleted:
+            writer.write_deleted(path)
+        incomplete = set()
+        documents = engine.iter_documents(pdf_files, config, incomplete=incomplete)
+        for pdf_path, pages in tqdm.tqdm(documents, total=len(pdf_files), desc="📄 Traitement"):
+            with metrics.span("structurize", file=pdf_path, pages=len(pages)):
+                _, grouped = pandas_processor.structurize(pages, pdf_path)
+            for document in grouped:
+                records = validator.filter(document["pages"])
+                writer.write_document({**document, "pages": records})
+                if store is not None:
+                    store.write_document(pdf_path, records)
+            record_processed(manifest, pdf_path, incomplete)
+
+    # Après un arrêt brutal, les documents non inscrits seront retraités et
+    # réécrits : la dernière ligne d'un fichier l'emporte à la conversion
+    report_invalid(validator, init_logger())
+    if manifest is not None:
+        manifest.save()
+    print(f"✅ Données ajoutées à {config.json_output_path}")
+    report_metrics(config)
+
+
+def export_columnar(pdf_files, config):
+    """
+    Sortie colonnaire (Parquet/Feather) : un jeu de données par modèle dans le
+    dossier COLUMNAR_OUTPUT_DIR, écrit par groupes de lignes au fil des documents.
+    """
+    with columnar_sink.ColumnarWriter(config.columnar_output_dir, config.output_format,
+                                      config.row_group_size, config.partition_by_date) as writer, \
+            validation.RecordValidator() as validator, open_store(config) as store:
+        documents = engine.iter_documents(pdf_files, config)
+        for pdf_path, pages in tqdm.tqdm(documents, total=len(pdf_files), desc="📄 Traitement"):
+            with metrics.span("structurize", file=pdf_path, pages=len(pages)):
+                records, _ = pandas_processor.structurize(pages, pdf_path)
+            records = validator.filter(records)
+            writer.write_records(records)
+            if store is not None:
+                store.write_document(pdf_path, records)
+
+    report_invalid(validator, init_logger())
+    counts = ", ".join(f"{model} : {n}" for model, n in sorted(writer.rows_written.items())) or "aucun enregistrement"
+    print(f"✅ Jeux de données {config.output_format} écrits dans {config.columnar_output_dir} ({counts})")
+    report_metrics(config)
 
 
 def get_pdf_files(pdf_input_directory):
@@ -72,20 +240,17 @@ def get_pdf_files(pdf_input_directory):
     return pdf_files
 
 
-def process_pdf(pdf_path):
+def process_pdf(pdf_path, config=None):
     """
     Pipeline complet de traitement d’un fichier PDF :
-    1. Conversion en images
-    2. Nettoyage
-    3. OCR
-    4. Extraction via regex
-    5. Structuration avec Pandas
-    """
-    images = pdf2image_wrapper.convert_pdf_to_images(pdf_path)
-    processed_images = [image_cleaner.preprocess(img) for img in images]
-    texts = [tesseract_engine.extract_text(img) for img in processed_images]
-    extracted_data = [extract_data_with_regex(text) for text in texts]
-    structured_data = pandas_processor.structurize(extracted_data, pdf_path)
+    1. Couche texte native (pages numériques)
+    2. Sinon : conversion en image, nettoyage et OCR (pages scannées)
+    3. Extraction via regex
+    4. Structuration des enregistrements
+    """
+    extracted_data = pdf_pipeline.extract_pages(pdf_path, config)
+    with metrics.span("structurize", file=pdf_path, pages=len(extracted_data)):
+        structured_data = pandas_processor.structurize(extracted_data, pdf_path)
     return structured_data
 
 
@@ -95,3 +260,13 @@ def save_extracted_data(data, output_path):
     """
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def load_extracted_data(output_path):
+    """
+    Relit un fichier de sortie JSON existant (liste vide s'il n'existe pas).
+    """
+    if not os.path.isfile(output_path):
+        return []
+    with open(output_path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,110 @@
+# ocr/layout_templates.py
+import functools
+import hashlib
+import json
+import os
+from typing import NamedTuple
+
+from utils.validator import detect_document_type
+
+LAYOUT_DIR = os.path.join(os.path.dirname(__file__), "layouts")
+LAYOUT_SUFFIX = "_layout.json"
+# Segmentation des zones : bloc de texte uniforme
+DEFAULT_REGION_PSM = 6
+
+
+class Region(NamedTuple):
+    """
+    Zone d'intérêt d'une page ; `box` = (x0, y0, x1, y1) en fractions de la
+    largeur et de la hauteur de la page (0–1), indépendantes de la résolution.
+    """
+    name: str
+    box: tuple
+    psm: int = DEFAULT_REGION_PSM
+
+
+class LayoutTemplate(NamedTuple):
+    """
+    Gabarit d'un type de document : les zones à OCRiser et de quoi vérifier
+    qu'une page le suit (proportions, mots repères dans le texte des zones).
+    """
+    doc_type: str
+    regions: tuple
+    anchors: tuple          # mots repères (minuscules) : au moins `min_anchors` attendus
+    aspect: tuple           # largeur / hauteur admise (min, max)
+    min_anchors: int = 1
+    profile: str = ""       # identifie le gabarit (clé du cache de pages)
+
+    def fits(self, shape):
+        """
+        Vrai si une page de dimensions `shape` (hauteur, largeur) a les proportions du gabarit.
+        """
+        height, width = shape[:2]
+        return height > 0 and self.aspect[0] <= width / height <= self.aspect[1]
+
+    def crops(self, image):
+        """
+        Zones de la page (vues sur le tableau, sans copie), dans l'ordre du gabarit.
+
+        :return: Liste de tuples (Region, image de la zone) ; les zones vides sont omises.
+        """
+        height, width = image.shape[:2]
+        out = []
+        for region in self.regions:
+            x0, y0, x1, y1 = region.box
+            crop = image[round(y0 * height):round(y1 * height), round(x0 * width):round(x1 * width)]
+            if crop.size:
+                out.append((region, crop))
+        return out
+
+    def join(self, texts):
+        """
+        Texte de la page à partir du texte de chaque zone (un paragraphe par zone).
+        """
+        return "\n\n".join(t.replace("\f", "").strip() for t in texts)
+
+    def matches(self, text):
+        """
+        Vrai si le texte des zones contient assez de mots repères.
+        """
+        lower = text.lower()
+        return sum(anchor in lower for anchor in self.anchors) >= self.min_anchors
+
+
+def _read_template(path):
+    with open(path, "rb") as f:
+        raw = f.read()
+    spec = json.loads(raw)
+    doc_type = os.path.basename(path)[:-len(LAYOUT_SUFFIX)].lower()
+    regions = tuple(Region(r["name"], tuple(r["box"]), r.get("psm", DEFAULT_REGION_PSM)) for r in spec["regions"])
+    for r in regions:
+        x0, y0, x1, y1 = r.box
+        if not (0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1):
+            raise ValueError(f"Zone « {r.name} » invalide dans {path} : {r.box}")
+    return LayoutTemplate(doc_type, regions, tuple(a.lower() for a in spec.get("anchors", ())),
+                          tuple(spec.get("aspect", (0, float("inf")))), spec.get("min_anchors", 1),
+                          f"layout-{doc_type}-{hashlib.sha1(raw).hexdigest()[:12]}")
+
+
+@functools.lru_cache(maxsize=8)
+def load_templates(directory=LAYOUT_DIR):
+    """
+    Gabarits du dossier `directory` (un fichier <type>_layout.json par type
+    de document, voir validator.detect_document_type), lus une fois.
+
+    :return: Dictionnaire type de document → LayoutTemplate.
+    """
+    if not os.path.isdir(directory):
+        return {}
+    return {t.doc_type: t for t in (_read_template(os.path.join(directory, name))
+                                    for name in sorted(os.listdir(directory)) if name.endswith(LAYOUT_SUFFIX))}
+
+
+def for_document(pdf_path, config):
+    """
+    Gabarit du document d'après son type (nom du fichier), ou None : OCR
+    pleine page (gabarits désactivés ou type sans gabarit).
+    """
+    if not config.use_layouts:
+        return None
+    return load_templates(config.layout_dir or LAYOUT_DIR).get(detect_document_type(pdf_path))
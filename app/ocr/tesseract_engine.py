@@ -1,19 +1,230 @@
 # tesseract_engine.py
+import os
+import re
+import subprocess
+import tempfile
+from typing import NamedTuple
+
+import cv2
+import numpy as np
 import pytesseract
 from PIL import Image
 
+from utils.time_budget import StageTimeout
+
 # Facultatif : définir explicitement le binaire
 # pytesseract.pytesseract.tesseract_cmd = r"/usr/bin/tesseract"
 
 DEFAULT_LANGS = "eng+fra"   # ← ajoute les langues ici
+DEFAULT_CONFIG = "--oem 3 --psm 4"
 
-def extract_text(image, langs: str | None = None) -> str:
+# Tesseract termine chaque page de sortie texte par ce séparateur
+PAGE_SEPARATOR = "\f"
+
+def tesseract_config(psm: int | None = None) -> str:
+    """
+    Options Tesseract : DEFAULT_CONFIG, avec un autre mode de segmentation si `psm` est donné.
+    """
+    return DEFAULT_CONFIG if psm is None else re.sub(r"--psm \d+", f"--psm {psm}", DEFAULT_CONFIG)
+
+
+def _is_timeout(error):
+    # pytesseract signale l'arrêt sur délai par un RuntimeError générique
+    return isinstance(error, RuntimeError) and "timeout" in str(error).lower()
+
+
+def extract_text(image, langs: str | None = None, timeout=None, psm=None) -> str:
     """
     Extrait le texte d'une image en utilisant Tesseract OCR.
     :param image: Image PIL
     :param langs: ex. "eng" ou "fra" ou "eng+fra"; None → DEFAULT_LANGS
+    :param timeout: Délai maximal (s) ; au-delà, Tesseract est arrêté (StageTimeout).
+    :param psm: Mode de segmentation à la place de celui de DEFAULT_CONFIG.
+    """
+    lang = langs or DEFAULT_LANGS
+    try:
+        return pytesseract.image_to_string(image, lang=lang, config=tesseract_config(psm), timeout=timeout or 0)
+    except RuntimeError as e:
+        if _is_timeout(e):
+            raise StageTimeout("ocr", timeout) from e
+        raise
+
+
+def _save_page(image, path):
+    """
+    Écrit une page (PIL ou tableau NumPy) en PNG peu compressé, pour Tesseract.
+    """
+    if isinstance(image, np.ndarray):
+        cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    else:
+        image.save(path, compress_level=1)
+
+
+def _write_page_list(images, tmp):
+    """
+    Écrit les pages dans `tmp` et la liste de leurs chemins lue par Tesseract.
+    """
+    paths = []
+    for i, img in enumerate(images):
+        path = os.path.join(tmp, f"page_{i:04d}.png")
+        _save_page(img, path)
+        paths.append(path)
+    list_path = os.path.join(tmp, "pages.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(paths) + "\n")
+    return list_path
+
+
+def _run(cmd, timeout=None):
+    try:
+        proc = subprocess.run(cmd, capture_output=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        # subprocess.run a déjà tué Tesseract
+        raise StageTimeout("ocr", timeout) from e
+    if proc.returncode != 0:
+        raise pytesseract.TesseractError(proc.returncode, proc.stderr.decode("utf-8", "replace"))
+    return proc
+
+
+def extract_texts(images, langs: str | None = None, timeout=None, psm=None) -> list[str]:
+    """
+    Extrait le texte de plusieurs images en un seul appel à Tesseract.
+
+    Tesseract reçoit la liste des images (fichier texte listant les chemins) :
+    le processus et les modèles de langue ne sont chargés qu'une fois pour tout
+    le lot, au lieu d'une fois par page. Chaque élément du résultat est
+    identique à ce que renverrait `extract_text` pour la même image.
+
+    :param images: Liste d'images (PIL ou NumPy).
+    :param langs: ex. "eng" ou "fra" ou "eng+fra"; None → DEFAULT_LANGS
+    :param timeout: Délai maximal (s) pour tout le lot (StageTimeout au-delà).
+    :param psm: Mode de segmentation à la place de celui de DEFAULT_CONFIG.
+    :return: Liste des textes, dans l'ordre des images.
     """
+    images = list(images)
+    if len(images) <= 1:
+        return [extract_text(img, langs, timeout, psm) for img in images]
+
     lang = langs or DEFAULT_LANGS
-    # Possibilité d'ajouter des paramètres OEM/PSM si besoin
-    custom_cfg = "--oem 3 --psm 4"
-    return pytesseract.image_to_string(image, lang=lang, config=custom_cfg)
+    with tempfile.TemporaryDirectory(prefix="geniepdf_ocr_") as tmp:
+        list_path = _write_page_list(images, tmp)
+        cmd = [pytesseract.pytesseract.tesseract_cmd, list_path, "stdout", "-l", lang, *tesseract_config(psm).split()]
+        proc = _run(cmd, timeout)
+
+    chunks = proc.stdout.decode("utf-8").split(PAGE_SEPARATOR)[:-1]
+    if len(chunks) != len(images):
+        # Sortie inattendue (page illisible, séparateur absent…) : repli page par page
+        per_page = timeout / len(images) if timeout else None
+        return [extract_text(img, langs, per_page, psm) for img in images]
+    return [chunk + PAGE_SEPARATOR for chunk in chunks]
+
+
+class PageQuality(NamedTuple):
+    """
+    Qualité de l'OCR d'une page, d'après les mots reconnus par Tesseract.
+    """
+    words: int             # mots reconnus (confiance ≥ 0, texte non vide)
+    confidence: float      # confiance moyenne des mots (0–100)
+    text_height: float     # hauteur médiane des boîtes de mots, en pixels
+
+
+def page_quality(confidences, heights) -> PageQuality:
+    """
+    Résume les confiances et hauteurs des mots d'une page.
+    """
+    if not confidences:
+        return PageQuality(0, 0.0, 0.0)
+    return PageQuality(len(confidences), float(np.mean(confidences)), float(np.median(heights)))
+
+
+def merge_quality(qualities) -> PageQuality:
+    """
+    Qualité d'une page OCRisée zone par zone : moyennes des zones pondérées
+    par leur nombre de mots.
+    """
+    qualities = list(qualities)
+    words = sum(q.words for q in qualities)
+    if not words:
+        return PageQuality(0, 0.0, 0.0)
+    return PageQuality(words,
+                       sum(q.confidence * q.words for q in qualities) / words,
+                       sum(q.text_height * q.words for q in qualities) / words)
+
+
+def parse_tsv(tsv: str) -> dict[int, PageQuality]:
+    """
+    Lit la sortie TSV de Tesseract (une ligne par élément, niveau 5 = mot).
+
+    :return: Qualité par numéro de page (à partir de 1).
+    """
+    words = {}
+    lines = tsv.splitlines()
+    if not lines:
+        return {}
+    header = lines[0].split("\t")
+    col = {name: i for i, name in enumerate(header)}
+    for line in lines[1:]:
+        row = line.split("\t")
+        if len(row) != len(header) or row[col["level"]] != "5":
+            continue
+        conf = float(row[col["conf"]])
+        if conf < 0 or not row[col["text"]].strip():
+            continue
+        confs, heights = words.setdefault(int(row[col["page_num"]]), ([], []))
+        confs.append(conf)
+        heights.append(int(row[col["height"]]))
+    return {page: page_quality(*values) for page, values in words.items()}
+
+
+def _extract_text_with_quality(image, langs, timeout=None, psm=None):
+    lang = langs or DEFAULT_LANGS
+    try:
+        data = pytesseract.image_to_data(image, lang=lang, config=tesseract_config(psm),
+                                         output_type=pytesseract.Output.DICT, timeout=timeout or 0)
+    except RuntimeError as e:
+        if _is_timeout(e):
+            raise StageTimeout("ocr", timeout) from e
+        raise
+    kept = [(float(c), h) for c, h, t in zip(data["conf"], data["height"], data["text"])
+            if float(c) >= 0 and str(t).strip()]
+    quality = page_quality([c for c, _ in kept], [h for _, h in kept])
+    return extract_text(image, langs, timeout, psm), quality
+
+
+def extract_texts_with_quality(images, langs: str | None = None, timeout=None,
+                               psm=None) -> list[tuple[str, PageQuality]]:
+    """
+    Comme `extract_texts`, mais renvoie aussi la qualité de chaque page.
+
+    Un seul appel à Tesseract produit à la fois le texte (sortie « txt »,
+    identique à `extract_texts`) et les mots avec leur confiance et leur
+    boîte (sortie « tsv »).
+
+    :param images: Liste d'images (PIL ou NumPy).
+    :param langs: ex. "eng" ou "fra" ou "eng+fra"; None → DEFAULT_LANGS
+    :param timeout: Délai maximal (s) pour tout le lot (StageTimeout au-delà).
+    :param psm: Mode de segmentation à la place de celui de DEFAULT_CONFIG.
+    :return: Liste de tuples (texte, PageQuality), dans l'ordre des images.
+    """
+    images = list(images)
+    if not images:
+        return []
+
+    lang = langs or DEFAULT_LANGS
+    with tempfile.TemporaryDirectory(prefix="geniepdf_ocr_") as tmp:
+        list_path = _write_page_list(images, tmp)
+        out_base = os.path.join(tmp, "out")
+        cmd = [pytesseract.pytesseract.tesseract_cmd, list_path, out_base, "-l", lang,
+               *tesseract_config(psm).split(), "txt", "tsv"]
+        _run(cmd, timeout)
+        with open(f"{out_base}.txt", "r", encoding="utf-8") as f:
+            text = f.read()
+        with open(f"{out_base}.tsv", "r", encoding="utf-8") as f:
+            qualities = parse_tsv(f.read())
+
+    chunks = text.split(PAGE_SEPARATOR)[:-1]
+    if len(chunks) != len(images):
+        per_page = timeout / len(images) if timeout else None
+        return [_extract_text_with_quality(img, langs, per_page, psm) for img in images]
+    empty = PageQuality(0, 0.0, 0.0)
+    return [(chunk + PAGE_SEPARATOR, qualities.get(i, empty)) for i, chunk in enumerate(chunks, 1)]
@@ -1,81 +1,127 @@
 import cv2
 import numpy as np
-import pytesseract
-
-def correct_orientation(pil_img):
-    # Conversion PIL → OpenCV
-    img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-
-    # ── Étape 1 : orientation large (0/90/180/270) ──
-    osd = pytesseract.image_to_osd(img, output_type=pytesseract.Output.DICT)
-    angle = osd["rotate"]           # ex. 90, 180, 270, 0
-    if angle != 0:
-        # sens inversé pour cv2.rotate
-        angle = 360 - angle
-        # rotation autour du centre
-        (h, w) = img.shape[:2]
-        M = cv2.getRotationMatrix2D((w/2, h/2), angle, 1.0)
-        img = cv2.warpAffine(img, M, (w, h), flags=cv2.INTER_LINEAR,
-                             borderMode=cv2.BORDER_REPLICATE)
-
-    # ── Étape 2 : dé‑skew fin (optionnel, voir §2) ──
-    img = deskew(img)
-
-    # Retourne en PIL si besoin
-    from PIL import Image
-    return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-
-
-def deskew(cv_img):
-    gray = cv2.cvtColor(cv_img, cv2.COLOR_BGR2GRAY)
-    # Seuillage binaire
-    _, bw = cv2.threshold(gray, 0, 255,
-                          cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-    # Recherche des contours → boîtes
-    coords = np.column_stack(np.where(bw > 0))
-    angle  = cv2.minAreaRect(coords)[-1]
-    # minAreaRect renvoie un angle dans [-90, 0]
-    if angle < -45:  # convertit en degrés classiques
-        angle = -(90 + angle)
-    else:
-        angle = -angle
-    # Si l’angle est inférieur à 0,5 °, on ignore
-    if abs(angle) < .5:
-        return cv_img
-    (h, w) = cv_img.shape[:2]
+
+from pdf_tools.orientation import OrientationTracker
+from pdf_tools.skew import estimate_skew
+from utils import metrics
+
+# Identifie les réglages de nettoyage (clé du cache de pages) : à changer
+# dès que le résultat de `preprocess` change (le facteur d'agrandissement
+# est ajouté à la clé séparément, voir `cleaning_profile`)
+CLEANING_PROFILE = "gray-osd-skewprofile-blur5-otsu-sharpen"
+
+# Inclinaison (degrés) en dessous de laquelle la page n'est pas redressée
+MIN_SKEW = 0.5
+
+# Rotation horaire OSD → code cv2.rotate (rotation exacte, sans recadrage)
+_ROTATIONS = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+_SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], np.float32)
+
+
+def cleaning_profile(upscale=1.0):
+    """
+    Profil complet de nettoyage (réglages + agrandissement), pour les clés de cache.
+    """
+    return f"{CLEANING_PROFILE}-x{upscale:g}"
+
+
+def to_gray(image):
+    """
+    Convertit une page (PIL, NumPy RVB ou gris) en tampon uint8 2D modifiable.
+
+    Un tableau déjà en niveaux de gris est réutilisé tel quel (sans copie) :
+    les étapes suivantes le modifient sur place.
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim == 2 and image.dtype == np.uint8 and image.flags.writeable:
+            return image
+        if image.ndim == 3:
+            return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        return np.array(image, dtype=np.uint8)
+    if image.mode != "L":
+        image = image.convert("L")
+    return np.array(image)
+
+
+def correct_orientation(image, tracker=None):
+    """
+    Redresse la page (0/90/180/270) puis corrige l'inclinaison fine.
+
+    :param image: Page en niveaux de gris (tableau uint8), ou image PIL.
+    :param tracker: OrientationTracker du document (orientation des pages
+                    précédentes) ; None → page traitée isolément.
+    :return: Page redressée (tableau uint8 2D ; le même tampon si aucune
+             rotation à 90° ni correction d'inclinaison n'a été nécessaire).
+    """
+    gray = to_gray(image)
+
+    # ── Étape 1 : orientation large (0/90/180/270), détectée sur une vignette ──
+    tracker = tracker or OrientationTracker()
+    with metrics.span("orientation"):
+        angle = tracker.detect(gray)
+        if angle == 180:
+            cv2.flip(gray, -1, dst=gray)  # sur place
+        elif angle in _ROTATIONS:
+            gray = cv2.rotate(gray, _ROTATIONS[angle])
+
+    # ── Étape 2 : dé‑skew fin ──
+    with metrics.span("deskew"):
+        return deskew(gray)
+
+
+def deskew(gray):
+    """
+    Corrige l'inclinaison fine de la page (voir `skew.estimate_skew`).
+
+    :param gray: Page en niveaux de gris (tableau uint8).
+    :return: La même page si l'inclinaison est négligeable, sinon une copie redressée.
+    """
+    angle = estimate_skew(gray)
+    # Si l’angle est inférieur à 0,5 °, on ignore
+    if abs(angle) < MIN_SKEW:
+        return gray
+    (h, w) = gray.shape[:2]
     M = cv2.getRotationMatrix2D((w/2, h/2), angle, 1.0)
-    return cv2.warpAffine(cv_img, M, (w, h),
+    return cv2.warpAffine(gray, M, (w, h),
                           flags=cv2.INTER_LINEAR,
                           borderMode=cv2.BORDER_REPLICATE)
 
-def preprocess(image):
+
+def downscale(gray, factor):
     """
-    Prétraite une image pour améliorer les résultats de l'OCR.
-    
-    :param image: L'image à prétraiter.
-    :return: L'image prétraitée, prête pour l'OCR.
+    Réduit la page d'un facteur (< 1) pour un OCR moins coûteux ; la même
+    image si factor ≥ 1.
+    """
+    if factor >= 1:
+        return gray
+    return cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+
+
+def preprocess(image, tracker=None, upscale=1.0):
     """
-    """   # Conversion en niveau de gris
-    gray_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
-    
-    # Application d'un flou pour réduire le bruit
-    blurred_image = cv2.GaussianBlur(gray_image, (5, 5), 0)
-    
-    # Application de la méthode de seuillage pour rendre le texte plus net
-    threshold_image = cv2.threshold(blurred_image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
-    
-    # (Optionnel) Amélioration de la netteté de l'image
-    sharpened_image = cv2.addWeighted(threshold_image, 1.5, threshold_image, -0.5, 0)
-    return sharpened_image """
-    image = correct_orientation(image)
-    
-    gray = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
-    blur = cv2.GaussianBlur(gray, (5, 5), 0)
-    _, thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    sharpen_kernel = np.array([[0, -1, 0], [-1, 5,-1], [0, -1, 0]])
-    sharpen = cv2.filter2D(thresh, -1, sharpen_kernel)
-    resized = cv2.resize(sharpen, None, fx=2, fy=2, interpolation=cv2.INTER_LINEAR)
-    return resized
+    Prétraite une image pour améliorer les résultats de l'OCR.
 
+    Tout se fait dans un seul tampon uint8 en niveaux de gris : flou, seuillage
+    et accentuation sont appliqués sur place ; seuls une rotation à 90°,
+    le dé‑skew et l'agrandissement allouent une nouvelle image.
 
+    :param image: Page en niveaux de gris (tableau uint8, modifié sur place),
+                  ou image PIL / tableau RVB (converti une fois en gris).
+    :param tracker: OrientationTracker partagé par les pages d'un même document.
+    :param upscale: Facteur d'agrandissement final (1 = aucun).
+    :return: L'image prétraitée (tableau uint8 2D), prête pour l'OCR.
+    """
+    gray = correct_orientation(image, tracker)
 
+    with metrics.span("clean"):
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=gray)
+        cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
+        cv2.filter2D(gray, -1, _SHARPEN_KERNEL, dst=gray)
+        if upscale != 1:
+            gray = cv2.resize(gray, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_LINEAR)
+    return gray
@@ -0,0 +1,189 @@
+# pdf_tools/orientation.py
+from utils.lazy import lazy_import
+from utils.time_budget import FALLBACK, StageTimeout, record_timeout
+
+# Importés à la première page analysée : créer un OrientationTracker est gratuit
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+pytesseract = lazy_import("pytesseract")
+
+# Plus grand côté de la vignette envoyée à l'OSD (≈ 140 dpi pour une page A4)
+THUMBNAIL_MAX_SIDE = 1600
+# Rapport minimal entre les profils lignes/colonnes pour trancher l'axe du texte
+AXIS_RATIO = 2.0
+# Rapport minimal encre au-dessus / au-dessous du corps des lettres (ascendantes,
+# majuscules et accents dominent les descendantes dans un texte à l'endroit)
+UPRIGHT_RATIO = 2.0
+MIN_TEXT_LINES = 3
+
+
+def make_thumbnail(gray, max_side=THUMBNAIL_MAX_SIDE):
+    """
+    Réduit une image en niveaux de gris pour que son plus grand côté ≤ max_side.
+    """
+    scale = max_side / max(gray.shape[:2])
+    if scale >= 1:
+        return gray
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _ink(gray):
+    _, bw = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return bw
+
+
+def _dispersion(profile):
+    profile = profile.astype(np.float64)
+    mean = profile.mean()
+    return profile.var() / (mean * mean) if mean else 0.0
+
+
+def text_line_axis(gray):
+    """
+    Devine l'axe des lignes de texte d'après les profils de projection.
+
+    Des lignes horizontales donnent un profil par rangée très contrasté
+    (lignes / interlignes) et un profil par colonne plus uniforme.
+
+    :return: "horizontal", "vertical" ou None si la géométrie est ambiguë.
+    """
+    bw = _ink(gray)
+    rows, cols = _dispersion(bw.sum(axis=1)), _dispersion(bw.sum(axis=0))
+    if rows >= AXIS_RATIO * cols:
+        return "horizontal"
+    if cols >= AXIS_RATIO * rows:
+        return "vertical"
+    return None
+
+
+def _ink_around_lines(gray):
+    """
+    Encre au-dessus et au-dessous du corps des lettres, sommée sur les lignes
+    de texte horizontales de la page.
+
+    :return: Tuple (nombre de lignes, encre au-dessus, encre au-dessous).
+    """
+    rows = _ink(gray).sum(axis=1)
+    if not rows.any():
+        return 0, 0, 0
+    is_ink = rows > rows.max() * 0.02
+    above = below = lines = 0
+    y, n = 0, len(rows)
+    while y < n:
+        if not is_ink[y]:
+            y += 1
+            continue
+        start = y
+        while y < n and is_ink[y]:
+            y += 1
+        band = rows[start:y]
+        if len(band) < 4:
+            continue
+        body = np.flatnonzero(band >= 0.5 * band.max())
+        above += int(band[:body[0]].sum())
+        below += int(band[body[-1] + 1:].sum())
+        lines += 1
+    return lines, above, below
+
+
+def text_direction(gray):
+    """
+    Sens des lignes de texte horizontales, quand il est net.
+
+    Pour chaque ligne de texte, on compare l'encre au-dessus du corps des
+    lettres (ascendantes, majuscules, accents) à celle au-dessous (descendantes).
+
+    :return: "upright", "inverted" (à l'envers) ou None si le sens est incertain.
+    """
+    lines, above, below = _ink_around_lines(gray)
+    if lines < MIN_TEXT_LINES:
+        return None
+    if above >= UPRIGHT_RATIO * max(below, 1):
+        return "upright"
+    if below >= UPRIGHT_RATIO * max(above, 1):
+        return "inverted"
+    return None
+
+
+def looks_upright(gray):
+    """
+    Indique si des lignes de texte horizontales sont clairement à l'endroit.
+    """
+    return text_direction(gray) == "upright"
+
+
+def looks_inverted(gray):
+    """
+    Indique si des lignes de texte horizontales sont clairement à l'envers
+    (le miroir de `looks_upright`).
+    """
+    return text_direction(gray) == "inverted"
+
+
+def osd_rotation(gray, timeout=None):
+    """
+    Orientation (0/90/180/270) selon l'OSD de Tesseract, ou None en cas d'échec
+    (trop peu de caractères, page vide…).
+
+    :param timeout: Délai maximal (s) ; au-delà, Tesseract est arrêté (StageTimeout).
+    """
+    try:
+        return int(pytesseract.image_to_osd(gray, output_type=pytesseract.Output.DICT,
+                                            timeout=timeout or 0)["rotate"])
+    except (pytesseract.TesseractError, KeyError, ValueError):
+        return None
+    except RuntimeError as e:
+        # pytesseract signale l'arrêt sur délai par un RuntimeError générique
+        if "timeout" in str(e).lower():
+            raise StageTimeout("osd", timeout) from e
+        raise
+
+
+class OrientationTracker:
+    """
+    Mémorise l'orientation des pages déjà vues d'un même document.
+
+    Les documents scannés sont presque toujours tournés de la même façon :
+    une page dont la géométrie est compatible avec l'orientation précédente
+    la réutilise sans relancer l'OSD, sauf si elle est visiblement à l'envers.
+    """
+
+    def __init__(self, osd_timeout=None):
+        """
+        :param osd_timeout: Budget (s) d'un appel OSD ; au-delà, la page garde
+                            l'orientation précédente (chemin sans OSD).
+        """
+        self.rotation = None
+        self.osd_calls = 0
+        self.osd_timeout = osd_timeout
+
+    def detect(self, gray):
+        """
+        Détermine la rotation à appliquer (sens horaire) pour redresser la page.
+
+        :param gray: Page en niveaux de gris (tableau uint8).
+        :return: 0, 90, 180 ou 270.
+        """
+        thumb = make_thumbnail(gray)
+        axis = text_line_axis(thumb)
+
+        direction = text_direction(thumb) if axis == "horizontal" else None
+
+        if direction == "upright":
+            rotation = 0
+        elif self.rotation is not None and axis == ("horizontal" if self.rotation in (0, 180) else "vertical") \
+                and not (self.rotation == 0 and direction == "inverted"):
+            # Une page à l'envers après une page à l'endroit passe par l'OSD
+            rotation = self.rotation
+        else:
+            self.osd_calls += 1
+            try:
+                rotation = osd_rotation(thumb, self.osd_timeout)
+            except StageTimeout as e:
+                record_timeout("osd", e.seconds, FALLBACK)
+                rotation = None
+            if rotation is None:
+                rotation = self.rotation or 0
+
+        self.rotation = rotation
+        return rotation
@@ -0,0 +1,49 @@
+# pdf_tools/page_hash.py
+import hashlib
+
+import fitz  # PyMuPDF
+
+
+def _file_fingerprints(pdf_path, pages):
+    """
+    Empreintes de secours (contenu du fichier + numéro de page) quand
+    PyMuPDF ne peut pas lire le document.
+    """
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    return [hashlib.sha256(f"{digest}:{n}".encode()).hexdigest() for n in pages]
+
+
+def page_fingerprints(pdf_path, pages) -> list[str]:
+    """
+    Calcule une empreinte SHA-256 du contenu de chaque page demandée.
+
+    L'empreinte couvre le flux de contenu de la page, ses images et formulaires
+    (XObjects), sa taille et sa rotation : deux pages identiques ont la même
+    empreinte, même dans des fichiers différents ou renommés.
+
+    :param pdf_path: Chemin du fichier PDF.
+    :param pages: Numéros de page (à partir de 1).
+    :return: Liste des empreintes hexadécimales, dans l'ordre des pages.
+    """
+    pages = list(pages)
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception:
+        return _file_fingerprints(pdf_path, pages)
+
+    with doc:
+        out = []
+        for n in pages:
+            page = doc[n - 1]
+            h = hashlib.sha256()
+            h.update(repr((tuple(page.rect), page.rotation)).encode())
+            h.update(page.read_contents())
+            for xref in sorted({img[0] for img in page.get_images(full=True)} |
+                               {xo[0] for xo in page.get_xobjects()}):
+                h.update(doc.xref_stream_raw(xref) or b"")
+            out.append(h.hexdigest())
+        return out
@@ -1,12 +1,22 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from pdf2image.exceptions import PDFPopplerTimeoutError
 import os
 
+import numpy as np
+
+from utils.time_budget import StageTimeout
+
+
 def convert_pdf_to_images(pdf_path, dpi=300, thread_count=5):
     """
     Convertit un fichier PDF en une liste d'images à partir des pages du PDF.
 
+    Attention : toutes les pages restent en mémoire ; pour les gros documents,
+    préférer `iter_pdf_images`.
+
     :param pdf_path: Le chemin vers le fichier PDF à convertir.
     :param dpi: La résolution des images de sortie (par défaut 300 DPI).
+    :param thread_count: Nombre de processus pdftoppm lancés en parallèle.
     :return: Liste d'objets image PIL représentant les pages du PDF.
     """
     if not os.path.exists(pdf_path):
@@ -14,8 +24,76 @@ def convert_pdf_to_images(pdf_path, dpi=300, thread_count=5):
 
     try:
         # Utilisation de pdf2image pour convertir le PDF en images
-        images = convert_from_path(pdf_path, dpi=dpi)
+        images = convert_from_path(pdf_path, dpi=dpi, thread_count=thread_count)
         return images
     except Exception as e:
         raise RuntimeError(f"Erreur lors de la conversion du PDF en images : {str(e)}")
 
+
+def get_page_count(pdf_path):
+    """
+    Retourne le nombre de pages du PDF (via pdfinfo, sans rendu).
+    """
+    try:
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+    except Exception as e:
+        raise RuntimeError(f"Erreur lors de la lecture des informations du PDF : {str(e)}")
+
+
+def _page_windows(pages, window):
+    """
+    Découpe une liste de numéros de page en plages contiguës d'au plus `window` pages.
+    """
+    run = []
+    for n in pages:
+        if run and (n != run[-1] + 1 or len(run) >= window):
+            yield run
+            run = []
+        run.append(n)
+    if run:
+        yield run
+
+
+def iter_pdf_images(pdf_path, dpi=300, thread_count=1, window=1, pages=None, grayscale=False, timeout=None):
+    """
+    Rend le PDF page par page, sous forme de générateur.
+
+    Seule une fenêtre de `window` pages est en mémoire à la fois : la mémoire
+    consommée ne dépend pas du nombre de pages du document.
+
+    :param pdf_path: Le chemin vers le fichier PDF à convertir.
+    :param dpi: La résolution des images de sortie.
+    :param thread_count: Nombre de processus pdftoppm par fenêtre (≤ window).
+    :param window: Nombre de pages rendues par appel à pdftoppm.
+    :param pages: Numéros de page (à partir de 1) à rendre ; None → toutes.
+    :param grayscale: Rendu directement en niveaux de gris (pdftoppm -gray) ;
+                      les pages sont alors des tableaux NumPy uint8 2D.
+    :param timeout: Budget de rendu par page (s) ; une fenêtre qui le dépasse
+                    est arrêtée (StageTimeout).
+    :return: Générateur de tuples (numéro de page, image PIL ou tableau NumPy).
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"Le fichier PDF à l'emplacement {pdf_path} n'existe pas.")
+
+    if pages is None:
+        pages = range(1, get_page_count(pdf_path) + 1)
+    window = max(1, window)
+
+    for run in _page_windows(pages, window):
+        budget = timeout * len(run) if timeout else None
+        try:
+            images = convert_from_path(pdf_path, dpi=dpi,
+                                       first_page=run[0], last_page=run[-1],
+                                       thread_count=max(1, min(thread_count, len(run))),
+                                       grayscale=grayscale, timeout=budget)
+        except PDFPopplerTimeoutError as e:
+            raise StageTimeout("render", budget) from e
+        except Exception as e:
+            raise RuntimeError(f"Erreur lors de la conversion du PDF en images : {str(e)}")
+        if len(images) != len(run):
+            raise RuntimeError(f"Pages {run[0]}–{run[-1]} de {pdf_path} introuvables.")
+        # On relâche chaque image dès qu'elle est consommée
+        images.reverse()
+        for n in run:
+            image = images.pop()
+            yield n, np.array(image) if grayscale else image
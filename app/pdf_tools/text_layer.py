@@ -0,0 +1,64 @@
+# pdf_tools/text_layer.py
+import fitz  # PyMuPDF
+
+# Seuils par défaut pour juger si la couche texte d'une page est exploitable
+MIN_TEXT_CHARS = 30           # caractères non blancs minimum
+MIN_ALNUM_RATIO = 0.5         # part minimale de caractères alphanumériques
+MAX_REPLACEMENT_RATIO = 0.05  # part maximale de « � » (polices sans ToUnicode)
+
+
+def is_text_usable(text: str | None, min_chars: int = MIN_TEXT_CHARS) -> bool:
+    """
+    Indique si le texte natif d'une page peut remplacer l'OCR.
+
+    :param text: Texte extrait de la couche texte de la page.
+    :param min_chars: Nombre minimal de caractères non blancs.
+    :return: True si le texte est assez long et lisible.
+    """
+    if not text:
+        return False
+    compact = "".join(text.split())
+    if len(compact) < min_chars:
+        return False
+    alnum = sum(c.isalnum() for c in compact)
+    if alnum / len(compact) < MIN_ALNUM_RATIO:
+        return False
+    return compact.count("�") / len(compact) <= MAX_REPLACEMENT_RATIO
+
+
+def extract_page_texts(pdf_path, min_chars: int = MIN_TEXT_CHARS, pages=None) -> list[str | None]:
+    """
+    Lit la couche texte des pages du PDF, sans rastérisation.
+
+    :param pdf_path: Chemin du fichier PDF.
+    :param min_chars: Seuil transmis à `is_text_usable`.
+    :param pages: Numéros de page (à partir de 1) à lire ; None → toutes.
+    :return: Liste (une entrée par page demandée) du texte natif, ou None si
+             la page doit passer par l'OCR (page scannée, texte vide ou illisible).
+    """
+    texts = []
+    with fitz.open(pdf_path) as doc:
+        for n in (pages if pages is not None else range(1, doc.page_count + 1)):
+            text = doc[n - 1].get_text("text")
+            texts.append(text if is_text_usable(text, min_chars) else None)
+    return texts
+
+
+def count_pages(pdf_path) -> int:
+    """
+    Retourne le nombre de pages du PDF sans rien rendre.
+    """
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def page_sizes(pdf_path, pages=None) -> list[tuple[float, float]]:
+    """
+    Dimensions (largeur, hauteur) en points des pages demandées, rotation
+    comprise, sans rien rendre.
+
+    :param pages: Numéros de page (à partir de 1) ; None → toutes.
+    """
+    with fitz.open(pdf_path) as doc:
+        return [(doc[n - 1].rect.width, doc[n - 1].rect.height)
+                for n in (pages if pages is not None else range(1, doc.page_count + 1))]
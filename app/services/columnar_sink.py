@@ -0,0 +1,250 @@
+# services/columnar_sink.py
+import datetime
+import json
+import logging
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from services import regex_parser
+
+logger = logging.getLogger("GeniePDFLogger")
+
+FORMATS = ("parquet", "feather")
+# Lignes accumulées par modèle (et partition) avant l'écriture d'un groupe de lignes
+ROW_GROUP_SIZE = 10000
+COMPRESSION = "zstd"
+UNKNOWN_DATE = "unknown"
+# Fichiers publiés par la dernière exécution, relus pour ne remplacer que ceux-là
+PARTS_FILE = "_geniepdf_parts.{fmt}.json"
+# Valeurs textuelles reconnues pour les colonnes booléennes
+_TRUE = {"true", "1", "yes", "y", "oui", "vrai"}
+_FALSE = {"false", "0", "no", "n", "non", "faux", ""}
+
+# Colonnes communes, en tête de chaque jeu de données
+_COMMON_FIELDS = [
+    pa.field("file", pa.string()),
+    pa.field("page", pa.int32()),
+    pa.field("source", pa.string()),
+]
+
+_ARROW_TYPES = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), str: pa.string()}
+
+# Schéma typé et stable de chaque modèle, tiré des tables du parser regex
+MODEL_SCHEMAS = {
+    model: pa.schema(_COMMON_FIELDS + [pa.field(name, _ARROW_TYPES[t]) for name, t in regex_parser.model_fields(model)])
+    for model in regex_parser.MODELS
+}
+
+
+def _infer_schema(model, rows):
+    # Modèle sans table : schéma déduit du premier groupe de lignes, puis figé
+    inferred = pa.Table.from_pylist([{k: v for k, v in r.items() if k != "model"} for r in rows]).schema
+    fields = _COMMON_FIELDS + [f for f in inferred if f.name not in {c.name for c in _COMMON_FIELDS}]
+    logger.warning(f"Modèle « {model} » sans schéma déclaré : colonnes déduites {[f.name for f in fields]}")
+    return pa.schema(fields)
+
+
+def _cast(value, type_):
+    """
+    Valeur convertie au type de la colonne, ou None si elle n'y entre pas.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    try:
+        if pa.types.is_boolean(type_):
+            return _to_bool(value)
+        if pa.types.is_integer(type_):
+            return int(value) if not isinstance(value, bool) and float(value).is_integer() else None
+        if pa.types.is_floating(type_):
+            return None if isinstance(value, bool) else float(value)
+        if pa.types.is_string(type_):
+            return value if isinstance(value, str) else str(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+def _to_bool(value):
+    # "false" ne doit pas devenir True : le texte est interprété, pas sa longueur
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip().lower()
+        return True if text in _TRUE else False if text in _FALSE else None
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return None
+
+
+def to_table(rows, schema):
+    """
+    Table Arrow des enregistrements, colonne par colonne selon `schema`
+    (les champs hors schéma sont ignorés).
+    """
+    return pa.Table.from_arrays(
+        [pa.array([_cast(r.get(f.name), f.type) for r in rows], type=f.type) for f in schema],
+        schema=schema,
+    )
+
+
+_dates = {}
+
+
+def source_date(file_path):
+    """
+    Date (AAAA-MM-JJ) de modification du PDF source, pour le partitionnement.
+    """
+    if file_path not in _dates:
+        try:
+            _dates[file_path] = datetime.date.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+        except (OSError, TypeError):
+            _dates[file_path] = UNKNOWN_DATE
+    return _dates[file_path]
+
+
+class ColumnarWriter:
+    """
+    Écrit les enregistrements d'un lot en un jeu de données par modèle
+    (Parquet ou Feather), au fil de l'eau :
+
+        <dossier>/<modèle>/part-<exécution>.parquet
+        <dossier>/<modèle>/date=AAAA-MM-JJ/part-<exécution>.parquet   (partition_by_date)
+
+    Les lignes sont regroupées par modèle puis écrites par groupes de
+    `row_group_size` : la mémoire ne dépend pas de la taille du lot. Les
+    fichiers sont écrits sous un nom temporaire et ne remplacent ceux de
+    l'exécution précédente qu'à la fermeture ; une erreur laisse donc
+    l'ancien jeu de données intact. Seuls les fichiers publiés par une
+    exécution précédente (listés dans PARTS_FILE) sont supprimés : les
+    autres fichiers du dossier ne sont jamais touchés.
+    """
+
+    def __init__(self, directory, fmt="parquet", row_group_size=ROW_GROUP_SIZE, partition_by_date=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Format colonnaire inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+        if not directory or os.path.splitext(directory)[1].lower() in (".json", ".jsonl") or os.path.isfile(directory):
+            raise ValueError(f"Dossier de sortie colonnaire invalide : « {directory} » (un dossier est attendu)")
+        self.directory = directory
+        self.fmt = fmt
+        self.row_group_size = max(1, row_group_size)
+        self.partition_by_date = partition_by_date
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.schemas = {}
+        self.rows_written = {}
+        self._buffers = {}     # (modèle, partition) -> lignes en attente
+        self._writers = {}     # (modèle, partition) -> (writer, chemin temporaire)
+        self._ignored = {}     # modèle -> colonnes hors schéma déjà signalées
+
+    def _partition_dir(self, model, partition):
+        parts = [self.directory, model] + ([f"date={partition}"] if partition else [])
+        return os.path.join(*parts)
+
+    def _open(self, key, schema):
+        directory = self._partition_dir(*key)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f"part-{self.run_id}.{self.fmt}.tmp")
+        if self.fmt == "parquet":
+            writer = pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION)
+        else:
+            # Feather v2 = fichier IPC Arrow, écrit par lots d'enregistrements
+            writer = ipc.new_file(tmp_path, schema, options=ipc.IpcWriteOptions(compression=COMPRESSION))
+        self._writers[key] = (writer, tmp_path)
+        return writer
+
+    def _schema(self, model, rows):
+        schema = self.schemas.get(model)
+        if schema is None:
+            schema = self.schemas[model] = MODEL_SCHEMAS.get(model) or _infer_schema(model, rows)
+        extra = {k for r in rows for k in r} - set(schema.names) - {"model"} - self._ignored.setdefault(model, set())
+        if extra:
+            logger.warning(f"Colonnes hors schéma ignorées pour « {model} » : {sorted(extra)}")
+            self._ignored[model] |= extra
+        return schema
+
+    def _flush(self, key):
+        rows = self._buffers.pop(key, None)
+        if not rows:
+            return
+        model = key[0]
+        schema = self._schema(model, rows)
+        table = to_table(rows, schema)
+        writer = self._writers[key][0] if key in self._writers else self._open(key, schema)
+        if self.fmt == "parquet":
+            writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            writer.write_table(table, max_chunksize=self.row_group_size)
+        self.rows_written[model] = self.rows_written.get(model, 0) + len(rows)
+
+    def write_records(self, records):
+        for record in records:
+            model = record.get("model") or "unknown"
+            partition = source_date(record.get("file")) if self.partition_by_date else None
+            key = (model, partition)
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append(record)
+            if len(buffer) >= self.row_group_size:
+                self._flush(key)
+
+    def close(self, commit=True):
+        """
+        Écrit les lignes restantes et publie les fichiers (commit=False :
+        abandonne les fichiers de cette exécution).
+        """
+        if commit:
+            for key in list(self._buffers):
+                self._flush(key)
+        self._buffers.clear()
+        published = []
+        for writer, tmp_path in self._writers.values():
+            writer.close()
+            if commit:
+                os.replace(tmp_path, tmp_path[:-len(".tmp")])
+                published.append(tmp_path[:-len(".tmp")])
+            else:
+                os.remove(tmp_path)
+        if commit:
+            self._publish(published)
+        self._writers.clear()
+
+    def _parts_path(self):
+        return os.path.join(self.directory, PARTS_FILE.format(fmt=self.fmt))
+
+    def _read_parts(self):
+        try:
+            with open(self._parts_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _publish(self, published):
+        # Le jeu de données remplace celui de l'exécution précédente, et lui seul
+        current = sorted(os.path.relpath(p, self.directory) for p in published)
+        for rel in self._read_parts():
+            if rel not in current:
+                try:
+                    os.remove(os.path.join(self.directory, rel))
+                except FileNotFoundError:
+                    pass
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self._parts_path()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        os.replace(tmp, self._parts_path())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(commit=exc_type is None)
+
+
+def read_dataset(directory, model, fmt="parquet"):
+    """
+    Relit le jeu de données d'un modèle (table Arrow, partitions comprises).
+    """
+    return ds.dataset(os.path.join(directory, model), format=fmt, partitioning="hive").to_table()
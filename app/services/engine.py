@@ -0,0 +1,29 @@
+# services/engine.py
+from utils.lazy import lazy_import
+
+# Un seul des deux moteurs sert pendant une exécution : on ne charge que celui-là
+page_scheduler = lazy_import("services.page_scheduler")
+extraction_service = lazy_import("services.extraction_service")
+
+ENGINES = ("pool", "async")
+
+
+def iter_documents(pdf_files, config, progress=None, cancel=None, incomplete=None):
+    """
+    Documents traités au fil de leur complétion, par le moteur configuré
+    (ENGINE) : pool de processus ("pool") ou pipeline asyncio par étapes
+    ("async"). Même interface pour la CLI et la GUI.
+
+    :param progress: PageProgress avancé page par page ; optionnel.
+    :param cancel: threading.Event d'annulation ; optionnel.
+    :param incomplete: Ensemble complété des documents restitués avec une page
+                       en échec ou hors budget (à ne pas inscrire au manifeste).
+    :return: Générateur de tuples (fichier, pages).
+    :raises utils.progress.Cancelled: si `cancel` est levé.
+    """
+    if config.engine not in ENGINES:
+        raise ValueError(f"Moteur inconnu : {config.engine} (attendu : {', '.join(ENGINES)})")
+    if config.engine == "async":
+        service = extraction_service.ExtractionService(config, progress, cancel)
+        return service.iter_documents(pdf_files, incomplete)
+    return page_scheduler.iter_documents(pdf_files, config, progress=progress, cancel=cancel, incomplete=incomplete)
@@ -29,3 +29,31 @@ class ExportService:
             writer = csv.DictWriter(f, fieldnames=keys)
             writer.writeheader()
             writer.writerows(data)
+
+    def export_to_columnar(self, data, output_dir, fmt="parquet", partition_by_date=False):
+        """
+        Exporte les données en un jeu de données Parquet/Feather par modèle.
+
+        :param data: Enregistrements (dicts avec "model", "file", "page"...).
+        :param output_dir: Dossier de sortie.
+        :param fmt: "parquet" ou "feather".
+        """
+        from services.columnar_sink import ColumnarWriter
+        with ColumnarWriter(output_dir, fmt, partition_by_date=partition_by_date) as writer:
+            writer.write_records(data)
+
+    def export_to_sqlite(self, data, db_path):
+        """
+        Exporte les données dans la base SQLite indexée (une table par modèle).
+        Les enregistrements d'un fichier déjà présent remplacent les anciens.
+
+        :param data: Enregistrements (dicts avec "model", "file", "page"...).
+        :param db_path: Chemin de la base.
+        """
+        from services.result_store import ResultStore
+        by_file = {}
+        for record in data:
+            by_file.setdefault(record.get("file"), []).append(record)
+        with ResultStore(db_path) as store:
+            for file_path, records in by_file.items():
+                store.write_document(file_path, records)
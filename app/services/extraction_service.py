@@ -1,44 +1,416 @@
-from app.services.classification_service import ClassificationService
-from app.services.export_service import ExportService
-from app.repositories.pdf_repository import PdfRepository
-from app.dto.extraction_result import ExtractionResult
+# services/extraction_service.py
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import os
+import queue
+import threading
+
+from services.classification_service import ClassificationService
+from services.export_service import ExportService
+from dto.extraction_result import ExtractionResult
+from pdf_tools import page_hash
+from services import pdf_pipeline
+from services.pdf_pipeline import SOURCE_OCR, SOURCE_TEXT_LAYER, count_pages, read_text_layer, tag_source
+from services.regex_parser import extract_data_with_regex
+from utils import metrics, page_cache
+from utils.lazy import lazy_import
+from utils.memory_budget import MemoryBudget
+from utils.progress import Cancelled
+
+# Chargé à la première page scannée (comme dans pdf_pipeline)
+image_cleaner = lazy_import("pdf_tools.image_cleaner")
+
+logger = logging.getLogger("GeniePDFLogger")
+
+STAGES = ("prepare", "render", "clean", "ocr", "parse")
+# Intervalle de vérification de la demande d'annulation (s)
+CANCEL_POLL = 0.1
+
+_DONE = object()
+
+
+class _Document:
+    """
+    Pages d'un document en cours : résultats par page et pages restantes.
+    """
+
+    def __init__(self, path, n_pages, orientation):
+        self.path = path
+        self.pages = [None] * n_pages
+        self.remaining = n_pages
+        self.orientation = orientation
+        self.keys = {}          # page → clés de cache (image, texte)
+        self.degraded = set()   # pages hors budget reprises en mode dégradé (pas de cache)
+        self.admitted = {}      # page → mémoire réservée (octets) jusqu'à son parsing
+        self.layout = None      # gabarit de zones (OCR par zones), None → pleine page
+        self.incomplete = False  # une page en échec ou dégradée : document à retraiter
+
+
+# ── travail de chaque étape (exécuté dans les threads du pool) ──
+def prepare_document(path, config):
+    """
+    Nombre de pages, couche texte et empreintes (cache) d'un document.
+
+    :return: Tuple (nombre de pages, textes natifs par page — None = à OCRiser,
+             empreintes des pages à OCRiser ou None sans cache).
+    """
+    n_pages = count_pages(path)
+    texts = read_text_layer(path, config, list(range(1, n_pages + 1)))
+    scanned = [n for n, t in enumerate(texts, start=1) if t is None]
+    fingerprints = None
+    if scanned and config.use_cache:
+        fingerprints = dict(zip(scanned, page_hash.page_fingerprints(path, scanned)))
+    return n_pages, texts, fingerprints
+
+
+def render_pages(path, pages, config, dpi=None, degraded=None):
+    """
+    Flux (numéro de page, image en niveaux de gris ou None si le rendu a
+    dépassé son budget) d'une plage de pages, voir pdf_pipeline.render_pages.
+    """
+    return pdf_pipeline.render_pages(path, pages, config, dpi, degraded)
+
+
+def clean_page(image, orientation, config):
+    # OpenCV relâche le GIL : plusieurs pages se nettoient en parallèle dans des threads
+    return image_cleaner.preprocess(image, orientation, config.ocr_upscale)
+
+
+def ocr_images(images, config, labels, layouts):
+    """
+    OCR d'un lot d'images nettoyées (un appel Tesseract, dans le budget
+    OCR ; zones seules pour les pages à gabarit) ; en DPI adaptatif, avec
+    la qualité de chaque page.
+
+    :param labels: Étiquettes (fichier, page) de chaque image, pour le bilan.
+    :param layouts: Gabarit de zones (ou None) de chaque image.
+    :return: Liste d'OcrResult (texte, qualité, dégradé).
+    """
+    return pdf_pipeline.ocr_with_layout(images, config, labels, layouts, with_quality=config.adaptive_dpi)
+
+
+def _next_or_done(iterator):
+    return next(iterator, _DONE)
+
 
 class ExtractionService:
-    def __init__(self, config):
-        self.pdf_repository = PdfRepository(config.pdf_input_directory)
+    """
+    Pipeline d'extraction par étapes, piloté par asyncio :
+
+        prepare → render → clean → ocr → parse
+
+    Chaque étape a son propre nombre de workers (threads) et une file bornée
+    vers l'étape suivante. Rendu (pdftoppm) et OCR (tesseract) sont des
+    sous-processus, le nettoyage (OpenCV) relâche le GIL : les étapes se
+    chevauchent au lieu de s'enchaîner document par document, et une étape
+    lente bloque celles qui l'alimentent (files pleines) au lieu d'accumuler
+    des images en mémoire. Au plus `queue_size` images attendent entre deux
+    étapes. Avec un budget mémoire (max_memory_mb), une plage de pages
+    n'entre au rendu que si l'empreinte estimée des pages en cours le permet.
+
+    Les pages à couche texte exploitable et celles déjà en cache vont
+    directement au parser. Utilisable depuis la CLI (`iter_documents`, même
+    interface que page_scheduler.iter_documents) et la GUI (`cancel`).
+    """
+
+    def __init__(self, config, progress=None, cancel_event=None):
+        """
+        :param progress: PageProgress alimenté page par page (GUI) ; optionnel.
+        :param cancel_event: threading.Event partagé déclenchant `cancel` ; optionnel.
+        """
+        self.config = config
+        self.progress = progress
+        cores = os.cpu_count() or 1
+        self.limits = {
+            "prepare": 1,
+            "render": max(1, config.pipeline_render_workers),
+            "clean": config.pipeline_clean_workers if config.pipeline_clean_workers > 0 else cores,
+            "ocr": config.pipeline_ocr_workers if config.pipeline_ocr_workers > 0 else cores,
+            "parse": 1,                    # Python pur : un seul worker suffit (GIL)
+        }
+        self.queue_size = max(1, config.pipeline_queue_size)
+        self.memory = MemoryBudget(config.max_memory_mb)
         self.classification_service = ClassificationService()
         self.export_service = ExportService()
-    
-    def extract_and_classify(self):
+        self._cancel = cancel_event or threading.Event()
+
+    def cancel(self):
+        """
+        Interrompt le traitement : le travail en file est abandonné, les
+        appels en cours (pdftoppm, tesseract) se terminent sans suite.
+        """
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    # ── interface synchrone ──
+    def iter_documents(self, pdf_files, incomplete=None):
+        """
+        Traite les documents et les restitue au fil de leur complétion.
+
+        Le pipeline tourne dans sa propre boucle asyncio (thread dédié) ; un
+        consommateur lent freine tout le pipeline (file de sortie bornée).
+
+        :param incomplete: Ensemble complété, avant la restitution de chaque
+                           document, des documents dont une page a échoué ou
+                           dépassé son budget (à retraiter).
+
+        :return: Générateur de tuples (fichier, pages) ; `pages` est la liste
+                 ordonnée des modèles extraits par page.
+        :raises Cancelled: si `cancel` a été appelé.
+        """
+        out = queue.Queue(self.queue_size)
+        errors = []
+
+        def run():
+            try:
+                asyncio.run(self.run(pdf_files, out.put, incomplete))
+            except BaseException as e:          # Cancelled compris
+                errors.append(e)
+            finally:
+                out.put(_DONE)
+
+        thread = threading.Thread(target=run, name="extraction-pipeline", daemon=True)
+        thread.start()
+        finished = False
+        try:
+            while (item := out.get()) is not _DONE:
+                yield item
+            finished = True
+        finally:
+            if not finished:
+                # Consommateur interrompu : on arrête le pipeline et on libère la file
+                self._cancel.set()
+                while thread.is_alive() or not out.empty():
+                    try:
+                        out.get(timeout=CANCEL_POLL)
+                    except queue.Empty:
+                        pass
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def extract_and_classify(self, pdf_files=None, output_path="output/extracted_data.json"):
         """
         Extraire les données des PDF, les classer, puis les exporter.
         """
-        pdf_files = self.pdf_repository.get_all_pdfs()
+        from main_cli import get_pdf_files
+        pdf_files = pdf_files if pdf_files is not None else get_pdf_files(self.config.pdf_input_directory)
         all_extracted_data = []
 
-        for pdf_file in pdf_files:
-            # Extraction des données du PDF
-            extracted_data = self.extract_data_from_pdf(pdf_file)
-
+        for pdf_file, pages in self.iter_documents(pdf_files):
+            extracted_data = [dict(m, page=n) for n, models in enumerate(pages, start=1) for m in models]
             # Classification des données extraites
             classified_data = self.classification_service.classify_data(extracted_data)
-
             # Sauvegarde du résultat au format DTO
-            extraction_result = ExtractionResult(pdf_file, classified_data)
-            all_extracted_data.append(extraction_result.to_dict())
+            all_extracted_data.append(ExtractionResult(pdf_file, classified_data).to_dict())
 
         # Exportation des résultats
-        self.export_service.export_to_json(all_extracted_data, "output/extracted_data.json")
+        self.export_service.export_to_json(all_extracted_data, output_path)
+        return all_extracted_data
 
-    def extract_data_from_pdf(self, pdf_file):
+    # ── pipeline asyncio ──
+    async def run(self, pdf_files, emit, incomplete=None):
         """
-        Extraire les données d'un fichier PDF.
-        
-        :param pdf_file: Nom du fichier PDF à traiter.
-        :return: Données extraites sous forme de liste.
+        Exécute le pipeline ; `emit((fichier, pages))` est appelé (dans un
+        thread du pool, il peut donc bloquer) pour chaque document terminé.
+
+        :param incomplete: voir `iter_documents`.
         """
-        # Exemple d'appel à la fonction de traitement du PDF
-        # C'est ici que le processus de OCR, nettoyage et extraction des données sera effectué
-        # Cette méthode peut être liée à `process_pdf` dans main.py
-        extracted_data = []  # Remplacer par la logique réelle
-        return extracted_data
+        loop = asyncio.get_running_loop()
+        workers = sum(self.limits.values()) + 1
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction")
+        queues = {stage: asyncio.Queue(self.queue_size) for stage in STAGES[1:]}
+        cache = page_cache.get_cache(self.config)   # utilisé depuis la boucle uniquement (connexion SQLite)
+        freed = asyncio.Condition()                  # mémoire libérée (budget mémoire)
+
+        def call(fn, *args):
+            # Le contexte (étiquettes des mesures) suit l'appel dans le thread, comme asyncio.to_thread
+            return loop.run_in_executor(executor, functools.partial(contextvars.copy_context().run, fn, *args))
+
+        async def finish_page(doc, n, text, source):
+            await queues["parse"].put((doc, n, text, source))
+
+        # prepare : un document à la fois, pages dirigées vers l'étape utile
+        async def prepare():
+            for path in pdf_files:
+                try:
+                    n_pages, texts, fingerprints = await call(prepare_document, path, self.config)
+                except Exception as e:
+                    logger.error(f"Erreur lors de la lecture de {path} : {e}")
+                    continue
+                doc = _Document(path, n_pages, pdf_pipeline.new_tracker(self.config))
+                doc.layout = pdf_pipeline.document_layout(path, self.config)
+                if self.progress is not None:
+                    self.progress.add_pages(n_pages, path)
+                if n_pages == 0:
+                    await call(emit, (path, []))
+                    continue
+                to_render = []
+                for n, text in enumerate(texts, start=1):
+                    if text is not None:
+                        await finish_page(doc, n, text, SOURCE_TEXT_LAYER)
+                        continue
+                    if cache is not None:
+                        doc.keys[n] = pdf_pipeline.cache_keys(fingerprints[n], self.config, doc.layout)
+                        cached = cache.get_text(doc.keys[n][1])
+                        if cached is not None:
+                            await finish_page(doc, n, cached, SOURCE_OCR)
+                            continue
+                    to_render.append(n)
+                footprints = {}
+                if to_render and self.memory.limit is not None:
+                    footprints = dict(zip(to_render, await call(pdf_pipeline.page_footprints,
+                                                                path, to_render, self.config, False)))
+                # Plages de `render_window` pages : un appel pdftoppm chacune
+                window = max(1, self.config.render_window)
+                for start in range(0, len(to_render), window):
+                    pages = to_render[start:start + window]
+                    if footprints:
+                        cost = sum(footprints[n] for n in pages)
+                        async with freed:
+                            await freed.wait_for(lambda: self.memory.try_acquire(cost))
+                        doc.admitted.update((n, footprints[n]) for n in pages)
+                    await queues["render"].put((doc, pages))
+
+        async def render():
+            while (item := await queues["render"].get()) is not _DONE:
+                doc, pages = item
+                low = min(self.config.min_dpi, self.config.image_dpi) if self.config.adaptive_dpi else None
+                images = render_pages(doc.path, pages, self.config, low, doc.degraded)
+                done = set()
+                try:
+                    with metrics.labels(file=doc.path):
+                        while (rendered := await call(_next_or_done, images)) is not _DONE:
+                            n, image = rendered
+                            done.add(n)
+                            if image is None:           # rendu hors budget, même en mode dégradé
+                                await finish_page(doc, n, None, SOURCE_OCR)
+                            else:
+                                await queues["clean"].put((doc, n, image))
+                except Exception as e:
+                    logger.error(f"Erreur lors du rendu de {doc.path} (pages {pages[0]}–{pages[-1]}) : {e}")
+                    for n in pages:
+                        if n not in done:
+                            await finish_page(doc, n, None, SOURCE_OCR)
+
+        async def clean():
+            while (item := await queues["clean"].get()) is not _DONE:
+                doc, n, image = item
+                try:
+                    with metrics.labels(file=doc.path, page=n):
+                        cleaned = await call(clean_page, image, doc.orientation, self.config)
+                except Exception as e:
+                    logger.error(f"Erreur lors du nettoyage de {doc.path} (page {n}) : {e}")
+                    await finish_page(doc, n, None, SOURCE_OCR)
+                    continue
+                await queues["ocr"].put((doc, n, cleaned))
+
+        async def ocr():
+            while (item := await queues["ocr"].get()) is not _DONE:
+                # Lot OCR : la page reçue plus celles déjà prêtes (un appel Tesseract)
+                batch = [item]
+                while len(batch) < max(1, self.config.ocr_batch_size) and not queues["ocr"].empty():
+                    nxt = queues["ocr"].get_nowait()
+                    if nxt is _DONE:
+                        queues["ocr"].put_nowait(_DONE)     # rendu au prochain worker… ou à soi-même
+                        break
+                    batch.append(nxt)
+                try:
+                    results = await call(ocr_images, [image for _, _, image in batch], self.config,
+                                         [{"file": doc.path, "page": n} for doc, n, _ in batch],
+                                         [doc.layout for doc, _, _ in batch])
+                except Exception as e:
+                    logger.error(f"Erreur OCR ({len(batch)} page(s)) : {e}")
+                    results = [(None, None, False)] * len(batch)
+                for (doc, n, image), (text, quality, degraded) in zip(batch, results):
+                    if degraded:
+                        doc.degraded.add(n)
+                    elif quality is not None and n not in doc.degraded \
+                            and pdf_pipeline.needs_higher_dpi(quality, self.config) \
+                            and self.config.min_dpi < self.config.image_dpi:
+                        # DPI adaptatif : nouveau rendu à pleine résolution de cette seule page
+                        with metrics.labels(file=doc.path, page=n):
+                            text, _, degraded = await call(self._ocr_full_dpi, doc, n)
+                        if degraded:
+                            doc.degraded.add(n)
+                    if text is not None and cache is not None and n in doc.keys and n not in doc.degraded:
+                        cache.put_text(doc.keys[n][1], text)
+                    await finish_page(doc, n, text, SOURCE_OCR)
+
+        async def parse():
+            while (item := await queues["parse"].get()) is not _DONE:
+                doc, n, text, source = item
+                doc.pages[n - 1] = []
+                doc.incomplete |= text is None or n in doc.degraded
+                if text is not None:
+                    try:
+                        with metrics.labels(file=doc.path), metrics.span("parse", page=n, source=source):
+                            doc.pages[n - 1] = tag_source(extract_data_with_regex(text), source)
+                    except Exception as e:
+                        logger.error(f"Erreur lors du parsing de {doc.path} (page {n}) : {e}")
+                        doc.incomplete = True
+                if (cost := doc.admitted.pop(n, 0)):
+                    self.memory.release(cost)
+                    async with freed:
+                        freed.notify_all()
+                doc.remaining -= 1
+                if self.progress is not None:
+                    self.progress.pages_done(1, doc.path, file_done=doc.remaining == 0)
+                if doc.remaining == 0:
+                    if doc.incomplete and incomplete is not None:
+                        incomplete.add(doc.path)
+                    await call(emit, (doc.path, doc.pages))
+
+        async def stage(name, fn, downstream):
+            # Lance les workers de l'étape puis, une fois tous terminés, ferme l'étape suivante
+            await asyncio.gather(*(fn() for _ in range(self.limits[name])))
+            if downstream is not None:
+                for _ in range(self.limits[downstream]):
+                    await queues[downstream].put(_DONE)
+
+        async def prepare_stage():
+            await prepare()
+            for _ in range(self.limits["render"]):
+                await queues["render"].put(_DONE)
+
+        async def watch_cancel():
+            while not self._cancel.is_set():
+                await asyncio.sleep(CANCEL_POLL)
+
+        pipeline = asyncio.gather(
+            prepare_stage(),
+            stage("render", render, "clean"),
+            stage("clean", clean, "ocr"),
+            stage("ocr", ocr, "parse"),
+            stage("parse", parse, None),
+        )
+        # Après une annulation, l'issue des étapes n'intéresse plus personne
+        pipeline.add_done_callback(lambda f: f.cancelled() or f.exception())
+        watcher = asyncio.ensure_future(watch_cancel())
+        try:
+            await asyncio.wait({pipeline, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if self._cancel.is_set() and not pipeline.done():
+                pipeline.cancel()
+                raise Cancelled("Traitement annulé.")
+            await pipeline
+        finally:
+            watcher.cancel()
+            if not pipeline.done():
+                pipeline.cancel()
+            # Les appels en cours se terminent d'eux-mêmes ; on n'attend pas après une annulation
+            executor.shutdown(wait=not self._cancel.is_set(), cancel_futures=True)
+
+    def _ocr_full_dpi(self, doc, n):
+        degraded = set()
+        (_, image), = render_pages(doc.path, [n], self.config, degraded=degraded)
+        if image is None:
+            return pdf_pipeline.OcrResult(None)
+        text, quality, ocr_degraded = ocr_images([clean_page(image, doc.orientation, self.config)], self.config,
+                                                 [{"file": doc.path, "page": n}], [doc.layout])[0]
+        return pdf_pipeline.OcrResult(text, quality, ocr_degraded or bool(degraded))
@@ -0,0 +1,118 @@
+# services/jsonl_sink.py
+import argparse
+import json
+import math
+import os
+
+# fsync toutes les N lignes (flush après chaque ligne dans tous les cas)
+FSYNC_EVERY = 20
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def compact_document(document):
+    """
+    Retire des pages d'un document les champs vides (None / NaN) : ce sont
+    des colonnes d'autres modèles ajoutées par le DataFrame, inutiles en sortie.
+    """
+    return {
+        **document,
+        "pages": [{k: v for k, v in rec.items() if not _is_missing(v)} for rec in document.get("pages", [])],
+    }
+
+
+class JsonlWriter:
+    """
+    Écrit les résultats au fil de l'eau, une ligne JSON compacte par document
+    ({"file": ..., "pages": [...]}, même forme que la sortie groupée).
+
+    Chaque ligne est écrite d'un bloc puis vidée sur disque : un arrêt brutal
+    ne perd au pire que la ligne en cours, que `read_jsonl` ignore.
+    """
+
+    def __init__(self, path, append=False):
+        """
+        :param append: Ajouter à la suite du fichier existant (mode incrémental) ;
+                       sinon le fichier est réécrit.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._f = open(path, "a" if append else "w", encoding="utf-8")
+        self._since_sync = 0
+
+    def _write_line(self, obj):
+        self._f.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._f.flush()
+        self._since_sync += 1
+        if self._since_sync >= FSYNC_EVERY:
+            os.fsync(self._f.fileno())
+            self._since_sync = 0
+
+    def write_document(self, document):
+        self._write_line(compact_document(document))
+
+    def write_deleted(self, file_path):
+        """
+        Marque un fichier supprimé : ses anciens enregistrements seront ignorés.
+        """
+        self._write_line({"file": file_path, "deleted": True})
+
+    def close(self):
+        if not self._f.closed:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_jsonl(path):
+    """
+    Relit un fichier JSONL ligne par ligne (une dernière ligne tronquée est ignorée).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def jsonl_to_grouped(path):
+    """
+    Reconstruit la sortie groupée [{"file": ..., "pages": [...]}, …] depuis un JSONL.
+
+    Pour un fichier écrit plusieurs fois (exécutions incrémentales), la
+    dernière ligne l'emporte ; un marqueur "deleted" retire le fichier.
+    """
+    documents = {}
+    for doc in read_jsonl(path):
+        documents.pop(doc["file"], None)
+        if not doc.get("deleted"):
+            documents[doc["file"]] = doc
+    return list(documents.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit une sortie JSONL de GeniePDF en JSON groupé par fichier.")
+    parser.add_argument("input", help="Fichier JSONL produit avec --format jsonl.")
+    parser.add_argument("output", help="Fichier JSON groupé à écrire.")
+    args = parser.parse_args()
+
+    grouped = jsonl_to_grouped(args.input)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(grouped, f, indent=2, ensure_ascii=False)
+    print(f"✅ {len(grouped)} documents écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# services/page_scheduler.py
+import collections
+import concurrent.futures
+import logging
+import os
+import time
+
+from services.pdf_pipeline import count_pages, new_tracker, page_batches, page_footprints, process_pages
+from utils import metrics
+from utils.memory_budget import MemoryBudget
+from utils.progress import Cancelled
+
+logger = logging.getLogger("GeniePDFLogger")
+
+# Intervalle de vérification de la demande d'annulation (s)
+CANCEL_POLL = 0.1
+
+
+def default_workers():
+    """
+    Taille du pool par défaut : un processus par cœur.
+    """
+    return os.cpu_count() or 1
+
+
+def plan_tasks(pdf_files, batch_size=1):
+    """
+    Découpe chaque document en tâches (fichier, lot de pages consécutives).
+
+    :param pdf_files: Liste des chemins de PDF.
+    :param batch_size: Nombre de pages par tâche (un appel OCR par lot).
+    :return: Tuple (liste des tâches, dict fichier → nombre de pages).
+             Les fichiers illisibles sont journalisés et ignorés.
+    """
+    tasks, page_counts = [], {}
+    for path in pdf_files:
+        try:
+            n_pages = count_pages(path)
+        except Exception as e:
+            logger.error(f"Erreur lors de la lecture de {path} : {e}")
+            continue
+        page_counts[path] = n_pages
+        tasks.extend((path, batch) for batch in page_batches(n_pages, batch_size))
+    return tasks, page_counts
+
+
+def run_batch(path, batch, config, submitted_at, rotation=None):
+    """
+    Tâche exécutée par un worker : traite un lot de pages et renvoie, avec le
+    résultat, les mesures prises pendant le traitement (dont l'attente en file).
+
+    :param submitted_at: Horodatage (time.time) de la soumission de la tâche.
+    :param rotation: Orientation déjà détectée dans le document (lot
+                     précédent), reprise par l'OrientationTracker du lot.
+    :return: Tuple (résultats par page, mesures, pages en échec ou dégradées,
+             orientation de la dernière page du lot ou None).
+    """
+    since = metrics.mark()
+    metrics.record("queue_wait", max(0.0, time.time() - submitted_at), file=path, pages=len(batch))
+    incomplete = set()
+    orientation = new_tracker(config, rotation)
+    try:
+        results = process_pages(path, batch, config, orientation=orientation, incomplete=incomplete)
+        return results, metrics.drain(since), incomplete, orientation.rotation
+    except Exception:
+        metrics.drain(since)
+        raise
+
+
+def iter_documents(pdf_files, config, executor=None, progress=None, cancel=None, incomplete=None):
+    """
+    Traite toutes les pages de tous les documents dans un pool de processus
+    partagé, puis réassemble les pages de chaque document dans l'ordre.
+
+    Un gros document n'occupe donc plus un seul worker : ses pages sont
+    réparties sur tout le pool, en même temps que celles des petits fichiers.
+    Le premier lot de chaque document passe d'abord : l'orientation qu'il a
+    détectée est transmise aux lots suivants, qui évitent ainsi l'OSD.
+    Avec un budget mémoire (max_memory_mb), un lot n'est soumis que si la
+    mémoire estimée des lots en cours le permet (voir MemoryBudget).
+
+    :param pdf_files: Liste des chemins de PDF.
+    :param config: Objet Config (max_workers ≤ 0 → un processus par cœur).
+    :param executor: Exécuteur à utiliser (par défaut un ProcessPoolExecutor).
+    :param progress: PageProgress avancé à chaque lot terminé ; optionnel.
+    :param cancel: threading.Event : une fois levé, les lots en file sont
+                   abandonnés sans attendre ceux en cours.
+    :param incomplete: Ensemble complété, avant la restitution de chaque
+                       document, des documents dont un lot a échoué ou dont
+                       une page a dépassé son budget (à retraiter).
+    :return: Générateur de tuples (fichier, pages) au fil de la complétion des
+             documents ; `pages` est la liste ordonnée des modèles par page.
+    :raises Cancelled: si `cancel` est levé.
+    """
+    tasks, page_counts = plan_tasks(pdf_files, config.ocr_batch_size)
+    pages = {path: [None] * n for path, n in page_counts.items()}
+    remaining = dict(page_counts)
+    if progress is not None:
+        for path, n in page_counts.items():
+            progress.add_pages(n, path)
+
+    # Documents sans page : terminés d'emblée
+    for path, n in page_counts.items():
+        if n == 0:
+            yield path, pages.pop(path)
+
+    memory = MemoryBudget(config.max_memory_mb)
+    footprints = {}
+    if memory.limit is not None:
+        # Pages à couche texte exploitable : jamais rendues, comptées pour rien
+        footprints = {path: page_footprints(path, range(1, n + 1), config) for path, n in page_counts.items()}
+
+    owns_executor = executor is None
+    if owns_executor:
+        workers = config.max_workers if config.max_workers > 0 else default_workers()
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    queued = collections.OrderedDict()          # document → lots pas encore soumis
+    for path, batch in tasks:
+        queued.setdefault(path, collections.deque()).append(batch)
+    probing = set()                             # documents dont le premier lot est en cours
+    rotations = {}                              # document → orientation détectée
+    futures = {}
+
+    def submit_admitted():
+        # Lots soumis dans l'ordre, tant que le budget mémoire le permet ; les
+        # lots suivants d'un document attendent l'orientation de son premier lot
+        for path in list(queued):
+            if path in probing:
+                continue
+            batches = queued[path]
+            first = path not in rotations
+            while batches:
+                cost = sum(footprints[path][n - 1] for n in batches[0]) if footprints else 0
+                if not memory.try_acquire(cost):
+                    return
+                batch = batches.popleft()
+                future = executor.submit(run_batch, path, batch, config, time.time(), rotations.get(path))
+                futures[future] = (path, batch, cost)
+                if first:
+                    probing.add(path)
+                    break
+            if not batches:
+                del queued[path]
+
+    cancelled = False
+    try:
+        submit_admitted()
+        while futures:
+            for future in _wait_done(futures, cancel):
+                path, batch, cost = futures.pop(future)
+                memory.release(cost)
+                try:
+                    results, spans, failed, rotation = future.result()
+                    metrics.extend(spans)
+                except Exception as e:
+                    logger.error(f"Erreur lors du traitement de {path} (pages {batch[0]}–{batch[-1]}) : {e}")
+                    results, failed, rotation = [[] for _ in batch], batch, None
+                if path in probing:
+                    probing.discard(path)
+                    rotations[path] = rotation
+                elif rotation is not None:
+                    rotations[path] = rotation
+                submit_admitted()
+                if failed and incomplete is not None:
+                    incomplete.add(path)
+                for n, result in zip(batch, results):
+                    pages[path][n - 1] = result
+                remaining[path] -= len(batch)
+                if progress is not None:
+                    progress.pages_done(len(batch), path, file_done=remaining[path] == 0)
+                if remaining[path] == 0:
+                    yield path, pages.pop(path)
+    except Cancelled:
+        cancelled = True
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        if owns_executor:
+            # Après une annulation, les lots en cours se terminent sans qu'on les attende
+            executor.shutdown(wait=not cancelled, cancel_futures=True)
+
+
+def _wait_done(futures, cancel=None):
+    """
+    Attend qu'au moins un des `futures` soit terminé, en vérifiant `cancel`
+    pendant l'attente.
+
+    :return: Ensemble des futures terminés.
+    :raises Cancelled: si `cancel` est levé.
+    """
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise Cancelled("Traitement annulé.")
+        done, _ = concurrent.futures.wait(futures, timeout=CANCEL_POLL if cancel is not None else None,
+                                          return_when=concurrent.futures.FIRST_COMPLETED)
+        if done:
+            return done
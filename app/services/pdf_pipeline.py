@@ -0,0 +1,498 @@
+# services/pdf_pipeline.py
+import time
+from typing import NamedTuple
+
+from pdf_tools import page_hash, text_layer
+from pdf_tools.orientation import OrientationTracker
+from services.regex_parser import extract_data_with_regex
+from utils import memory_budget, metrics, page_cache, time_budget
+from utils.config import load_config
+from utils.lazy import lazy_import
+
+# Chaîne OCR (OpenCV, pytesseract, pdf2image) chargée à la première page
+# scannée : un lot de PDF numériques ne l'importe jamais
+tesseract_engine = lazy_import("ocr.tesseract_engine")
+image_cleaner = lazy_import("pdf_tools.image_cleaner")
+pdf2image_wrapper = lazy_import("pdf_tools.pdf2image_wrapper")
+layout_templates = lazy_import("ocr.layout_templates")
+
+# Valeurs possibles du champ "source" de chaque enregistrement
+SOURCE_TEXT_LAYER = "text_layer"
+SOURCE_OCR = "ocr"
+
+
+def read_text_layer(pdf_path, config, pages):
+    """
+    Lit la couche texte des pages demandées si l'option est active.
+
+    :return: Liste du texte natif par page (None = page à OCRiser).
+    """
+    if config.use_text_layer:
+        try:
+            return text_layer.extract_page_texts(pdf_path, config.text_layer_min_chars, pages)
+        except Exception:
+            pass  # PDF que PyMuPDF ne sait pas ouvrir → on retombe sur l'OCR
+    return [None] * len(pages)
+
+
+def count_pages(pdf_path):
+    """
+    Compte les pages d'un PDF (PyMuPDF, puis pdfinfo en secours).
+    """
+    try:
+        return text_layer.count_pages(pdf_path)
+    except Exception:
+        return pdf2image_wrapper.get_page_count(pdf_path)
+
+
+def page_footprints(pdf_path, pages, config, native_text=True):
+    """
+    Mémoire estimée (octets) de chaque page demandée, rendue à `image_dpi`
+    (le plafond en DPI adaptatif) puis nettoyée, d'après ses dimensions ;
+    format A4 si le document ne peut pas être lu par PyMuPDF.
+
+    :param native_text: Compte pour rien les pages dont la couche texte est
+                        exploitable (jamais rendues) ; False si les pages
+                        demandées sont déjà les seules à OCRiser.
+    """
+    pages = list(pages)
+    try:
+        sizes = text_layer.page_sizes(pdf_path, pages)
+    except Exception:
+        sizes = [memory_budget.A4_POINTS] * len(pages)
+    texts = read_text_layer(pdf_path, config, pages) if native_text else [None] * len(pages)
+    return [0 if text is not None else memory_budget.page_footprint(size, config.image_dpi, config.ocr_upscale)
+            for size, text in zip(sizes, texts)]
+
+
+def document_layout(pdf_path, config):
+    """
+    Gabarit de zones du document (USE_LAYOUTS), ou None : OCR pleine page.
+    """
+    return layout_templates.for_document(pdf_path, config) if config.use_layouts else None
+
+
+def cache_keys(fingerprint, config, layout=None):
+    """
+    Clés de cache (image nettoyée, texte OCR) d'une page selon les réglages
+    du pipeline (et le gabarit de zones, qui change le texte OCR).
+    """
+    resolution = config.image_dpi
+    if config.adaptive_dpi:
+        resolution = f"adaptive:{config.min_dpi}-{config.image_dpi}-{config.ocr_min_confidence:g}-{config.ocr_min_text_px}"
+    image_key = page_cache.make_key("image", fingerprint, resolution,
+                                     image_cleaner.cleaning_profile(config.ocr_upscale))
+    text_key = page_cache.make_key("text", image_key, tesseract_engine.DEFAULT_LANGS, tesseract_engine.DEFAULT_CONFIG,
+                                    *([layout.profile] if layout is not None else []))
+    return image_key, text_key
+
+
+def timed_render(images):
+    """
+    Chronomètre le rendu de chaque page (étape « render ») d'un flux
+    (numéro de page, image) produit par `iter_pdf_images`.
+    """
+    images = iter(images)
+    while True:
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            n, img = next(images)
+        except StopIteration:
+            return
+        metrics.record("render", time.perf_counter() - t0, time.process_time() - c0, page=n)
+        yield n, img
+
+
+def new_tracker(config, rotation=None):
+    """
+    OrientationTracker d'un document, avec le budget OSD configuré.
+
+    :param rotation: Orientation déjà détectée (lot précédent du document).
+    """
+    tracker = OrientationTracker(time_budget.budget(config, "osd"))
+    tracker.rotation = rotation
+    return tracker
+
+
+def render_pages(pdf_path, page_numbers, config, dpi=None, degraded=None):
+    """
+    Rend en niveaux de gris les pages demandées, sous forme de flux, dans le
+    budget de rendu (`render_timeout` par page).
+
+    Une fenêtre qui dépasse son budget est abandonnée ; chacune de ses pages
+    est rendue de nouveau seule, à `fallback_dpi` (chemin moins coûteux). Si
+    cela échoue encore, la page est produite sans image (None) : elle sera
+    en échec, sans bloquer le lot.
+
+    :param dpi: Résolution de rendu ; None → config.image_dpi.
+    :param degraded: Ensemble complété des pages rendues en mode dégradé.
+    :return: Générateur de tuples (numéro de page, image ou None).
+    """
+    dpi = dpi or config.image_dpi
+    timeout = time_budget.budget(config, "render")
+    window = max(1, config.render_window)
+    remaining = list(page_numbers)
+    while remaining:
+        done = set()
+        try:
+            for n, img in timed_render(pdf2image_wrapper.iter_pdf_images(
+                    pdf_path, dpi=dpi, thread_count=config.render_threads, window=window,
+                    pages=remaining, grayscale=True, timeout=timeout)):
+                done.add(n)
+                yield n, img
+            return
+        except time_budget.StageTimeout as e:
+            remaining = [n for n in remaining if n not in done]
+            # La fenêtre arrêtée : premières pages contiguës restantes (voir iter_pdf_images)
+            failed = remaining[:1]
+            for n in remaining[1:window]:
+                if n != failed[-1] + 1:
+                    break
+                failed.append(n)
+            time_budget.record_timeout("render", e.seconds, time_budget.FALLBACK, [{"page": n} for n in failed])
+            for n in failed:
+                yield n, _render_fallback(pdf_path, n, config, dpi, degraded)
+            remaining = remaining[len(failed):]
+
+
+def _render_fallback(pdf_path, n, config, dpi, degraded):
+    try:
+        [(_, img)] = timed_render(pdf2image_wrapper.iter_pdf_images(
+            pdf_path, dpi=min(config.fallback_dpi, dpi), thread_count=1, window=1, pages=[n], grayscale=True,
+            timeout=time_budget.budget(config, "render")))
+    except time_budget.StageTimeout as e:
+        time_budget.record_timeout("render", e.seconds, time_budget.FAILED, [{"page": n}])
+        return None
+    if degraded is not None:
+        degraded.add(n)
+    return img
+
+
+def render_cleaned(pdf_path, page_numbers, config, orientation, dpi=None, degraded=None):
+    """
+    Rend en niveaux de gris puis nettoie les pages demandées, sous forme de flux.
+
+    :param dpi: Résolution de rendu ; None → config.image_dpi.
+    :param degraded: Ensemble complété des pages rendues en mode dégradé.
+    :return: Générateur de tuples (numéro de page, image nettoyée) ; l'image
+             est None pour une page dont le rendu a échoué (budget dépassé).
+    """
+    for n, img in render_pages(pdf_path, page_numbers, config, dpi, degraded):
+        if img is None:
+            yield n, None
+            continue
+        with metrics.labels(page=n):
+            cleaned = image_cleaner.preprocess(img, orientation, config.ocr_upscale)
+        yield n, cleaned
+
+
+class OcrResult(NamedTuple):
+    text: str | None             # None : page en échec (budget dépassé deux fois)
+    quality: object = None       # PageQuality en DPI adaptatif
+    degraded: bool = False       # obtenu par le chemin de repli (à ne pas mettre en cache)
+
+
+def ocr_with_budget(images, config, labels, with_quality=False):
+    """
+    OCR d'un lot d'images nettoyées en un seul appel (étape « ocr »), dans le
+    budget `ocr_timeout` par page.
+
+    Si le lot dépasse son budget, chaque page est reprise seule par un chemin
+    moins coûteux : image réduite à `fallback_dpi` et segmentation
+    `fallback_psm`. Une page qui dépasse encore est en échec (texte None).
+
+    :param labels: Étiquettes de chaque image pour le bilan (ex. {"page": 3}).
+    :param with_quality: Renvoie aussi la qualité de chaque page (DPI adaptatif).
+    :return: Liste d'OcrResult, dans l'ordre des images.
+    """
+    ocr = tesseract_engine.extract_texts_with_quality if with_quality else tesseract_engine.extract_texts
+    images = list(images)
+    if not images:
+        return []
+    try:
+        with metrics.span("ocr", pages=len(images)):
+            out = ocr(images, timeout=time_budget.budget(config, "ocr", len(images)))
+        return [OcrResult(*r) if with_quality else OcrResult(r) for r in out]
+    except time_budget.StageTimeout as e:
+        time_budget.record_timeout("ocr", e.seconds, time_budget.FALLBACK, labels)
+
+    scale = min(1.0, config.fallback_dpi / config.image_dpi) if config.image_dpi else 1.0
+    results = []
+    for image, label in zip(images, labels):
+        small = image_cleaner.downscale(image, scale)
+        try:
+            with metrics.span("ocr", pages=1, **label):
+                [r] = ocr([small], timeout=time_budget.budget(config, "ocr"), psm=config.fallback_psm)
+        except time_budget.StageTimeout as e:
+            time_budget.record_timeout("ocr", e.seconds, time_budget.FAILED, [label])
+            results.append(OcrResult(None))
+            continue
+        results.append(OcrResult(*r, degraded=True) if with_quality else OcrResult(r, degraded=True))
+    return results
+
+
+def ocr_with_layout(images, config, labels, layouts, with_quality=False):
+    """
+    OCR d'un lot d'images nettoyées : seules les zones du gabarit de chaque
+    page sont OCRisées (toutes les zones du lot ensemble, un appel Tesseract
+    par mode de segmentation), et leur texte, un paragraphe par zone, va au
+    parser.
+
+    Une page qui ne suit pas son gabarit (proportions, mots repères absents
+    du texte des zones), ou dont l'OCR des zones dépasse son budget, est
+    OCRisée en entier (`ocr_with_budget`), comme une page sans gabarit.
+
+    :param labels: Étiquettes de chaque image pour le bilan (ex. {"page": 3}).
+    :param layouts: LayoutTemplate (ou None) de chaque image.
+    :param with_quality: Renvoie aussi la qualité de chaque page (DPI adaptatif).
+    :return: Liste d'OcrResult, dans l'ordre des images.
+    """
+    images = list(images)
+    results = [None] * len(images)
+    fitting = [i for i, (image, layout) in enumerate(zip(images, layouts))
+               if layout is not None and layout.fits(image.shape)]
+    crops = [(i, region, crop) for i in fitting for region, crop in layouts[i].crops(images[i])]
+    if crops:
+        ocr = tesseract_engine.extract_texts_with_quality if with_quality else tesseract_engine.extract_texts
+        out = [None] * len(crops)
+        try:
+            with metrics.span("ocr", pages=len(fitting), regions=len(crops)):
+                for psm in sorted({region.psm for _, region, _ in crops}):
+                    group = [k for k, (_, region, _) in enumerate(crops) if region.psm == psm]
+                    texts = ocr([crops[k][2] for k in group], timeout=time_budget.budget(config, "ocr", len(fitting)),
+                                psm=psm)
+                    for k, text in zip(group, texts):
+                        out[k] = text
+        except time_budget.StageTimeout as e:
+            # Pages reprises en entier, dans leur propre budget
+            time_budget.record_timeout("ocr", e.seconds, time_budget.FALLBACK, [labels[i] for i in fitting])
+            out = []
+        by_page = {}
+        for (i, _, _), r in zip(crops, out):
+            by_page.setdefault(i, []).append(r)
+        for i, page in by_page.items():
+            text = layouts[i].join([r[0] for r in page] if with_quality else page)
+            if layouts[i].matches(text):
+                quality = tesseract_engine.merge_quality(r[1] for r in page) if with_quality else None
+                results[i] = OcrResult(text, quality)
+
+    full = [i for i, r in enumerate(results) if r is None]
+    for i, r in zip(full, ocr_with_budget([images[i] for i in full], config, [labels[i] for i in full],
+                                          with_quality)):
+        results[i] = r
+    return results
+
+
+def ocr_texts(images, config, pages, layout=None):
+    """
+    OCR d'un lot d'images nettoyées (étape « ocr »), voir `ocr_with_layout`.
+
+    :return: Liste des textes (None pour une page en échec).
+    """
+    images = list(images)
+    return [r.text for r in ocr_with_layout(images, config, [{"page": n} for n in pages], [layout] * len(images))]
+
+
+def ocr_texts_with_quality(images, config, pages, layout=None):
+    """
+    Comme `ocr_with_layout`, avec la qualité de chaque page (DPI adaptatif).
+    """
+    images = list(images)
+    return ocr_with_layout(images, config, [{"page": n} for n in pages], [layout] * len(images), with_quality=True)
+
+
+def needs_higher_dpi(quality, config):
+    """
+    Vrai si l'OCR d'une page rendue en basse résolution n'est pas fiable :
+    aucun mot reconnu, confiance moyenne ou hauteur de texte sous les seuils.
+    """
+    return (quality.words == 0
+            or quality.confidence < config.ocr_min_confidence
+            or quality.text_height < config.ocr_min_text_px)
+
+
+def adaptive_ocr(pdf_path, page_numbers, config, orientation=None, degraded=None):
+    """
+    OCR à résolution adaptative : tout le lot est rendu à `min_dpi`, puis seules
+    les pages jugées peu fiables (`needs_higher_dpi`) sont rendues de nouveau à
+    `image_dpi` (le plafond) et OCRisées une seconde fois. Une page hors budget
+    n'est pas reprise à plus haute résolution.
+
+    :param degraded: Ensemble complété des pages traitées en mode dégradé.
+    :return: Dictionnaire numéro de page → (texte, image nettoyée retenue) ;
+             texte None pour une page en échec.
+    """
+    orientation = orientation or new_tracker(config)
+    degraded = set() if degraded is None else degraded
+    layout = document_layout(pdf_path, config)
+    low = min(config.min_dpi, config.image_dpi)
+
+    def run(pages, dpi=None):
+        cleaned = dict(render_cleaned(pdf_path, pages, config, orientation, dpi, degraded))
+        ready = [n for n in pages if cleaned[n] is not None]
+        out = {n: (None, None, None) for n in pages if cleaned[n] is None}
+        for n, r in zip(ready, ocr_texts_with_quality([cleaned[n] for n in ready], config, ready, layout)):
+            if r.degraded:
+                degraded.add(n)
+            out[n] = (r.text, cleaned.pop(n), r.quality)
+        return out
+
+    results = run(page_numbers, low)
+    retry = [n for n in page_numbers
+             if results[n][2] is not None and n not in degraded and needs_higher_dpi(results[n][2], config)]
+    if retry and low < config.image_dpi:
+        results.update(run(retry))
+    return {n: (text, image) for n, (text, image, _) in results.items()}
+
+
+def ocr_page_texts(pdf_path, page_numbers, config, orientation=None, degraded=None):
+    """
+    Texte OCR des pages demandées, en passant par le cache de pages s'il est actif.
+
+    Seules les pages absentes du cache sont rendues, nettoyées et OCRisées
+    (si l'image nettoyée est en cache, seul l'OCR est relancé). Les pages
+    traitées en mode dégradé (budget dépassé) ne sont pas mises en cache.
+
+    :param degraded: Ensemble complété des pages traitées en mode dégradé.
+    :return: Liste des textes, dans l'ordre de `page_numbers` (None pour une
+             page en échec).
+    """
+    cache = page_cache.get_cache(config)
+    degraded = set() if degraded is None else degraded
+    layout = document_layout(pdf_path, config)
+    if cache is None:
+        if config.adaptive_dpi:
+            results = adaptive_ocr(pdf_path, page_numbers, config, orientation, degraded)
+            return [results[n][0] for n in page_numbers]
+        orientation = orientation or new_tracker(config)
+        cleaned = dict(render_cleaned(pdf_path, page_numbers, config, orientation, degraded=degraded))
+        ready = [n for n in page_numbers if cleaned[n] is not None]
+        texts = {}
+        for n, r in zip(ready, ocr_with_layout([cleaned.pop(n) for n in ready], config,
+                                               [{"page": n} for n in ready], [layout] * len(ready))):
+            texts[n] = r.text
+            if r.degraded:
+                degraded.add(n)
+        return [texts.get(n) for n in page_numbers]
+
+    keys = dict(zip(page_numbers, (cache_keys(fp, config, layout) for fp in page_hash.page_fingerprints(pdf_path, page_numbers))))
+    texts = {n: cache.get_text(keys[n][1]) for n in page_numbers}
+    missing = [n for n in page_numbers if texts[n] is None]
+
+    cleaned = {}
+    if config.cache_images:
+        for n in missing:
+            image = cache.get_image(keys[n][0])
+            if image is not None:
+                cleaned[n] = image
+    to_render = [n for n in missing if n not in cleaned]
+    if to_render:
+        orientation = orientation or new_tracker(config)
+        if config.adaptive_dpi:
+            # Rendu, OCR et choix de la résolution page par page
+            for n, (text, image) in adaptive_ocr(pdf_path, to_render, config, orientation, degraded).items():
+                texts[n] = text
+                if text is None or n in degraded:
+                    continue
+                cache.put_text(keys[n][1], text)
+                if config.cache_images:
+                    cache.put_image(keys[n][0], image)
+        else:
+            for n, image in render_cleaned(pdf_path, to_render, config, orientation, degraded=degraded):
+                if image is None:
+                    continue
+                cleaned[n] = image
+                if config.cache_images and n not in degraded:
+                    cache.put_image(keys[n][0], image)
+
+    pending = [n for n in missing if n in cleaned]
+    if pending:
+        for n, r in zip(pending, ocr_with_layout([cleaned.pop(n) for n in pending], config,
+                                                 [{"page": n} for n in pending], [layout] * len(pending))):
+            texts[n] = r.text
+            if r.degraded:
+                degraded.add(n)
+            elif r.text is not None and n not in degraded:
+                cache.put_text(keys[n][1], r.text)
+    return [texts[n] for n in page_numbers]
+
+
+def tag_source(models, source):
+    """
+    Ajoute à chaque modèle extrait le chemin ("text_layer" ou "ocr") qui l'a produit.
+    """
+    return [{**m, "source": source} for m in models]
+
+
+def process_pages(pdf_path, page_numbers, config=None, orientation=None, incomplete=None):
+    """
+    Traite un lot de pages d'un PDF (unité de travail du planificateur de pages).
+
+    Les pages dont la couche texte est exploitable vont directement au parser
+    regex ; les pages scannées du lot sont lues dans le cache de pages, ou
+    rendues, nettoyées puis OCRisées ensemble, en un seul appel à Tesseract.
+
+    :param pdf_path: Chemin du fichier PDF.
+    :param page_numbers: Numéros de page (à partir de 1), dans l'ordre.
+    :param config: Objet Config (chargé depuis l'environnement si None).
+    :param orientation: OrientationTracker du document ; None → un par lot.
+    :param incomplete: Ensemble complété des pages en échec (budget dépassé)
+                       ou traitées en mode dégradé : le document est à retraiter.
+    :return: Liste (une entrée par page du lot) des modèles extraits.
+    """
+    incomplete = set() if incomplete is None else incomplete
+    config = config or load_config()
+    page_numbers = list(page_numbers)
+    with metrics.labels(file=pdf_path):
+        texts = read_text_layer(pdf_path, config, page_numbers)
+        sources = [SOURCE_OCR if t is None else SOURCE_TEXT_LAYER for t in texts]
+
+        ocr_pages = [n for n, t in zip(page_numbers, texts) if t is None]
+        if ocr_pages:
+            scanned = iter(ocr_page_texts(pdf_path, ocr_pages, config, orientation, incomplete))
+            texts = [next(scanned) if t is None else t for t in texts]
+
+        results = []
+        for n, t, s in zip(page_numbers, texts, sources):
+            if t is None:               # page en échec (budget dépassé)
+                incomplete.add(n)
+                results.append([])
+                continue
+            with metrics.span("parse", page=n, source=s):
+                results.append(tag_source(extract_data_with_regex(t), s))
+        return results
+
+
+def page_batches(n_pages, batch_size):
+    """
+    Découpe les pages 1..n_pages en lots consécutifs d'au plus `batch_size` pages.
+    """
+    batch_size = max(1, batch_size)
+    return [list(range(start, min(start + batch_size, n_pages + 1)))
+            for start in range(1, n_pages + 1, batch_size)]
+
+
+def iter_pages(pdf_path, config=None):
+    """
+    Extrait les données de chaque page d'un PDF, sous forme de flux.
+
+    Le document est traité lot par lot (`ocr_batch_size` pages) : la mémoire
+    consommée ne dépend pas du nombre de pages du document.
+
+    :param pdf_path: Chemin du fichier PDF.
+    :param config: Objet Config (chargé depuis l'environnement si None).
+    :return: Générateur (une entrée par page, dans l'ordre) des modèles extraits.
+    """
+    config = config or load_config()
+    orientation = new_tracker(config)
+    for batch in page_batches(count_pages(pdf_path), config.ocr_batch_size):
+        yield from process_pages(pdf_path, batch, config, orientation)
+
+
+def extract_pages(pdf_path, config=None):
+    """
+    Extrait les données de chaque page d'un PDF.
+
+    :return: Liste (une entrée par page) des modèles extraits.
+    """
+    return list(iter_pages(pdf_path, config))
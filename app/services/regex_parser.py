@@ -1,6 +1,6 @@
 # services/regex_parser.py  –– version 2025‑04‑20
 import re
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, NamedTuple
 
 FLAGS = re.I | re.S
 
@@ -8,88 +8,246 @@ FLAGS = re.I | re.S
 _ASS_TYPES = r"DBF|DF|DB|BAFF|H2|H3"
 
 # ─────────── helpers ───────────
-def _match(txt: str, pat: str, grp: int = 1):
-    m = re.search(pat, txt, FLAGS)
+def _match(txt: str, pat, grp: int = 1):
+    m = pat.search(txt) if isinstance(pat, re.Pattern) else re.search(pat, txt, FLAGS)
     return m.group(grp).strip() if m else None
 
 def _b(x) -> bool: return str(x).lower() in {"yes", "true", "1", "y", "oui"}
 def _i(x):          return int(x)   if str(x).isdigit() else None
 def _f(x):          return float(x.replace(",", ".")) if x else None
 
+# ─────────── table des champs ───────────
+# Caractères que re.I assimile à « i » / « s » mais que str.lower() ne convertit
+# pas : en leur présence, on revient à la recherche motif par motif
+_CASE_TRAPS = ("ı", "ſ")
+
+def _exact_lower(txt: str, lower: str) -> bool:
+    """Vrai si les positions de `lower` sont celles de `txt` (recherche par mots-clés sûre)."""
+    return len(lower) == len(txt) and not any(c in txt for c in _CASE_TRAPS)
+
+def _positions(lower: str, keywords) -> List[int]:
+    out: List[int] = []
+    for kw in keywords:
+        pos = lower.find(kw)
+        while pos != -1:
+            out.append(pos)
+            pos = lower.find(kw, pos + 1)
+    if len(keywords) > 1:
+        out.sort()
+    return out
+
+def _finditer(pat: re.Pattern, keywords, txt: str):
+    """
+    Équivalent de `pat.finditer(txt)` quand toute correspondance commence par
+    l'un des `keywords` : le motif n'est essayé qu'aux positions des mots-clés.
+    """
+    lower = txt.lower()
+    if not _exact_lower(txt, lower):
+        yield from pat.finditer(txt)
+        return
+    end = 0
+    for pos in _positions(lower, keywords):
+        if pos < end:
+            continue
+        m = pat.match(txt, pos)
+        if m:
+            end = m.end()
+            yield m
+
+def _split(pat: re.Pattern, keywords, txt: str) -> List[str]:
+    """Équivalent de `pat.split(txt)` (motif sans groupe) via `_finditer`."""
+    out, start = [], 0
+    for m in _finditer(pat, keywords, txt):
+        out.append(txt[start:m.start()])
+        start = m.end()
+    out.append(txt[start:])
+    return out
+
+class Field(NamedTuple):
+    """
+    Champ à libellé. Toute correspondance de `pattern` commence par l'un des
+    `keywords` (en minuscules) : on ne tente le motif qu'à ces positions.
+    """
+    name: str
+    keywords: tuple
+    pattern: str
+    convert: Callable | None = None   # _i / _f ; None → texte
+    group: int = 1
+
+class Flag(NamedTuple):
+    """Booléen vrai si `needle` apparaît dans le bloc (insensible à la casse)."""
+    name: str
+    needle: str
+
+class FieldTable:
+    """
+    Table déclarative des champs d'un modèle, compilée une fois à l'import.
+
+    `extract` indexe en une passe les positions de tous les mots-clés dans le
+    bloc mis en minuscules, puis n'applique le motif d'un champ qu'à ses
+    positions candidates, de gauche à droite. Le premier succès est donc le
+    même que celui de `re.search` champ par champ.
+    """
+
+    def __init__(self, entries):
+        self.entries = tuple(entries)
+        self.fields = [e for e in self.entries if isinstance(e, Field)]
+        self.flags = [e for e in self.entries if isinstance(e, Flag)]
+        self._patterns = {f.name: re.compile(f.pattern, FLAGS) for f in self.fields}
+        self._keywords = tuple(sorted({k for f in self.fields for k in f.keywords}))
+
+    def _index(self, lower: str) -> Dict[str, List[int]]:
+        return {kw: hits for kw in self._keywords if (hits := _positions(lower, (kw,)))}
+
+    def _scan(self, block: str, lower: str) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        hits = self._index(lower) if _exact_lower(block, lower) else None
+        for f in self.fields:
+            pat = self._patterns[f.name]
+            if hits is None:
+                m = pat.search(block)
+            else:
+                m = None
+                candidates = [p for kw in f.keywords for p in hits.get(kw, ())]
+                for pos in (sorted(candidates) if len(f.keywords) > 1 else candidates):
+                    m = pat.match(block, pos)
+                    if m:
+                        break
+            if m:
+                found[f.name] = m.group(f.group).strip()
+        return found
+
+    def extract(self, block: str) -> Dict[str, Any]:
+        lower = block.lower()
+        raw = self._scan(block, lower)
+        out: Dict[str, Any] = {}
+        for e in self.entries:
+            if isinstance(e, Flag):
+                out[e.name] = _b(e.needle in lower)
+            else:
+                v = raw.get(e.name)
+                out[e.name] = e.convert(v) if e.convert else v
+        return out
+
 # ─────────── PIECE ───────────
+PIECE_TABLE = FieldTable([
+    Field("copyNumber",   ("copy",),          r"\bcopy\s*#?\s*[:\-]?\s*(\d{1,3})", _i),
+    Field("location",     ("location",),      r"\blocation\b\s*[:\-]?\s*([\w\-/]+)"),
+    Field("status",       ("status",),        r"\bstatus\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("type",         ("type",),          r"\btype\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("diameter",     ("diam",),          r"\bdiam(?:eter)?\b\s*[:\-]?\s*([\d.,]+)", _f),
+    Field("height",       ("height",),        r"\bheight\b\s*[:\-]?\s*([\d.,]+)", _f),
+    Flag("nitrogen",         "nitride"),
+    Flag("surfaceNitrogen",  "surface nitrogen"),
+    Flag("toBeManufactured", "to be manufactured"),
+    Field("customerCode", ("customer code",), r"\bcustomer code\b\s*[:\-]?\s*([\w\-]+)"),
+])
+
+_PIECE_SPLIT = re.compile(r"\bPIECE\b|\bHOLE\b", FLAGS)
+
 def _extract_piece(block: str) -> Dict[str, Any]:
-    lower = block.lower()
-    return {
-        "copyNumber":       _i(_match(block, r"\bcopy\s*#?\s*[:\-]?\s*(\d{1,3})")),
-        "location":         _match(block, r"\blocation\b\s*[:\-]?\s*([\w\-/]+)"),
-        "status":           _match(block, r"\bstatus\b\s*[:\-]?\s*([\w\-]+)"),
-        "type":             _match(block, r"\btype\b\s*[:\-]?\s*([\w\-]+)"),
-        "diameter":         _f(_match(block, r"\bdiam(?:eter)?\b\s*[:\-]?\s*([\d.,]+)")),
-        "height":           _f(_match(block, r"\bheight\b\s*[:\-]?\s*([\d.,]+)")),
-        "nitrogen":         _b("nitride"            in lower),
-        "surfaceNitrogen":  _b("surface nitrogen"   in lower),
-        "toBeManufactured": _b("to be manufactured" in lower),
-        "customerCode":     _match(block, r"\bcustomer code\b\s*[:\-]?\s*([\w\-]+)"),
-    }
+    return PIECE_TABLE.extract(block)
 
 def extract_piece(txt: str) -> List[Dict[str, Any]]:
-    # On considère qu’un “PIECE” est aussi décrit par “HOLE(S)”
-    blocks = re.split(r"\bPIECE\b|\bHOLE\b", txt, flags=FLAGS)[1:]
+    # On considère qu’un “PIECE” est aussi décrit par “HOLE(S)”
+    blocks = _split(_PIECE_SPLIT, ("piece", "hole"), txt)[1:]
     return [_extract_piece(b) for b in blocks if b.strip()]
 
 # ─────────── TOOL ───────────
+TOOL_TABLE = FieldTable([
+    Field("assemblyType", ("db", "df", "baff", "h2", "h3"), fr"\b({_ASS_TYPES})\b"),
+    Field("pressList",    ("press",),          r"\bpress(?: list)?\s*[:\-]?\s*([\w ,&\-]+)"),
+    Flag("canBeInterlock", "interlock"),
+    Field("description",  ("description",),  r"\bdescription\b\s*[:\-]?\s*(.+)"),
+    Field("displayCode",  ("display code",), r"\bdisplay code\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("customerCode", ("customer code",), r"\bcustomer code\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("totalStack",   ("total stack",),  r"\btotal stack\b\s*[:\-]?\s*([\d.,]+)", _f),
+    Field("copyNumber",   ("copy",),         r"\bcopy\b\s*(\d{1,3})", _i),
+])
+
+_TOOL_START = re.compile(r"\bCopy\s+(\d{1,3})\b", FLAGS)
+
+def _tool_blocks(txt: str):
+    """
+    Découpe le texte en blocs « Copy <n> … » jusqu'au « Copy <n> » suivant
+    (même découpage que `\bCopy\s+(\d{1,3})\b.*?(?=\bCopy\s+\d{1,3}\b|$)`,
+    mais en une seule recherche des débuts de bloc).
+    """
+    starts = list(_finditer(_TOOL_START, ("copy",), txt))
+    end = len(txt) - 1 if txt.endswith("\n") else len(txt)
+    for i, m in enumerate(starts):
+        stop = starts[i + 1].start() if i + 1 < len(starts) else max(end, m.end())
+        yield txt[m.start():stop], m.group(1)
+
 def _extract_tool(block: str, copy_hint: int | None = None) -> Dict[str, Any]:
-    lower = block.lower()
-    return {
-        "assemblyType":  _match(block, fr"\b({_ASS_TYPES})\b"),
-        "pressList":     _match(block, r"\bpress(?: list)?\s*[:\-]?\s*([\w ,&\-]+)"),
-        "canBeInterlock": _b("interlock" in lower),
-        "description":    _match(block, r"\bdescription\b\s*[:\-]?\s*(.+)"),
-        "displayCode":    _match(block, r"\bdisplay code\b\s*[:\-]?\s*([\w\-]+)"),
-        "customerCode":   _match(block, r"\bcustomer code\b\s*[:\-]?\s*([\w\-]+)"),
-        "totalStack":     _f(_match(block, r"\btotal stack\b\s*[:\-]?\s*([\d.,]+)")),
-        "copyNumber":     copy_hint or _i(_match(block, r"\bcopy\b\s*(\d{1,3})")),
-    }
+    d = TOOL_TABLE.extract(block)
+    d["copyNumber"] = copy_hint or d["copyNumber"]
+    return d
 
 def extract_tool(txt: str) -> List[Dict[str, Any]]:
     """
-    Recherche chaque bloc démarrant par « Copy <n> » (c’est ce qu’on voit
+    Recherche chaque bloc démarrant par « Copy <n> » (c’est ce qu’on voit
     dans les PDF Tower/Keymark/…).
     """
     out: list[dict] = []
-    for m in re.finditer(r"\bCopy\s+(\d{1,3})\b.*?(?=\bCopy\s+\d{1,3}\b|$)",
-                         txt, FLAGS):
-        block, num = m.group(0), _i(m.group(1))
-        d = _extract_tool(block, copy_hint=num)
+    for block, num in _tool_blocks(txt):
+        d = _extract_tool(block, copy_hint=_i(num))
         out.append(d)
     return out
 
-# ─────────── CUSTOMER / PROFILE : inchangé (bonus : on accepte “Tel :”) ───────────
+# ─────────── CUSTOMER / PROFILE : inchangé (bonus : on accepte “Tel :”) ───────────
+CUSTOMER_TABLE = FieldTable([
+    Field("nickname",        ("nick",),             r"\bnick(?:name)?\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("phone",           ("phone", "tel"),      r"\b(?:phone|tel)\b\s*[:\-]?\s*([\d ()\-.]+)"),
+    Field("billingAddress",  ("billing address",),  r"\bbilling address\b\s*[:\-]?\s*(.+)"),
+    Field("shippingAddress", ("shipping address",), r"\bshipping address\b\s*[:\-]?\s*(.+)"),
+    Field("companyName",     ("company name",),     r"\bcompany name\b\s*[:\-]?\s*(.+)"),
+])
+
+_CUSTOMER_BLOCK = re.compile(r"\bCUSTOMER\b(.+?)(?:\bPROFILE\b|\Z)", FLAGS)
+_PROFILE_SPLIT = re.compile(r"\bPROFILE\b", FLAGS)
+
 def _extract_customer(block: str) -> Dict[str, Any]:
-    return {
-        "nickname"      : _match(block, r"\bnick(?:name)?\b\s*[:\-]?\s*([\w\-]+)"),
-        "phone"         : _match(block, r"\b(?:phone|tel)\b\s*[:\-]?\s*([\d ()\-.]+)"),
-        "billingAddress": _match(block, r"\bbilling address\b\s*[:\-]?\s*(.+)"),
-        "shippingAddress": _match(block, r"\bshipping address\b\s*[:\-]?\s*(.+)"),
-        "companyName"   : _match(block, r"\bcompany name\b\s*[:\-]?\s*(.+)"),
-    }
+    return CUSTOMER_TABLE.extract(block)
 
 def extract_customer(txt: str) -> List[Dict[str, Any]]:
-    blk = _match(txt, r"\bCUSTOMER\b(.+?)(?:\bPROFILE\b|\Z)", 1)
+    blk = _match(txt, _CUSTOMER_BLOCK, 1)
     return [_extract_customer(blk)] if blk else []
 
-# Profile et Requisition : seules de légers ajustements (cavityQuantity…)
+# Profile et Requisition : seules de légers ajustements (cavityQuantity…)
+REQUISITION_TABLE = FieldTable([
+    Field("requisitionStatus",      ("status",),               r"\bstatus\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("description",            ("note",),                 r"(?s)\bnotes?\b\s*[:\-]?\s*(.+?)(?:\n{2,}|$)"),
+    Field("receptionDate",          ("date", "order date"),    r"\b(date|order date)\b\s*[:\-]?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{4})", None, 2),
+    Field("customerPurchaseNumber", ("po",),                   r"\bPO\s*Number\b\s*[:\-]?\s*(\w+)"),
+    Field("contact",                ("contact",),              r"\bcontact\b\s*[:\-]?\s*([\w ,]+)"),
+    Field("toolNumber",             ("tool",),                 r"\btool(?: |#)?number\b\s*[:\-]?\s*([\w\-]+)"),
+    Field("cavityQuantity",         ("hole", "cavity", "copie"), r"\b(?:hole|cavity|copies?)s?\b.*?(\d{1,3})", _i),
+    Flag("doubleLayout", "double layout"),
+])
+
 def extract_requisition(txt: str) -> Dict[str, Any]:
-    return {
-        "requisitionStatus": _match(txt, r"\bstatus\b\s*[:\-]?\s*([\w\-]+)"),
-        "description":       _match(txt, r"(?s)\bnotes?\b\s*[:\-]?\s*(.+?)(?:\n{2,}|$)"),
-        "receptionDate":     _match(txt, r"\b(date|order date)\b\s*[:\-]?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{4})", 2),
-        "customerPurchaseNumber": _match(txt, r"\bPO\s*Number\b\s*[:\-]?\s*(\w+)"),
-        "contact":           _match(txt, r"\bcontact\b\s*[:\-]?\s*([\w ,]+)"),
-        "toolNumber":        _match(txt, r"\btool(?: |#)?number\b\s*[:\-]?\s*([\w\-]+)"),
-        "cavityQuantity":    _i(_match(txt, r"\b(?:hole|cavity|copies?)s?\b.*?(\d{1,3})")),
-        "doubleLayout":      _b("double layout" in txt.lower()),
-    }
+    return REQUISITION_TABLE.extract(txt)
+
+# ─────────── schéma des modèles (sorties typées : Parquet, SQLite) ───────────
+MODEL_TABLES = {
+    "piece": PIECE_TABLE,
+    "tool": TOOL_TABLE,
+    "customer": CUSTOMER_TABLE,
+    "requisition": REQUISITION_TABLE,
+}
+MODELS = ("piece", "tool", "customer", "profile", "requisition")
+_CONVERT_TYPES = {_i: int, _f: float}
+
+def model_fields(model: str):
+    """Champs (nom, type Python) d'un modèle, dans l'ordre de sa table ; None si inconnu."""
+    if model == "profile":
+        return [("description", str)]
+    table = MODEL_TABLES.get(model)
+    if table is None:
+        return None
+    return [(e.name, bool) if isinstance(e, Flag) else (e.name, _CONVERT_TYPES.get(e.convert, str))
+            for e in table.entries]
 
 # ─────────── routeur ───────────
 def extract_data_with_regex(text: str) -> List[Dict[str, Any]]:
@@ -97,10 +255,10 @@ def extract_data_with_regex(text: str) -> List[Dict[str, Any]]:
     for d in extract_piece(text):    res.append({"model": "piece",    **d})
     for d in extract_tool(text):     res.append({"model": "tool",     **d})
     for d in extract_customer(text): res.append({"model": "customer", **d})
-    # profile (optionnel) :
-    for d in re.split(r"\bPROFILE\b", text, flags=FLAGS)[1:]:
-        p = _match(d, r".+", 0)      # on garde tout le bloc
-        if p: res.append({"model": "profile", **{ "description": p.strip() }})
+    # profile (optionnel) : on garde tout le bloc
+    for d in _split(_PROFILE_SPLIT, ("profile",), text)[1:]:
+        p = d.strip()
+        if p: res.append({"model": "profile", **{ "description": p }})
     req = extract_requisition(text)
     if any(req.values()):            res.append({"model": "requisition", **req})
     return res
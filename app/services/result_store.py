@@ -0,0 +1,231 @@
+# services/result_store.py
+import json
+import math
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from services import regex_parser
+
+# Enregistrements écrits par transaction, et attente maximale avant d'écrire un lot partiel
+BATCH_ROWS = 5000
+FLUSH_INTERVAL = 1.0
+# Documents en attente dans la file du writer (les producteurs patientent au-delà)
+QUEUE_SIZE = 256
+# Intervalle de vérification d'une panne du writer pendant l'attente d'une place en file (s)
+PUT_POLL = 0.1
+
+_SQL_TYPES = {int: "INTEGER", float: "REAL", bool: "INTEGER", str: "TEXT"}
+# Colonnes indexées quand le modèle les possède (en plus du fichier source)
+INDEXED_COLUMNS = ("customerCode", "toolNumber", "copyNumber")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file         TEXT PRIMARY KEY,
+    records      INTEGER NOT NULL,
+    processed_at REAL NOT NULL
+);
+"""
+
+_STOP = object()
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _table_name(model):
+    name = re.sub(r"\W", "_", str(model).lower())
+    return name if name in regex_parser.MODELS else f"model_{name}"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ResultStore:
+    """
+    Base SQLite locale des résultats : une table par modèle (piece, tool…),
+    colonnes typées tirées des tables du parser, plus une colonne JSON
+    `extra` pour les champs imprévus.
+
+    Les producteurs (boucle principale, threads de la GUI) déposent les
+    documents terminés dans une file ; un seul thread écrivain les insère
+    par transactions groupées (`executemany`). Retraiter un fichier remplace
+    ses enregistrements (suppression puis insertion dans la même
+    transaction) : la base reflète toujours le dernier traitement.
+    """
+
+    def __init__(self, path, batch_rows=BATCH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_rows = max(1, batch_rows)
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._columns = {}                    # table -> colonnes (hors id)
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="result-store-writer", daemon=True)
+        self._thread.start()
+
+    # ── côté producteurs ──
+    def write_document(self, file_path, records):
+        """
+        Remplace les enregistrements de `file_path` par `records`.
+        """
+        self._put(("document", file_path, list(records)))
+
+    def delete_file(self, file_path):
+        self._put(("delete", file_path, None))
+
+    def close(self):
+        """
+        Écrit les documents en attente, arrête le writer et ferme la base.
+        """
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=PUT_POLL)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _put(self, item):
+        # File pleine : on patiente, mais sans jamais attendre un writer en panne
+        while True:
+            self._check()
+            try:
+                self._queue.put(item, timeout=PUT_POLL)
+                return
+            except queue.Full:
+                pass
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"Écriture de la base de résultats {self.path} impossible") from self._error
+
+    # ── thread écrivain ──
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        for model in regex_parser.MODELS:
+            self._ensure_table(conn, model)
+        return conn
+
+    def _ensure_table(self, conn, model):
+        table = _table_name(model)
+        if table in self._columns:
+            return table
+        fields = regex_parser.model_fields(model) or []
+        columns = ["file", "page", "source"] + [name for name, _ in fields] + ["extra"]
+        defs = ["id INTEGER PRIMARY KEY", "file TEXT NOT NULL", "page INTEGER", "source TEXT"]
+        defs += [f"{_quote(name)} {_SQL_TYPES[t]}" for name, t in fields]
+        defs.append("extra TEXT")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({', '.join(defs)})")
+        # Une table existante garde ses colonnes (base créée par une version antérieure)
+        existing = [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+        columns = [c for c in columns if c in existing]
+        for column in ("file",) + INDEXED_COLUMNS:
+            if column in columns:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_{column}')} "
+                             f"ON {_quote(table)} ({_quote(column)})")
+        self._columns[table] = columns
+        return table
+
+    def _row(self, columns, record):
+        extra = {k: v for k, v in record.items()
+                 if k not in columns and k != "model" and not _is_missing(v)}
+        row = []
+        for c in columns[:-1]:
+            value = record.get(c)
+            row.append(None if _is_missing(value) else value if isinstance(value, (int, float, str)) else json.dumps(value))
+        row.append(json.dumps(extra, ensure_ascii=False, default=str) if extra else None)
+        return row
+
+    def _write_batch(self, conn, batch):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for kind, file_path, records in batch:
+                for table in self._columns:
+                    conn.execute(f"DELETE FROM {_quote(table)} WHERE file = ?", (file_path,))
+                if kind == "delete":
+                    conn.execute("DELETE FROM files WHERE file = ?", (file_path,))
+                    continue
+                by_table = {}
+                for record in records:
+                    table = self._ensure_table(conn, record.get("model") or "unknown")
+                    by_table.setdefault(table, []).append(self._row(self._columns[table], {**record, "file": file_path}))
+                for table, rows in by_table.items():
+                    columns = self._columns[table]
+                    conn.executemany(
+                        f"INSERT INTO {_quote(table)} ({', '.join(map(_quote, columns))}) "
+                        f"VALUES ({', '.join('?' * len(columns))})", rows)
+                    self.rows_written += len(rows)
+                conn.execute(
+                    "INSERT INTO files (file, records, processed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(file) DO UPDATE SET records = excluded.records, processed_at = excluded.processed_at",
+                    (file_path, len(records), time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _run(self):
+        conn = None
+        try:
+            conn = self._connect()
+            batch, rows, stop = [], 0, False
+            while not stop:
+                timeout = self.flush_interval if batch else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    stop = True
+                elif item is not None:
+                    batch.append(item)
+                    rows += len(item[2] or ())
+                # Transaction dès qu'un lot est plein, que la file est vide trop longtemps, ou à l'arrêt
+                if batch and (stop or item is None or rows >= self.batch_rows):
+                    self._write_batch(conn, batch)
+                    batch, rows = [], 0
+        except BaseException as e:
+            self._error = e
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def find(path, model, **criteria):
+    """
+    Enregistrements d'un modèle correspondant aux critères (égalité), ex.
+    find(db, "piece", customerCode="C-12").
+    """
+    table = _table_name(model)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        where = " AND ".join(f"{_quote(k)} = ?" for k in criteria) or "1"
+        rows = conn.execute(f"SELECT * FROM {_quote(table)} WHERE {where} ORDER BY id", tuple(criteria.values()))
+        out = []
+        for row in rows:
+            record = {k: row[k] for k in row.keys() if k not in ("id", "extra") and row[k] is not None}
+            if row["extra"]:
+                record.update(json.loads(row["extra"]))
+            out.append({"model": model, **record})
+        return out
+    finally:
+        conn.close()
@@ -3,8 +3,19 @@
 import os
 from dotenv import load_dotenv
 
-# Charger les variables d'environnement depuis .env
-load_dotenv()
+_env_loaded = False
+
+
+def _load_env():
+    """
+    Charge .env une seule fois, à la première configuration construite (et
+    non à l'import : `--help` ou un simple import n'y touchent pas).
+    """
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
 
 class Config:
     """
@@ -12,15 +23,84 @@ class Config:
     """
 
     def __init__(self):
+        _load_env()
         self.pdf_input_directory = os.getenv("PDF_INPUT_DIR", "data/input")
         self.json_output_path = os.getenv("JSON_OUTPUT_PATH", "data/output/results.json")
+        # "json" : un fichier en fin de lot ; "jsonl" : une ligne par document, au fil de l'eau ;
+        # "parquet" / "feather" : un jeu de données colonnaire par modèle, dans columnar_output_dir
+        self.output_format = os.getenv("OUTPUT_FORMAT", "json").lower()
+        self.columnar_output_dir = os.getenv("COLUMNAR_OUTPUT_DIR", "")
+        self.row_group_size = int(os.getenv("ROW_GROUP_SIZE", 10000))
+        self.partition_by_date = os.getenv("PARTITION_BY_DATE", "false").lower() == "true"
+        # Base SQLite indexée des enregistrements, par modèle (vide → désactivée)
+        self.result_db = os.getenv("RESULT_DB", "")
+        self.result_db_batch = int(os.getenv("RESULT_DB_BATCH", 5000))
         self.tesseract_cmd = os.getenv("TESSERACT_CMD", "/usr/bin/tesseract")
+        # Résolution de rendu (en mode DPI adaptatif : résolution maximale)
         self.image_dpi = int(os.getenv("IMAGE_DPI", 300))
-        self.max_workers = int(os.getenv("MAX_WORKERS", 5))
+        # DPI adaptatif : OCR d'abord à MIN_DPI, puis nouveau rendu à IMAGE_DPI des
+        # seules pages de confiance ou de hauteur de texte insuffisante
+        self.adaptive_dpi = os.getenv("ADAPTIVE_DPI", "false").lower() == "true"
+        self.min_dpi = int(os.getenv("MIN_DPI", 150))
+        self.ocr_min_confidence = float(os.getenv("OCR_MIN_CONFIDENCE", 75))
+        self.ocr_min_text_px = int(os.getenv("OCR_MIN_TEXT_PX", 24))
+        # Agrandissement de la page nettoyée avant OCR (1 = aucun ; 300 dpi suffit à Tesseract)
+        self.ocr_upscale = float(os.getenv("OCR_UPSCALE", 1.0))
+        # Budgets de temps par page (s, 0 = illimité) : rendu, OSD et OCR. Au-delà, la page est
+        # reprise par un chemin moins coûteux (FALLBACK_DPI, sans OSD, FALLBACK_PSM), puis abandonnée
+        self.render_timeout = float(os.getenv("RENDER_TIMEOUT", 60))
+        self.osd_timeout = float(os.getenv("OSD_TIMEOUT", 10))
+        self.ocr_timeout = float(os.getenv("OCR_TIMEOUT", 60))
+        self.fallback_dpi = int(os.getenv("FALLBACK_DPI", 150))
+        self.fallback_psm = int(os.getenv("FALLBACK_PSM", 6))
+        # Gabarits de zones par type de document (facture, plan, requisition) : seules les zones
+        # sont OCRisées ; OCR pleine page si la page ne suit pas le gabarit
+        self.use_layouts = os.getenv("USE_LAYOUTS", "false").lower() == "true"
+        self.layout_dir = os.getenv("LAYOUT_DIR", "")  # vide → gabarits fournis (app/ocr/layouts)
+        self.max_workers = int(os.getenv("MAX_WORKERS", 0))  # 0 → un processus par cœur
+        # Budget mémoire des pages en cours (Mo, 0 = illimité) : le travail n'est admis que si
+        # l'empreinte estimée des pages (dimensions × DPI, agrandissement compris) y tient
+        self.max_memory_mb = int(os.getenv("MAX_MEMORY_MB", 0))
+        # Rendu en flux : nombre de pages rendues par appel pdftoppm, et processus par fenêtre
+        self.render_window = int(os.getenv("RENDER_WINDOW", 1))
+        self.render_threads = int(os.getenv("RENDER_THREADS", 1))
+        # Pages OCRisées par appel Tesseract (modèles chargés une fois par lot)
+        self.ocr_batch_size = int(os.getenv("OCR_BATCH_SIZE", 4))
+        # Moteur de traitement : "pool" (pool de processus, lots de pages) ou
+        # "async" (pipeline par étapes : rendu, nettoyage, OCR, parsing se chevauchent)
+        self.engine = os.getenv("ENGINE", "pool").lower()
+        # Pipeline "async" : workers par étape (0 → un par cœur) et images en attente entre deux étapes
+        self.pipeline_render_workers = int(os.getenv("PIPELINE_RENDER_WORKERS", 2))
+        self.pipeline_clean_workers = int(os.getenv("PIPELINE_CLEAN_WORKERS", 0))
+        self.pipeline_ocr_workers = int(os.getenv("PIPELINE_OCR_WORKERS", 0))
+        self.pipeline_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", 8))
         self.log_level = os.getenv("LOG_LEVEL", "INFO")  # Optionnel
+        # Mesures par étape (temps réel, CPU, pic de RSS) exportées en fin d'exécution
+        self.metrics = os.getenv("METRICS", "true").lower() == "true"
+        self.metrics_path = os.getenv("METRICS_PATH", "")  # vide → <sortie>.metrics.json
+        # Mesures brutes (une par étape et par page) dans le JSON : la mémoire croît avec le lot
+        self.metrics_spans = os.getenv("METRICS_SPANS", "false").lower() == "true"
+        # Cache disque des pages OCRisées (clé = contenu de la page + réglages)
+        self.use_cache = os.getenv("USE_CACHE", "true").lower() == "true"
+        self.cache_path = os.getenv("CACHE_PATH", "data/cache/pages.sqlite")
+        self.cache_max_mb = int(os.getenv("CACHE_MAX_MB", 2048))
+        self.cache_images = os.getenv("CACHE_IMAGES", "false").lower() == "true"
+        self.schema_file = os.getenv("SCHEMA_FILE") or None  # None → tous les schémas
+        # Mode incrémental : manifeste des fichiers déjà traités (vide → à côté de la sortie)
+        self.incremental = os.getenv("INCREMENTAL", "false").lower() == "true"
+        self.manifest_path = os.getenv("MANIFEST_PATH", "")
+        # Couche texte native (PDF numériques) : évite rendu + OCR si exploitable
+        self.use_text_layer = os.getenv("USE_TEXT_LAYER", "true").lower() == "true"
+        self.text_layer_min_chars = int(os.getenv("TEXT_LAYER_MIN_CHARS", 30))
 
-def load_config():
+def load_config(config_path=None):
+    # config_path est accepté pour compatibilité avec --config ; la configuration
+    # provient de l'environnement (.env)
     return Config()
 
-# Optionnel si tu veux accéder à config globalement
-config = load_config()
+def __getattr__(name):
+    # Optionnel si tu veux accéder à config globalement : construite au premier accès
+    if name == "config":
+        globals()["config"] = load_config()
+        return globals()["config"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
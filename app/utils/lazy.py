@@ -0,0 +1,25 @@
+# utils/lazy.py
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Module importé au premier accès à l'un de ses attributs.
+
+    Sert aux dépendances lourdes (OpenCV, pytesseract, pandas…) d'une étape
+    qui ne s'exécute pas forcément : `--help`, un lot sans page scannée ou
+    sans fichier à traiter ne paient pas leur import. Le module est inscrit
+    dans sys.modules comme un import normal (monkeypatch compris).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
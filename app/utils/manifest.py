@@ -0,0 +1,114 @@
+# utils/manifest.py
+import hashlib
+import json
+import os
+
+
+def file_sha256(path):
+    """
+    Empreinte SHA-256 du contenu d'un fichier (lecture par blocs).
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ManifestDiff:
+    """
+    Résultat de la comparaison entre le répertoire d'entrée et le manifeste.
+    """
+
+    def __init__(self):
+        self.new = []
+        self.changed = []
+        self.unchanged = []
+        self.deleted = []
+
+    @property
+    def to_process(self):
+        return self.new + self.changed
+
+    @property
+    def stale(self):
+        """
+        Fichiers dont les anciens enregistrements doivent être retirés de la
+        sortie. Un « nouveau » fichier peut déjà y figurer : traité mais resté
+        incomplet, il n'a pas été inscrit au manifeste.
+        """
+        return set(self.to_process) | set(self.deleted)
+
+
+class Manifest:
+    """
+    Manifeste des fichiers déjà traités : chemin → taille, mtime et empreinte.
+
+    Le contenu n'est haché que si la taille ou la date de modification a
+    changé : une exécution quotidienne coûte en proportion des nouveautés.
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self._pending = {}
+
+    @classmethod
+    def load(cls, path):
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(path, json.load(f))
+        return cls(path)
+
+    def diff(self, pdf_files):
+        """
+        Classe les fichiers en nouveaux / modifiés / inchangés / supprimés.
+
+        Les fichiers supprimés sont retirés du manifeste ; les nouveaux et
+        modifiés n'y sont inscrits qu'après traitement (voir `record`).
+        """
+        diff = ManifestDiff()
+        current = set()
+        for path in pdf_files:
+            current.add(path)
+            st = os.stat(path)
+            info = {"size": st.st_size, "mtime": st.st_mtime}
+            old = self.entries.get(path)
+            if old and old["size"] == info["size"] and old["mtime"] == info["mtime"]:
+                diff.unchanged.append(path)
+                continue
+            info["sha256"] = file_sha256(path)
+            if old and old.get("sha256") == info["sha256"]:
+                # Simple « touch » : même contenu, on met juste la date à jour
+                self.entries[path] = info
+                diff.unchanged.append(path)
+                continue
+            self._pending[path] = info
+            (diff.changed if old else diff.new).append(path)
+
+        for path in list(self.entries):
+            if path not in current:
+                del self.entries[path]
+                diff.deleted.append(path)
+        return diff
+
+    def record(self, path):
+        """
+        Inscrit un fichier nouveau ou modifié comme traité.
+        """
+        if path in self._pending:
+            self.entries[path] = self._pending.pop(path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def manifest_path(config):
+    """
+    Chemin du manifeste : MANIFEST_PATH, sinon à côté du fichier de sortie.
+    """
+    return config.manifest_path or f"{config.json_output_path}.manifest.json"
@@ -0,0 +1,67 @@
+# utils/memory_budget.py
+import threading
+
+POINTS_PER_INCH = 72
+# Dimensions (points) retenues quand celles de la page sont inconnues
+A4_POINTS = (595, 842)
+
+# Octets par pixel de la page rendue : image pdftoppm (PIL, niveaux de gris),
+# tableau NumPy, copie redressée (rotation à 90° ou dé‑skew)
+RENDER_BYTES_PER_PX = 3
+# Octets par pixel de la page agrandie (OCR_UPSCALE) : image agrandie et
+# structures internes de Tesseract (binarisation, composantes connexes)
+OCR_BYTES_PER_PX = 5
+
+
+def page_footprint(size, dpi, upscale=1.0):
+    """
+    Mémoire estimée (octets) d'une page rendue à `dpi`, nettoyée puis OCRisée,
+    d'après ses dimensions : une page A4 à 300 dpi (8,7 Mpx) compte ~70 Mo,
+    ~200 Mo agrandie 2×, et un plan A0 seize fois plus.
+
+    :param size: Dimensions de la page (largeur, hauteur) en points.
+    :param dpi: Résolution de rendu.
+    :param upscale: Agrandissement avant OCR (Config.ocr_upscale).
+    """
+    width, height = size
+    pixels = (width / POINTS_PER_INCH * dpi) * (height / POINTS_PER_INCH * dpi)
+    return int(pixels * (RENDER_BYTES_PER_PX + OCR_BYTES_PER_PX * upscale ** 2))
+
+
+class MemoryBudget:
+    """
+    Contrôle d'admission du travail sur les pages : un lot n'est lancé que si
+    la mémoire estimée des pages en cours (voir `page_footprint`) reste sous
+    le budget. Les pages grand format comptent davantage : moins d'entre
+    elles sont admises en même temps.
+
+    Une page plus grosse que tout le budget est admise seule, quand plus
+    rien d'autre n'est en cours (sinon elle ne le serait jamais).
+    Utilisable depuis n'importe quel thread.
+    """
+
+    def __init__(self, limit_mb=0):
+        """
+        :param limit_mb: Budget en Mo (Config.max_memory_mb) ; ≤ 0 → illimité.
+        """
+        self.limit = int(limit_mb * 2 ** 20) if limit_mb > 0 else None
+        self.in_use = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, nbytes):
+        """
+        Réserve `nbytes` si le budget le permet.
+
+        :return: True si le travail est admis (à libérer par `release`).
+        """
+        with self._lock:
+            if self.limit is not None and self.in_use and self.in_use + nbytes > self.limit:
+                return False
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+            return True
+
+    def release(self, nbytes):
+        with self._lock:
+            self.in_use -= nbytes
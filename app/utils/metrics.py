@@ -0,0 +1,308 @@
+# utils/metrics.py
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # Unix uniquement
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+# Étapes instrumentées, dans l'ordre du pipeline (pour l'affichage)
+STAGES = ("queue_wait", "render", "orientation", "deskew", "clean", "ocr", "parse", "structurize", "timeout")
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Résolution des quantiles : seaux de durée en progression géométrique (erreur ≤ 1 %)
+BUCKET_GROWTH = 1.01
+
+_stats = {}          # étape → _StageStats (agrégats de toute l'exécution)
+_journal = []        # mesures brutes conservées : dépassements de budget, ou toutes (keep_spans)
+_pending = []        # mesures d'un worker, en attente de renvoi au processus principal (mark/drain)
+_capturing = 0
+_keep_raw = False
+_lock = threading.Lock()
+_labels = contextvars.ContextVar("metrics_labels", default={})
+_ZERO_BUCKET = -(10 ** 6)
+
+
+class _StageStats:
+    """
+    Agrégats d'une étape : compteurs, totaux et histogramme des temps réels
+    (seaux géométriques), d'où les quantiles sans garder chaque mesure.
+    """
+
+    __slots__ = ("count", "wall_sum", "cpu_sum", "max", "rss_peak_max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.wall_sum = self.cpu_sum = self.max = 0.0
+        self.rss_peak_max = None
+        self.buckets = {}
+
+    def add(self, span):
+        wall = span["wall"]
+        self.count += 1
+        self.wall_sum += wall
+        self.cpu_sum += span.get("cpu") or 0.0
+        self.max = max(self.max, wall)
+        rss = span.get("rss_peak")
+        if rss is not None and (self.rss_peak_max is None or rss > self.rss_peak_max):
+            self.rss_peak_max = rss
+        key = math.ceil(math.log(wall, BUCKET_GROWTH)) if wall > 0 else _ZERO_BUCKET
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q):
+        # Méthode « nearest rank » : borne haute du seau, plafonnée au maximum observé
+        rank = min(self.count, max(1, math.ceil(q * self.count)))
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return 0.0 if key == _ZERO_BUCKET else min(BUCKET_GROWTH ** key, self.max)
+        return self.max
+
+
+def peak_rss():
+    """
+    Pic de mémoire résidente du processus depuis son démarrage (octets), ou None.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss est en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def keep_spans(enabled=True):
+    """
+    Conserve (ou non) chaque mesure brute, pour l'export JSON détaillé. Par
+    défaut seuls les agrégats par étape et les dépassements de budget sont
+    gardés : la mémoire ne croît pas avec la taille du lot.
+    """
+    global _keep_raw
+    _keep_raw = enabled
+
+
+@contextmanager
+def labels(**values):
+    """
+    Étiquettes (file, page…) ajoutées à toutes les mesures prises dans le bloc.
+    """
+    token = _labels.set({**_labels.get(), **values})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def _add(span):
+    # Appelé sous _lock
+    stats = _stats.get(span["stage"])
+    if stats is None:
+        stats = _stats[span["stage"]] = _StageStats()
+    stats.add(span)
+    if _keep_raw or span["stage"] == "timeout":
+        _journal.append(span)
+
+
+def record(stage, wall, cpu=0.0, **values):
+    """
+    Enregistre une mesure déjà chronométrée (ex. attente en file).
+    """
+    span = {"stage": stage, **_labels.get(), **values,
+            "wall": wall, "cpu": cpu, "rss_peak": peak_rss(), "pid": os.getpid()}
+    with _lock:
+        if _capturing:
+            _pending.append(span)
+        else:
+            _add(span)
+
+
+@contextmanager
+def span(stage, **values):
+    """
+    Mesure le bloc : temps réel, temps CPU du processus et pic de RSS.
+
+    Le pic de RSS est celui du processus à la fin du bloc (ru_maxrss) : il
+    indique la mémoire nécessaire au worker, pas celle de l'étape seule.
+    """
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - t0, time.process_time() - c0, **values)
+
+
+def mark():
+    """
+    Début d'une tâche de worker : les mesures suivantes sont mises de côté
+    (non agrégées) jusqu'au `drain` correspondant.
+
+    :return: Position à passer à `drain`.
+    """
+    global _capturing
+    with _lock:
+        _capturing += 1
+        return len(_pending)
+
+
+def drain(since=0):
+    """
+    Retire et renvoie les mesures mises de côté depuis `since` : un worker les
+    renvoie ainsi au processus principal avec son résultat (voir `extend`).
+    """
+    global _capturing
+    with _lock:
+        out = _pending[since:]
+        del _pending[since:]
+        _capturing = max(0, _capturing - 1)
+        if not _capturing:
+            # Restes d'une tâche concurrente (exécuteur à threads) : agrégés ici
+            for item in _pending:
+                _add(item)
+            _pending.clear()
+    return out
+
+
+def extend(spans):
+    """
+    Agrège des mesures reçues d'un worker.
+    """
+    with _lock:
+        for item in spans:
+            _add(item)
+
+
+def spans():
+    """
+    Mesures brutes conservées : les dépassements de budget, et toutes les
+    mesures si `keep_spans` est actif.
+    """
+    with _lock:
+        return list(_journal)
+
+
+def reset():
+    global _capturing
+    with _lock:
+        _stats.clear()
+        _journal.clear()
+        _pending.clear()
+        _capturing = 0
+
+
+def summary(records=None):
+    """
+    Agrège les mesures par étape : nombre, totaux, p50/p95/p99 du temps réel
+    et pic de RSS observé.
+
+    :param records: Mesures brutes à résumer ; par défaut, les agrégats de
+                    l'exécution en cours.
+    """
+    if records is None:
+        with _lock:
+            by_stage = dict(_stats)
+    else:
+        by_stage = {}
+        for r in records:
+            by_stage.setdefault(r["stage"], _StageStats()).add(r)
+    out = {}
+    for stage in sorted(by_stage, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+        st = by_stage[stage]
+        out[stage] = {
+            "count": st.count,
+            "wall_sum": st.wall_sum,
+            "cpu_sum": st.cpu_sum,
+            **{f"p{int(q * 100)}": st.quantile(q) for q in QUANTILES},
+            "max": st.max,
+            "rss_peak_max": st.rss_peak_max,
+        }
+    return out
+
+
+def stragglers(records=None, stage=None, top=5):
+    """
+    Les `top` mesures les plus longues (toutes étapes ou une seule), parmi les
+    mesures brutes conservées (voir `keep_spans`).
+    """
+    records = spans() if records is None else records
+    if stage:
+        records = [r for r in records if r["stage"] == stage]
+    return sorted(records, key=lambda r: r["wall"], reverse=True)[:top]
+
+
+def _prom_labels(**values):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in values.items()) + "}"
+
+
+def to_prometheus(records=None):
+    """
+    Export au format texte de Prometheus (résumés par étape).
+    """
+    stats = summary(records)
+    lines = [
+        "# HELP geniepdf_stage_seconds Temps réel par exécution d'une étape du pipeline.",
+        "# TYPE geniepdf_stage_seconds summary",
+    ]
+    for stage, s in stats.items():
+        for q in QUANTILES:
+            lines.append(f"geniepdf_stage_seconds{_prom_labels(stage=stage, quantile=q)} {s[f'p{int(q * 100)}']:.6f}")
+        lines.append(f"geniepdf_stage_seconds_sum{_prom_labels(stage=stage)} {s['wall_sum']:.6f}")
+        lines.append(f"geniepdf_stage_seconds_count{_prom_labels(stage=stage)} {s['count']}")
+    lines += [
+        "# HELP geniepdf_stage_cpu_seconds_total Temps CPU cumulé par étape.",
+        "# TYPE geniepdf_stage_cpu_seconds_total counter",
+    ]
+    lines += [f"geniepdf_stage_cpu_seconds_total{_prom_labels(stage=stage)} {s['cpu_sum']:.6f}"
+              for stage, s in stats.items()]
+    lines += [
+        "# HELP geniepdf_peak_rss_bytes Pic de mémoire résidente observé pendant l'étape.",
+        "# TYPE geniepdf_peak_rss_bytes gauge",
+    ]
+    lines += [f"geniepdf_peak_rss_bytes{_prom_labels(stage=stage)} {s['rss_peak_max']}"
+              for stage, s in stats.items() if s["rss_peak_max"] is not None]
+    return "\n".join(lines) + "\n"
+
+
+def write(path, records=None):
+    """
+    Écrit le résumé par étape en JSON (`path`), avec les mesures brutes si
+    elles sont fournies ou conservées (`keep_spans`), et l'export Prometheus
+    à côté (même nom, extension .prom).
+
+    :return: Tuple (chemin JSON, chemin Prometheus).
+    """
+    raw = spans() if records is None and _keep_raw else records
+    out = {"summary": summary(records)}
+    if raw is not None:
+        out["spans"] = raw
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2, ensure_ascii=False)
+    prom_path = f"{os.path.splitext(path)[0]}.prom"
+    with open(prom_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus(records))
+    return path, prom_path
+
+
+def format_summary(records=None):
+    """
+    Tableau p50/p95/p99 (ms) par étape, pour la fin d'exécution.
+    """
+    stats = summary(records)
+    lines = [f"{'étape':<12}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'total s':>10}{'CPU s':>9}{'RSS Mo':>9}"]
+    for stage, s in stats.items():
+        rss = f"{s['rss_peak_max'] / 2**20:.0f}" if s["rss_peak_max"] else "—"
+        lines.append(f"{stage:<12}{s['count']:>7}{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}"
+                     f"{s['p99'] * 1000:>10.1f}{s['wall_sum']:>10.2f}{s['cpu_sum']:>9.2f}{rss:>9}")
+    return "\n".join(lines)
+
+
+def metrics_path(config):
+    """
+    Fichier des mesures : METRICS_PATH, sinon à côté du fichier de sortie.
+    """
+    return config.metrics_path or f"{config.json_output_path}.metrics.json"
@@ -0,0 +1,154 @@
+# utils/page_cache.py
+import hashlib
+import os
+import sqlite3
+import time
+
+from utils.lazy import lazy_import
+
+# Uniquement pour les images en cache (CACHE_IMAGES)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+KIND_TEXT = "text"
+KIND_IMAGE = "image"
+
+# Après dépassement de la taille maximale, on évince jusqu'à ce seuil
+EVICTION_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access);
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_size', 0);
+"""
+
+
+def make_key(*parts) -> str:
+    """
+    Construit une clé de cache à partir de l'empreinte de page et des réglages.
+    """
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class PageCache:
+    """
+    Cache disque (SQLite) des pages nettoyées et OCRisées, adressé par contenu.
+
+    - Clé = empreinte du contenu de la page + réglages du pipeline (DPI,
+      profil de nettoyage, langues et PSM de Tesseract) : changer les regex
+      du parser n'invalide rien, changer un réglage OCR invalide tout.
+    - Taille bornée (`max_bytes`) avec éviction LRU.
+    - Plusieurs processus peuvent lire et écrire en même temps (mode WAL,
+      écritures sérialisées par SQLite).
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self):
+        # Une connexion par processus (jamais partagée après un fork)
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    # ── accès bas niveau ──
+    def get(self, key):
+        row = self.conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key, kind, value: bytes):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, value, len(value), time.time()),
+            )
+            delta = len(value) - (old[0] if old else 0)
+            conn.execute("UPDATE meta SET value = value + ? WHERE name = 'total_size'", (delta,))
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICTION_TARGET
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if total - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        conn.execute("UPDATE meta SET value = value - ? WHERE name = 'total_size'", (freed,))
+
+    def total_size(self):
+        return self.conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    # ── accès typé ──
+    def get_text(self, key):
+        value = self.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def put_text(self, key, text):
+        self.put(key, KIND_TEXT, text.encode("utf-8"))
+
+    def get_image(self, key):
+        value = self.get(key)
+        if value is None:
+            return None
+        return cv2.imdecode(np.frombuffer(value, np.uint8), cv2.IMREAD_UNCHANGED)
+
+    def put_image(self, key, image):
+        ok, buf = cv2.imencode(".png", np.asarray(image), [cv2.IMWRITE_PNG_COMPRESSION, 3])
+        if ok:
+            self.put(key, KIND_IMAGE, buf.tobytes())
+
+
+_caches = {}
+
+
+def get_cache(config):
+    """
+    Retourne le cache de pages configuré (un par chemin et par processus),
+    ou None si le cache est désactivé.
+    """
+    if not config.use_cache:
+        return None
+    cache = _caches.get(config.cache_path)
+    if cache is None:
+        cache = _caches[config.cache_path] = PageCache(config.cache_path, config.cache_max_mb * 1024 * 1024)
+    return cache
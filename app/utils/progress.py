@@ -0,0 +1,89 @@
+# utils/progress.py
+import threading
+import time
+from typing import NamedTuple
+
+
+class Cancelled(Exception):
+    """
+    Traitement interrompu à la demande (bouton Annuler de la GUI…).
+    """
+
+
+class Snapshot(NamedTuple):
+    pages_done: int
+    pages_total: int
+    files_done: int
+    files_total: int
+    rate: float              # pages / s depuis le début
+    eta: float | None        # secondes restantes (None tant que le débit est inconnu)
+    current: str | None      # dernier fichier ayant avancé
+
+    @property
+    def percent(self):
+        return int(self.pages_done / self.pages_total * 100) if self.pages_total else 0
+
+
+def format_eta(seconds):
+    """
+    Durée lisible : « 42 s », « 3 min 05 s », « 1 h 12 min ».
+    """
+    if seconds is None:
+        return "—"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes} min {seconds:02d} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes:02d} min"
+
+
+class PageProgress:
+    """
+    Avancement d'un lot à la page près, alimenté par les moteurs de
+    traitement (pool de processus ou pipeline par étapes) depuis n'importe
+    quel thread.
+
+    Chaque changement publie un `Snapshot` via `sink` (ex. `queue.Queue.put`) :
+    la GUI le relit dans son propre thread, sans jamais toucher Tk ailleurs.
+    """
+
+    def __init__(self, files_total=0, sink=None):
+        self.files_total = files_total
+        self.sink = sink
+        self._lock = threading.Lock()
+        self._pages_total = self._pages_done = self._files_done = 0
+        self._current = None
+        self._started = time.perf_counter()
+
+    def add_pages(self, n, file=None):
+        """
+        Pages d'un document compté (total connu au fil de la planification).
+        """
+        with self._lock:
+            self._pages_total += n
+            if n == 0:
+                self._files_done += 1
+        self._publish()
+
+    def pages_done(self, n, file=None, file_done=False):
+        with self._lock:
+            self._pages_done += n
+            self._files_done += bool(file_done)
+            self._current = file or self._current
+        self._publish()
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            rate = self._pages_done / elapsed if elapsed > 0 else 0.0
+            remaining = self._pages_total - self._pages_done
+            eta = remaining / rate if rate > 0 else None
+            return Snapshot(self._pages_done, self._pages_total, self._files_done,
+                            self.files_total, rate, eta, self._current)
+
+    def _publish(self):
+        if self.sink is not None:
+            self.sink(self.snapshot())
@@ -1,51 +1,129 @@
 import os
-import importlib
-from typing import Dict
+import json
+import hashlib
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping
 
 SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "schemas")
-SCHEMA_MAP: Dict[str, dict] = {}
-
-def load_schemas(schema_file: str = None) -> Dict[str, dict]:
-    """
-    Charge dynamiquement tous les schémas JSON du dossier 'schemas'.
-    Si un fichier est spécifié, charge uniquement ce fichier.
-    """
-    global SCHEMA_MAP
-    SCHEMA_MAP.clear()
-
-    if schema_file:  # Si un fichier spécifique est donné
-        module_name = schema_file[:-3]  # Suppression de l'extension .py
-        import_path = f"utils.schemas.{module_name}"
-        try:
-            module = importlib.import_module(import_path)
-            importlib.reload(module)
-            if hasattr(module, "schema"):
-                doc_type = module_name.replace("_schema", "").lower()
-                SCHEMA_MAP[doc_type] = module.schema
-        except Exception as e:
-            print(f"❌ Erreur d'import {module_name} : {e}")
-    else:
-        # Charger tous les schémas dans le dossier 'schemas'
-        for filename in os.listdir(SCHEMA_DIR):
-            if filename.endswith(".py") and not filename.startswith("__"):
-                module_name = filename[:-3]  # Suppression de l'extension .py
-                import_path = f"utils.schemas.{module_name}"
+SCHEMA_SUFFIX = "_schema.json"
+# Intervalle minimal (s) entre deux vérifications des fichiers par `schemas()`
+RELOAD_INTERVAL = 2.0
+
+
+def doc_type_of(schema_file: str) -> str:
+    """
+    Type de document d'un fichier de schéma ("facture_schema.json" → "facture").
+    L'ancienne forme "facture_schema.py" est acceptée.
+    """
+    name = os.path.splitext(os.path.basename(schema_file))[0]
+    return name.replace("_schema", "").lower()
+
+
+class SchemaRegistry:
+    """
+    Schémas JSON du dossier `directory` (un fichier <type>_schema.json par
+    type de document).
+
+    Les lectures se font sur un instantané immuable, remplacé d'un bloc à
+    chaque rechargement : un worker qui lit pendant une mise à jour voit
+    l'ancien ou le nouvel ensemble, jamais un mélange. Un fichier n'est relu
+    que si sa date de modification, sa taille ou son inode change, et son schéma n'est
+    remplacé que si son contenu (empreinte) a réellement changé.
+    """
+
+    def __init__(self, directory=SCHEMA_DIR, reload_interval=RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.only = None                     # type de document seul retenu (SCHEMA_FILE)
+        self._lock = threading.Lock()        # un seul rechargement à la fois
+        self._files = {}                     # nom -> (signature stat, empreinte, schéma)
+        self._snapshot = MappingProxyType({"default": {}})
+        self._published_only = None
+        self._checked = None
+
+    def _read(self, filename, previous):
+        path = os.path.join(self.directory, filename)
+        st = os.stat(path)
+        # L'inode change aussi lors d'un remplacement atomique (os.replace)
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if previous and previous[0] == signature:
+            return previous
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if previous and previous[1] == digest:
+            return (signature, digest, previous[2])
+        return (signature, digest, json.loads(raw))
+
+    def refresh(self) -> Mapping[str, dict]:
+        """
+        Relit les fichiers modifiés, ajoutés ou supprimés et publie un nouvel
+        instantané (le même objet si rien n'a changé).
+        """
+        with self._lock:
+            try:
+                names = sorted(n for n in os.listdir(self.directory) if n.endswith(SCHEMA_SUFFIX))
+            except FileNotFoundError:
+                names = []
+            files, changed = {}, set(names) != set(self._files)
+            for name in names:
+                previous = self._files.get(name)
                 try:
-                    module = importlib.import_module(import_path)
-                    importlib.reload(module)
-                    if hasattr(module, "schema"):
-                        doc_type = module_name.replace("_schema", "").lower()
-                        SCHEMA_MAP[doc_type] = module.schema
-                except Exception as e:
-                    print(f"❌ Erreur d'import {module_name} : {e}")
+                    files[name] = self._read(name, previous)
+                except (OSError, ValueError) as e:
+                    # Fichier en cours d'écriture ou invalide : on garde l'ancienne version
+                    print(f"❌ Erreur de lecture du schéma {name} : {e}")
+                    if previous is None:
+                        continue
+                    files[name] = previous
+                if previous is None or files[name][2] is not previous[2]:
+                    changed = True
+            self._files = files
 
-    if "default" not in SCHEMA_MAP:
-        SCHEMA_MAP["default"] = {}
+            if changed or self._published_only != self.only:
+                schemas = {
+                    doc_type_of(name): entry[2] for name, entry in files.items()
+                    if self.only is None or doc_type_of(name) == self.only
+                }
+                schemas.setdefault("default", {})
+                self._snapshot = MappingProxyType(schemas)
+                self._published_only = self.only
+            self._checked = time.monotonic()
+            return self._snapshot
+
+    def schemas(self) -> Mapping[str, dict]:
+        """
+        Instantané courant, vérifié au plus toutes les `reload_interval` secondes.
+        """
+        checked = self._checked
+        if checked is None or time.monotonic() - checked >= self.reload_interval:
+            return self.refresh()
+        return self._snapshot
+
+
+REGISTRY = SchemaRegistry()
+
+
+def load_schemas(schema_file: str = None) -> Mapping[str, dict]:
+    """
+    Charge les schémas JSON du dossier 'schemas' (seuls les fichiers modifiés
+    sont relus). Si un fichier est spécifié, ne retient que ce type de document.
+    """
+    REGISTRY.only = doc_type_of(schema_file) if schema_file else None
+    return REGISTRY.refresh()
+
+
+def schemas() -> Mapping[str, dict]:
+    """
+    Instantané immuable {type de document: schéma}, sûr à lire depuis un worker.
+    """
+    return REGISTRY.schemas()
 
-    return SCHEMA_MAP
 
 def get_schema(doc_type: str) -> dict:
     """
-    Récupère le schéma pour un type de document donné depuis SCHEMA_MAP.
+    Récupère le schéma pour un type de document donné.
     """
-    return SCHEMA_MAP.get(doc_type, {})
+    return schemas().get(doc_type, {})
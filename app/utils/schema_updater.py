@@ -2,7 +2,7 @@ import os
 import json
 from genson import SchemaBuilder
 from jsonschema import validate, ValidationError
-from utils.schema_manager import get_schema, load_schemas, SCHEMA_DIR, get_schema
+from utils.schema_manager import REGISTRY, SCHEMA_DIR, SCHEMA_SUFFIX, get_schema
 
 BACKUP_DIR = os.path.join(SCHEMA_DIR, "backups")
 os.makedirs(BACKUP_DIR, exist_ok=True)
@@ -16,7 +16,7 @@ def validate_schema_with_examples(schema: dict, examples: list) -> bool:
     return True
 
 def save_schema(doc_type: str, schema_dict: dict):
-    filename = f"{doc_type}_schema.py"
+    filename = f"{doc_type}{SCHEMA_SUFFIX}"
     path = os.path.join(SCHEMA_DIR, filename)
     backup_path = os.path.join(BACKUP_DIR, f"{doc_type}.bak.json")
 
@@ -26,13 +26,16 @@ def save_schema(doc_type: str, schema_dict: dict):
             with open(backup_path, "w") as f:
                 json.dump(old_schema, f, indent=2)
 
-        with open(path, "w") as f:
-            f.write("schema = ")
-            json.dump(schema_dict, f, indent=2)
+        # Écriture dans un fichier temporaire puis remplacement atomique :
+        # le registre ne lit jamais un schéma à moitié écrit
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(schema_dict, f, indent=2, ensure_ascii=False)
             f.write("\n")
+        os.replace(tmp_path, path)
 
         print(f"✅ Schéma '{doc_type}' mis à jour.")
-        load_schemas()
+        REGISTRY.refresh()  # seul le fichier modifié est relu
 
     except Exception as e:
         print(f"❌ Échec de sauvegarde du schéma '{doc_type}': {e}")
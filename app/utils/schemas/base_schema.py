@@ -1,11 +0,0 @@
-schema = {
-    "type": "array",
-    "items": {
-        "type": "object",
-        "properties": {
-            "nom_fichier": {"type": "string"},
-            "texte_extrait": {"type": "string"}
-        },
-        "required": ["nom_fichier"]
-    }
-}
\ No newline at end of file
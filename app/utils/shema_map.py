@@ -1,8 +1,10 @@
-from utils.schemas import base_schema, facture_schema, plan_schema, requisition_schema
+from utils.schema_manager import SchemaRegistry
 
+# Instantané des schémas au chargement du module ; "default" est le schéma de base
+_schemas = SchemaRegistry().refresh()
 SCHEMA_MAP = {
-    "facture": facture_schema.schema,
-    "plan": plan_schema.schema,
-    "requisition": requisition_schema.schema,
-    "default": base_schema.schema
+    "facture": _schemas.get("facture", {}),
+    "plan": _schemas.get("plan", {}),
+    "requisition": _schemas.get("requisition", {}),
+    "default": _schemas.get("base", {})
 }
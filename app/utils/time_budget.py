@@ -0,0 +1,74 @@
+# utils/time_budget.py
+from utils import metrics
+
+# Étapes soumises à un budget de temps (secondes par page, voir Config)
+BUDGETED_STAGES = ("render", "osd", "ocr")
+
+# Mesure enregistrée à chaque dépassement (voir `record_timeout`)
+TIMEOUT_STAGE = "timeout"
+# Issue d'un dépassement : page reprise par un chemin moins coûteux, ou abandonnée
+FALLBACK = "fallback"
+FAILED = "failed"
+
+
+class StageTimeout(TimeoutError):
+    """
+    Budget de temps d'une étape dépassé (le sous-processus a été arrêté).
+    """
+
+    def __init__(self, stage, seconds):
+        super().__init__(f"Budget « {stage} » dépassé ({seconds:g} s)")
+        self.stage = stage
+        self.seconds = seconds
+
+
+def budget(config, stage, pages=1):
+    """
+    Temps accordé à une étape pour `pages` pages (secondes), ou None si
+    l'étape n'est pas limitée (budget ≤ 0 ou config absente).
+    """
+    seconds = getattr(config, f"{stage}_timeout", 0) if config is not None else 0
+    return seconds * max(1, pages) if seconds > 0 else None
+
+
+def record_timeout(stage, seconds, outcome, pages=({},)):
+    """
+    Consigne un dépassement dans le journal des mesures : il remonte des
+    workers avec les autres mesures, et figure au bilan de fin d'exécution.
+
+    :param pages: Étiquettes de chaque page concernée (ex. {"page": 3}),
+                  en plus de celles du contexte (fichier…).
+    """
+    for labels in pages:
+        metrics.record(TIMEOUT_STAGE, seconds or 0.0, budget=stage, outcome=outcome, **labels)
+
+
+def timed_out_pages(records=None):
+    """
+    Pages ayant dépassé un budget, dans l'ordre (fichier, page).
+
+    :return: Liste de dicts {file, page, budgets (étapes dépassées), failed}.
+    """
+    records = metrics.spans() if records is None else records
+    pages = {}
+    for r in records:
+        if r["stage"] != TIMEOUT_STAGE:
+            continue
+        key = (r.get("file") or "", r.get("page") or 0)
+        entry = pages.setdefault(key, {"file": key[0], "page": r.get("page"), "budgets": [], "failed": False})
+        if r["budget"] not in entry["budgets"]:
+            entry["budgets"].append(r["budget"])
+        entry["failed"] |= r["outcome"] == FAILED
+    return [pages[k] for k in sorted(pages)]
+
+
+def format_report(entries):
+    """
+    Bilan lisible des pages hors budget (une ligne par page).
+    """
+    lines = []
+    for e in entries:
+        where = f"{e['file']} p.{e['page']}" if e["page"] else e["file"]
+        outcome = "abandonnée" if e["failed"] else "reprise en mode dégradé"
+        lines.append(f"  - {where} : {', '.join(e['budgets'])} → {outcome}")
+    return "\n".join(lines)
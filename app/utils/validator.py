@@ -1,7 +1,22 @@
 import os
 import json
+import math
+from functools import lru_cache
 from jsonschema import validate, ValidationError
-from utils.schema_manager import get_schema, SCHEMA_MAP
+from jsonschema.validators import validator_for
+from services import regex_parser
+from utils import schema_manager
+
+ERROR_LOG = "validation_errors.log"
+
+# Validateurs compilés par type de document : (schéma source, validateur).
+# Le schéma source sert à détecter un rechargement du registre.
+_VALIDATORS = {}
+# Schémas qui décrivent (ou non) un modèle du parser : (type, modèle) -> (schéma, booléen)
+_DESCRIBES = {}
+# Champs ajoutés par le pipeline à tout enregistrement, en plus de ceux du modèle
+COMMON_FIELDS = {"model", "file", "page", "source", "doc_type"}
+
 
 def try_schema_validation(data: dict, schema: dict) -> bool:
     try:
@@ -11,13 +26,14 @@ def try_schema_validation(data: dict, schema: dict) -> bool:
         return False
 
 def detect_document_type_by_schema(data: dict) -> str:
-    for doc_type, schema in SCHEMA_MAP.items():
+    for doc_type, schema in schema_manager.schemas().items():
         if doc_type == "default":
             continue
         if try_schema_validation(data, schema):
             return doc_type
     return "default"
 
+@lru_cache(maxsize=1024)
 def detect_document_type(file_path: str) -> str:
     filename = os.path.basename(file_path).lower()
     if "facture" in filename or "invoice" in filename:
@@ -28,24 +44,159 @@ def detect_document_type(file_path: str) -> str:
         return "requisition"
     return "default"
 
-def validate_json(data: dict, file_path: str = None) -> bool:
-    doc_type = detect_document_type(file_path) if file_path else "default"
-    detected = detect_document_type_by_schema(data)
-    if detected != "default":
-        doc_type = detected
 
-    schema = get_schema(doc_type)
+def get_validator(doc_type: str, schema: dict = None):
+    """
+    Validateur du type de document, construit et vérifié (check_schema) une
+    seule fois par version du schéma.
+    """
+    schema = schema_manager.get_schema(doc_type) if schema is None else schema
+    cached = _VALIDATORS.get(doc_type)
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+    _VALIDATORS[doc_type] = (schema, validator)
+    return validator
 
-    try:
-        validate(instance=data, schema=schema)
-        return True
-    except ValidationError as e:
-        error_log = {
-            "fichier": file_path or "inconnu",
+
+def describes(doc_type: str, schema: dict, model: str) -> bool:
+    """
+    Vrai si `schema` décrit les enregistrements du modèle `model` du parser :
+    ses champs obligatoires sont tous des champs du modèle, et ses propriétés
+    (s'il en déclare) en ont au moins une en commun. Un modèle inconnu du
+    parser est laissé au schéma demandé.
+    """
+    cached = _DESCRIBES.get((doc_type, model))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    fields = regex_parser.model_fields(model) if isinstance(model, str) else None
+    if fields is None:
+        result = True
+    else:
+        names = {name for name, _ in fields}
+        item = schema.get("items", {}) if schema.get("type") == "array" else schema
+        item = item if isinstance(item, dict) else {}
+        required = set(item.get("required", ()))
+        properties = set(item.get("properties", ()))
+        result = required <= names | COMMON_FIELDS and (not properties or bool(properties & names))
+    _DESCRIBES[(doc_type, model)] = (schema, result)
+    return result
+
+
+def route(record: dict, file_path: str = None, schemas=None) -> str:
+    """
+    Type de document d'un enregistrement, par index plutôt que par essais :
+    champ "doc_type" explicite, puis nom du fichier (`file_path`, sinon le
+    champ "file" de l'enregistrement).
+
+    Le nom du modèle extrait ("piece", "requisition"…) ne désigne pas un
+    schéma : une réquisition au sens du parser n'a pas les champs du schéma
+    de document « requisition ». Un schéma qui ne décrit pas le modèle de
+    l'enregistrement (voir `describes`) cède la place au schéma par défaut,
+    pour ne pas écarter des extractions valides.
+    """
+    schemas = schema_manager.schemas() if schemas is None else schemas
+    doc_type = record.get("doc_type")
+    if not (isinstance(doc_type, str) and doc_type in schemas):
+        file_path = file_path or record.get("file")
+        doc_type = detect_document_type(file_path) if isinstance(file_path, str) and file_path else "default"
+    if doc_type in schemas and describes(doc_type, schemas[doc_type], record.get("model")):
+        return doc_type
+    return "default"
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class ErrorSink:
+    """
+    Tampon des erreurs de validation, écrit d'un bloc dans le journal
+    (`flush`) au lieu d'ouvrir le fichier à chaque erreur.
+    """
+
+    def __init__(self, path=ERROR_LOG):
+        self.path = path
+        self.errors = []
+
+    def add(self, error_log: dict):
+        self.errors.append(error_log)
+
+    def flush(self):
+        if not self.errors:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, indent=2, ensure_ascii=False, default=str) + "\n" for e in self.errors))
+        self.errors.clear()
+
+
+class RecordValidator:
+    """
+    Valide les enregistrements un par un, chacun contre le schéma de son type.
+
+    Un schéma de type "array" (liste d'enregistrements) s'applique à
+    l'enregistrement comme à une liste d'un élément. Les champs vides
+    (None / NaN, colonnes d'autres modèles dans le DataFrame) sont ignorés.
+    Un enregistrement invalide est consigné et écarté sans arrêter le lot.
+    """
+
+    def __init__(self, file_path: str = None, sink: ErrorSink = None):
+        self.file_path = file_path
+        self.sink = sink or ErrorSink()
+        self.valid = 0
+        self.invalid = 0
+
+    def validate(self, record: dict) -> bool:
+        # Un seul instantané du registre par enregistrement
+        schemas = schema_manager.schemas()
+        doc_type = route(record, self.file_path, schemas)
+        validator = get_validator(doc_type, schemas.get(doc_type, {}))
+        instance = {k: v for k, v in record.items() if not _is_missing(v)}
+        wrapped = validator.schema.get("type") == "array"
+        if wrapped:
+            instance = [instance]
+        error = next(iter(validator.iter_errors(instance)), None)
+        if error is None:
+            self.valid += 1
+            return True
+        self.invalid += 1
+        path = list(error.absolute_path)[1 if wrapped else 0:]
+        self.sink.add({
+            "fichier": self.file_path or record.get("file") or "inconnu",
+            "page": record.get("page"),
+            "modele": record.get("model"),
             "type_detecte": doc_type,
-            "erreur": e.message,
-            "chemin": list(e.absolute_path)
-        }
-        with open('validation_errors.log', 'a') as f:
-            f.write(json.dumps(error_log, indent=2) + "\n")
-        return False
\ No newline at end of file
+            "erreur": error.message,
+            "chemin": path,
+        })
+        return False
+
+    def filter(self, records):
+        """
+        Enregistrements valides de `records` (les autres vont au journal).
+        """
+        return [r for r in records if self.validate(r)]
+
+    def close(self):
+        self.sink.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def validate_json(data: dict, file_path: str = None) -> bool:
+    """
+    Valide un enregistrement ou une liste d'enregistrements.
+
+    :return: True si tous sont valides (les erreurs vont dans validation_errors.log).
+    """
+    records = data if isinstance(data, list) else [data]
+    with RecordValidator(file_path) as validator:
+        for record in records:
+            validator.validate(record)
+    return validator.invalid == 0
@@ -0,0 +1,89 @@
+# benchmarks/bench_deskew.py
+"""
+Précision et vitesse de l'estimation d'inclinaison (deskew) sur des pages
+synthétiques tournées d'un angle connu : estimateur par profil de projection
+(pdf_tools/skew.py) contre l'ancien minAreaRect sur toute l'encre en pleine
+résolution.
+
+    python benchmarks/bench_deskew.py [--pages 30] [--dpi 300]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pdf_tools.skew import MAX_SKEW, SKEW_PRECISION, estimate_skew  # noqa: E402
+
+WORDS = "Piece Copy Location Status Customer code diameter height tool number profile HOLLOW DBF".split()
+
+
+def legacy_skew(gray):
+    """
+    Ancienne estimation (image_cleaner.deskew avant remplacement), ramenée
+    dans ]-45°, 45°] quelle que soit la convention d'angle de minAreaRect
+    (OpenCV ≥ 4.5 renvoie [0, 90[ et non plus [-90, 0[).
+    """
+    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    coords = np.column_stack(np.where(bw > 0)).astype(np.int32)
+    angle = cv2.minAreaRect(coords)[-1]
+    return -((angle + 45) % 90 - 45)
+
+
+def synthetic_page(rng, dpi, graphics):
+    scale = dpi / 300
+    w, h = int(2480 * scale), int(3508 * scale)
+    img = np.full((h, w), 255, np.uint8)
+    y = int(200 * scale)
+    while y < h - 200 * scale:
+        txt = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9)))
+        cv2.putText(img, txt, (int(150 * scale), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.6 * scale, 0, max(1, int(3 * scale)))
+        y += int(rng.choice((70, 90, 140)) * scale)
+    if graphics:
+        # Logo plein, cadre de tableau et trait oblique : pièges pour minAreaRect
+        cv2.rectangle(img, (int(1800 * scale), int(150 * scale)), (int(2300 * scale), int(600 * scale)), 0, -1)
+        cv2.rectangle(img, (int(100 * scale), int(2400 * scale)), (int(2380 * scale), int(3300 * scale)), 0, 4)
+        cv2.line(img, (int(200 * scale), int(3400 * scale)), (int(1500 * scale), int(2500 * scale)), 0, 6)
+    return img
+
+
+def rotate(img, angle):
+    h, w = img.shape
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0)
+    return cv2.warpAffine(img, m, (w, h), flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = []
+    for i in range(args.pages):
+        angle = round(rng.uniform(-MAX_SKEW * 0.8, MAX_SKEW * 0.8), 2)
+        cases.append((angle, rotate(synthetic_page(rng, args.dpi, graphics=i % 2 == 1), angle)))
+
+    print(f"{len(cases)} pages à {args.dpi} dpi (une sur deux avec graphiques), précision visée ±{SKEW_PRECISION}°")
+    for name, fn in (("minAreaRect", legacy_skew), ("profil", estimate_skew)):
+        errors, elapsed = [], 0.0
+        for angle, page in cases:
+            t0 = time.perf_counter()
+            estimate = fn(page)
+            elapsed += time.perf_counter() - t0
+            errors.append(abs(estimate - angle))
+        errors = np.array(errors)
+        print(f"{name:<12} {elapsed * 1000 / len(cases):7.1f} ms/page   erreur moy. {errors.mean():6.3f}°   "
+              f"max {errors.max():6.3f}°   dans la précision : {np.mean(errors <= SKEW_PRECISION):.0%}")
+
+
+if __name__ == "__main__":
+    main()
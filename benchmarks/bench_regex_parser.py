@@ -0,0 +1,139 @@
+# benchmarks/bench_regex_parser.py
+"""
+Micro-benchmark du parser regex : moteur à table (services/regex_parser.py)
+contre l'implémentation de référence champ par champ (un re.search par champ).
+
+Vérifie d'abord que les deux produisent exactement les mêmes dictionnaires.
+
+    python benchmarks/bench_regex_parser.py [--pages 200] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from services.regex_parser import extract_data_with_regex  # noqa: E402
+
+# ─────────── implémentation de référence (version 2025‑04‑20) ───────────
+FLAGS = re.I | re.S
+_ASS_TYPES = r"DBF|DF|DB|BAFF|H2|H3"
+
+def _match(txt, pat, grp=1):
+    m = re.search(pat, txt, FLAGS)
+    return m.group(grp).strip() if m else None
+
+def _b(x): return str(x).lower() in {"yes", "true", "1", "y", "oui"}
+def _i(x): return int(x) if str(x).isdigit() else None
+def _f(x): return float(x.replace(",", ".")) if x else None
+
+def _ref_piece(block):
+    lower = block.lower()
+    return {
+        "copyNumber":       _i(_match(block, r"\bcopy\s*#?\s*[:\-]?\s*(\d{1,3})")),
+        "location":         _match(block, r"\blocation\b\s*[:\-]?\s*([\w\-/]+)"),
+        "status":           _match(block, r"\bstatus\b\s*[:\-]?\s*([\w\-]+)"),
+        "type":             _match(block, r"\btype\b\s*[:\-]?\s*([\w\-]+)"),
+        "diameter":         _f(_match(block, r"\bdiam(?:eter)?\b\s*[:\-]?\s*([\d.,]+)")),
+        "height":           _f(_match(block, r"\bheight\b\s*[:\-]?\s*([\d.,]+)")),
+        "nitrogen":         _b("nitride" in lower),
+        "surfaceNitrogen":  _b("surface nitrogen" in lower),
+        "toBeManufactured": _b("to be manufactured" in lower),
+        "customerCode":     _match(block, r"\bcustomer code\b\s*[:\-]?\s*([\w\-]+)"),
+    }
+
+def _ref_tool(block, copy_hint=None):
+    lower = block.lower()
+    return {
+        "assemblyType":   _match(block, fr"\b({_ASS_TYPES})\b"),
+        "pressList":      _match(block, r"\bpress(?: list)?\s*[:\-]?\s*([\w ,&\-]+)"),
+        "canBeInterlock": _b("interlock" in lower),
+        "description":    _match(block, r"\bdescription\b\s*[:\-]?\s*(.+)"),
+        "displayCode":    _match(block, r"\bdisplay code\b\s*[:\-]?\s*([\w\-]+)"),
+        "customerCode":   _match(block, r"\bcustomer code\b\s*[:\-]?\s*([\w\-]+)"),
+        "totalStack":     _f(_match(block, r"\btotal stack\b\s*[:\-]?\s*([\d.,]+)")),
+        "copyNumber":     copy_hint or _i(_match(block, r"\bcopy\b\s*(\d{1,3})")),
+    }
+
+def _ref_customer(block):
+    return {
+        "nickname":        _match(block, r"\bnick(?:name)?\b\s*[:\-]?\s*([\w\-]+)"),
+        "phone":           _match(block, r"\b(?:phone|tel)\b\s*[:\-]?\s*([\d ()\-.]+)"),
+        "billingAddress":  _match(block, r"\bbilling address\b\s*[:\-]?\s*(.+)"),
+        "shippingAddress": _match(block, r"\bshipping address\b\s*[:\-]?\s*(.+)"),
+        "companyName":     _match(block, r"\bcompany name\b\s*[:\-]?\s*(.+)"),
+    }
+
+def _ref_requisition(txt):
+    return {
+        "requisitionStatus": _match(txt, r"\bstatus\b\s*[:\-]?\s*([\w\-]+)"),
+        "description":       _match(txt, r"(?s)\bnotes?\b\s*[:\-]?\s*(.+?)(?:\n{2,}|$)"),
+        "receptionDate":     _match(txt, r"\b(date|order date)\b\s*[:\-]?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{4})", 2),
+        "customerPurchaseNumber": _match(txt, r"\bPO\s*Number\b\s*[:\-]?\s*(\w+)"),
+        "contact":           _match(txt, r"\bcontact\b\s*[:\-]?\s*([\w ,]+)"),
+        "toolNumber":        _match(txt, r"\btool(?: |#)?number\b\s*[:\-]?\s*([\w\-]+)"),
+        "cavityQuantity":    _i(_match(txt, r"\b(?:hole|cavity|copies?)s?\b.*?(\d{1,3})")),
+        "doubleLayout":      _b("double layout" in txt.lower()),
+    }
+
+def reference_extract(text):
+    res = []
+    for b in re.split(r"\bPIECE\b|\bHOLE\b", text, flags=FLAGS)[1:]:
+        if b.strip():
+            res.append({"model": "piece", **_ref_piece(b)})
+    for m in re.finditer(r"\bCopy\s+(\d{1,3})\b.*?(?=\bCopy\s+\d{1,3}\b|$)", text, FLAGS):
+        res.append({"model": "tool", **_ref_tool(m.group(0), copy_hint=_i(m.group(1)))})
+    blk = _match(text, r"\bCUSTOMER\b(.+?)(?:\bPROFILE\b|\Z)", 1)
+    if blk:
+        res.append({"model": "customer", **_ref_customer(blk)})
+    for d in re.split(r"\bPROFILE\b", text, flags=FLAGS)[1:]:
+        p = _match(d, r".+", 0)
+        if p:
+            res.append({"model": "profile", "description": p.strip()})
+    req = _ref_requisition(text)
+    if any(req.values()):
+        res.append({"model": "requisition", **req})
+    return res
+
+# ─────────── corpus synthétique ───────────
+BLOCKS = [
+    "PIECE Copy # 3 Location: A-12/B Status: ACTIVE Type: HOLLOW\nDiameter: 12,5 Height: 40.2 nitride\nCustomer code: C-77\n",
+    "HOLE copy 4 location R2 status NEW type SOLID diam 8.75 height 10 to be manufactured\n",
+    "Copy 1 DBF Press list: P1, P2 & P3 interlock\nDescription: Matrice creuse\nDisplay code: DSP-9 Total stack: 120,5\n",
+    "Copy 2 H2 press P4 Description: Solide\nTotal stack 80\n",
+    "CUSTOMER\nNickname: ACME-01\nTel : (514) 555-1234\nBilling address: 12 rue des Érables\nCompany name: Acme Inc.\n",
+    "PROFILE\nProfilé 6063 anodisé\n",
+    "Order date: 12/03/2024\nPO Number: PO778\nContact: Jean Tremblay\nTool number: T-4401\nCavity quantity 4 double layout\nNotes: Livrer vendredi.\n\n",
+]
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor.\n"
+
+
+def make_pages(n, seed=0):
+    rng = random.Random(seed)
+    return [FILLER * rng.randint(5, 40) + "".join(rng.sample(BLOCKS, rng.randint(1, 4))) + FILLER * rng.randint(5, 40)
+            for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages)
+    for text in pages:
+        assert extract_data_with_regex(text) == reference_extract(text), "sorties différentes"
+
+    timings = {}
+    for name, fn in (("reference", reference_extract), ("table", extract_data_with_regex)):
+        best = min(timeit.repeat(lambda: [fn(p) for p in pages], number=1, repeat=args.repeat))
+        timings[name] = best
+        print(f"{name:<10} {best * 1000 / len(pages):7.3f} ms/page  ({len(pages) / best:8.0f} pages/s)")
+    print(f"accélération : ×{timings['reference'] / timings['table']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
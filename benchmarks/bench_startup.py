@@ -0,0 +1,81 @@
+# benchmarks/bench_startup.py
+"""
+Temps de démarrage à froid de `app.py` (un nouvel interpréteur par mesure),
+comme lors des appels depuis cron ou un ordonnanceur de tâches :
+
+  - `--help` : lecture des arguments seulement ;
+  - CLI à vide : lot sans PDF (rien à faire), tout le démarrage du mode CLI.
+
+Vérifie aussi qu'aucun module lourd (GUI, OpenCV, pytesseract, pandas) n'est
+importé dans ces deux cas. Code de sortie 1 si un objectif n'est pas tenu.
+
+    python benchmarks/bench_startup.py [--repeat 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "app.py")
+
+# Objectifs (médiane, ms)
+TARGETS_MS = {"help": 150, "cli_noop": 300}
+# Modules qui ne doivent pas être importés au démarrage
+HEAVY_MODULES = ("tkinter", "pandas", "cv2", "pytesseract", "pdf2image", "jsonschema", "fitz")
+
+
+def _cases(tmp):
+    empty = os.path.join(tmp, "input")
+    os.makedirs(empty, exist_ok=True)
+    return {
+        "help": [APP, "--help"],
+        "cli_noop": [APP, "--input", empty, "--output", os.path.join(tmp, "out.json")],
+    }
+
+
+def imported_modules(args, cwd):
+    """
+    Modules importés par une exécution (d'après `python -X importtime`).
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=cwd,
+                          capture_output=True, text=True)
+    return {line.rsplit("|", 1)[-1].strip() for line in proc.stderr.splitlines() if line.startswith("import time:")}
+
+
+def measure(args, cwd, repeat):
+    """
+    Durées (ms) de `repeat` exécutions à froid.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, check=True)
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="geniepdf_startup_") as tmp:
+        for name, cmd in _cases(tmp).items():
+            times = measure(cmd, tmp, args.repeat)
+            median = statistics.median(times)
+            heavy = sorted(set(HEAVY_MODULES) & imported_modules(cmd, tmp))
+            ok = median <= TARGETS_MS[name] and not heavy
+            failed |= not ok
+            print(f"{name:<10} médiane {median:7.1f} ms   min {min(times):7.1f} ms   "
+                  f"objectif ≤ {TARGETS_MS[name]} ms   {'✅' if ok else '❌'}"
+                  + (f"   modules lourds importés : {', '.join(heavy)}" if heavy else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
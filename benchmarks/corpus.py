@@ -0,0 +1,253 @@
+# benchmarks/corpus.py
+"""
+Générateur de corpus PDF synthétique à vérité terrain connue (PyMuPDF).
+
+Chaque page porte un seul type de contenu (pièces « PIECE », outils
+« Copy <n> », ou client « CUSTOMER » + « PROFILE ») dont les valeurs sont
+tirées au hasard et consignées dans ground_truth.json. Une partie des pages
+est « scannée » : la page est rendue en image, tournée (0/90/180/270) et
+inclinée, puis réinsérée sans couche texte.
+
+    python benchmarks/corpus.py data/bench_corpus [--docs 20] [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+GROUND_TRUTH = "ground_truth.json"
+
+# Valeurs choisies pour ne jamais déclencher un autre motif du parser
+# (pas de « hole », « copy », « profile », « DB »… dans les valeurs libres)
+_STATUSES = ["ACTIVE", "NEW", "REPAIR", "SCRAP"]
+_PIECE_TYPES = ["SOLID", "HOLLOW", "SEMI"]
+_ASSEMBLY_TYPES = ["DBF", "DF", "BAFF", "H2", "H3"]
+_PRESSES = ["P1", "P2", "P3", "P7", "P12"]
+_DESCRIPTIONS = ["Matrice creuse 6063", "Matrice pleine", "Insert refroidi", "Porte-matrice standard"]
+_COMPANIES = ["Acme Inc.", "Alu Nord", "Profilex", "Extrusions du Lac"]
+_PROFILES = ["Profil 6063 anodise", "Cornieres 50x50", "Tube rond 25 mm", "Rail de fenetre"]
+
+A4 = fitz.paper_rect("a4")
+
+
+def _piece(rng):
+    return {
+        "model": "piece",
+        "copyNumber": rng.randint(1, 40),
+        "location": f"{rng.choice('ABCDEF')}-{rng.randint(1, 99)}/{rng.choice('XYZ')}",
+        "status": rng.choice(_STATUSES),
+        "type": rng.choice(_PIECE_TYPES),
+        "diameter": round(rng.uniform(5, 300), 2),
+        "height": round(rng.uniform(5, 200), 1),
+        "customerCode": f"C-{rng.randint(100, 999)}",
+    }
+
+
+def _piece_text(p):
+    return (f"PIECE\nCopy # {p['copyNumber']}\nLocation: {p['location']}\nStatus: {p['status']}\n"
+            f"Type: {p['type']}\nDiameter: {p['diameter']}\nHeight: {p['height']}\n"
+            f"Customer code: {p['customerCode']}\n")
+
+
+def _tool(rng, copy):
+    return {
+        "model": "tool",
+        "copyNumber": copy,
+        "assemblyType": rng.choice(_ASSEMBLY_TYPES),
+        "pressList": ", ".join(rng.sample(_PRESSES, rng.randint(1, 3))),
+        "displayCode": f"DSP-{rng.randint(1, 999)}",
+        "customerCode": f"C-{rng.randint(100, 999)}",
+        "totalStack": round(rng.uniform(20, 400), 1),
+        "description": rng.choice(_DESCRIPTIONS),
+    }
+
+
+def _tool_text(t):
+    # La description (motif « .+ » multi-lignes) termine le bloc
+    return (f"Copy {t['copyNumber']}\n{t['assemblyType']}\nPress list: {t['pressList']}\n"
+            f"Display code: {t['displayCode']}\nCustomer code: {t['customerCode']}\n"
+            f"Total stack: {t['totalStack']}\nDescription: {t['description']}\n")
+
+
+def _customer(rng):
+    return {
+        "model": "customer",
+        "nickname": f"CL-{rng.randint(1, 99):02d}",
+        "phone": f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        "companyName": rng.choice(_COMPANIES),
+    }
+
+
+def page_content(rng):
+    """
+    Tire le contenu d'une page : (texte, enregistrements attendus).
+    """
+    kind = rng.choice(["piece", "tool", "customer"])
+    if kind == "piece":
+        records = [_piece(rng) for _ in range(rng.randint(1, 3))]
+        return "\n".join(_piece_text(p) for p in records), records
+    if kind == "tool":
+        first = rng.randint(1, 20)
+        records = [_tool(rng, first + i) for i in range(rng.randint(1, 3))]
+        return "\n".join(_tool_text(t) for t in records), records
+    customer = _customer(rng)
+    profile = {"model": "profile", "description": rng.choice(_PROFILES)}
+    text = (f"CUSTOMER\nNickname: {customer['nickname']}\nPhone: {customer['phone']}\n"
+            f"Company name: {customer['companyName']}\nPROFILE\n{profile['description']}\n")
+    return text, [customer, profile]
+
+
+def _write_text_page(doc, text, fontsize=11):
+    page = doc.new_page(width=A4.width, height=A4.height)
+    page.insert_text((60, 80), text, fontsize=fontsize)
+    return page
+
+
+def _scan(text, dpi, rotation, skew, rng):
+    """
+    Simule un scan : rendu en gris, inclinaison, rotation, léger bruit.
+    """
+    tmp = fitz.open()
+    _write_text_page(tmp, text)
+    pix = tmp[0].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    img = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width).copy()
+    tmp.close()
+
+    h, w = img.shape
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), -skew, 1.0)
+    img = cv2.warpAffine(img, m, (w, h), flags=cv2.INTER_LINEAR, borderValue=255)
+    if rotation:
+        img = cv2.rotate(img, {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180,
+                               270: cv2.ROTATE_90_CLOCKWISE}[rotation])
+    noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 8, img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+    ok, png = cv2.imencode(".png", img)
+    return png.tobytes(), img.shape
+
+
+def generate_corpus(out_dir, docs=20, seed=0, max_pages=8, scanned_ratio=0.3,
+                    max_skew=3.0, rotate_ratio=0.3, scan_dpi=200):
+    """
+    Génère `docs` PDF dans `out_dir` et leur vérité terrain.
+
+    :param max_pages: Nombre maximal de pages par document (tiré entre 1 et max_pages).
+    :param scanned_ratio: Proportion de pages scannées (sans couche texte).
+    :param max_skew: Inclinaison maximale des pages scannées (degrés).
+    :param rotate_ratio: Proportion de documents scannés tournés (90/180/270).
+    :param scan_dpi: Résolution des images scannées insérées.
+    :return: Vérité terrain {nom de fichier: {"pages": [...], ...}}.
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    truth = {}
+    for i in range(docs):
+        name = f"doc_{i:04d}.pdf"
+        # Un document scanné garde la même orientation sur toutes ses pages
+        rotation = rng.choice([90, 180, 270]) if rng.random() < rotate_ratio else 0
+        doc = fitz.open()
+        pages = []
+        for _ in range(rng.randint(1, max_pages)):
+            text, records = page_content(rng)
+            if rng.random() < scanned_ratio:
+                skew = round(rng.uniform(-max_skew, max_skew), 2)
+                png, (h, w) = _scan(text, scan_dpi, rotation, skew, rng)
+                width, height = (A4.width, A4.height) if h >= w else (A4.height, A4.width)
+                page = doc.new_page(width=width, height=height)
+                page.insert_image(page.rect, stream=png)
+                pages.append({"scanned": True, "rotation": rotation, "skew": skew, "records": records})
+            else:
+                _write_text_page(doc, text)
+                pages.append({"scanned": False, "rotation": 0, "skew": 0.0, "records": records})
+        doc.save(os.path.join(out_dir, name), deflate=True)
+        doc.close()
+        truth[name] = {"pages": pages}
+
+    with open(os.path.join(out_dir, GROUND_TRUTH), "w", encoding="utf-8") as f:
+        json.dump(truth, f, indent=2, ensure_ascii=False)
+    return truth
+
+
+def load_ground_truth(corpus_dir):
+    with open(os.path.join(corpus_dir, GROUND_TRUTH), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _same(expected, actual):
+    if isinstance(expected, float):
+        return isinstance(actual, (int, float)) and abs(expected - actual) < 1e-6
+    if isinstance(actual, str):
+        actual = actual.strip()
+    return expected == actual
+
+
+def field_accuracy(truth, records):
+    """
+    Exactitude champ par champ des enregistrements extraits.
+
+    Le i-ème enregistrement attendu d'un modèle sur une page est comparé au
+    i-ème enregistrement extrait du même modèle sur la même page.
+
+    :param truth: Vérité terrain (voir `generate_corpus`).
+    :param records: Enregistrements extraits (dicts avec "file", "page", "model").
+    :return: {"overall": ..., "by_model": {...}, "text_layer": ..., "scanned": ...}.
+    """
+    extracted = {}
+    for r in records:
+        key = (os.path.basename(str(r.get("file"))), int(r.get("page") or 0), r.get("model"))
+        extracted.setdefault(key, []).append(r)
+
+    counts = {}
+
+    def count(bucket, ok):
+        hit, total = counts.get(bucket, (0, 0))
+        counts[bucket] = (hit + ok, total + 1)
+
+    for name, doc in truth.items():
+        for page_no, page in enumerate(doc["pages"], start=1):
+            seen = {}
+            for expected in page["records"]:
+                model = expected["model"]
+                idx = seen[model] = seen.get(model, -1) + 1
+                found = extracted.get((name, page_no, model), [])
+                actual = found[idx] if idx < len(found) else {}
+                for field, value in expected.items():
+                    if field == "model":
+                        continue
+                    ok = _same(value, actual.get(field))
+                    count("overall", ok)
+                    count(f"model:{model}", ok)
+                    count("scanned" if page["scanned"] else "text_layer", ok)
+
+    def ratio(bucket):
+        hit, total = counts.get(bucket, (0, 0))
+        return round(hit / total, 4) if total else None
+
+    return {
+        "overall": ratio("overall"),
+        "fields": counts.get("overall", (0, 0))[1],
+        "by_model": {b.split(":", 1)[1]: ratio(b) for b in sorted(counts) if b.startswith("model:")},
+        "text_layer": ratio("text_layer"),
+        "scanned": ratio("scanned"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="Dossier du corpus à générer.")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pages", type=int, default=8)
+    parser.add_argument("--scanned-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    truth = generate_corpus(args.output, args.docs, args.seed, args.max_pages, args.scanned_ratio)
+    n_pages = sum(len(d["pages"]) for d in truth.values())
+    print(f"✅ {len(truth)} PDF ({n_pages} pages) écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
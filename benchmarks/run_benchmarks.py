@@ -0,0 +1,309 @@
+# benchmarks/run_benchmarks.py
+"""
+Suite de benchmarks de GeniePDF sur un corpus synthétique (voir corpus.py).
+
+Mesure le débit de chaque étape (rendu, orientation/OSD, nettoyage, OCR,
+regex, structuration, validation), le débit de bout en bout de
+`main_cli.main` (pages/s) et l'exactitude champ par champ par rapport à la
+vérité terrain. Les résultats sont écrits en JSON pour comparer les versions :
+
+    python benchmarks/run_benchmarks.py --corpus data/bench_corpus --output bench.json
+    python benchmarks/run_benchmarks.py --corpus data/bench_corpus --compare bench.json
+
+Une étape impossible dans l'environnement (Tesseract absent…) est marquée
+"skipped" avec la raison, sans interrompre la suite.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from corpus import field_accuracy, generate_corpus, load_ground_truth  # noqa: E402
+
+import main_cli  # noqa: E402
+from data_structuring import pandas_processor  # noqa: E402
+from ocr import tesseract_engine  # noqa: E402
+from pdf_tools import image_cleaner, pdf2image_wrapper  # noqa: E402
+from pdf_tools.orientation import OrientationTracker  # noqa: E402
+from services import pdf_pipeline  # noqa: E402
+from services.regex_parser import extract_data_with_regex  # noqa: E402
+from utils.config import load_config  # noqa: E402
+from utils.schema_manager import load_schemas  # noqa: E402
+from utils.validator import validate_json  # noqa: E402
+
+# Baisse de débit (en proportion) signalée comme régression par --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+class StageTimer:
+    """
+    Cumule le temps et le nombre d'éléments traités par étape.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def measure(self, name, fn, items, repeat=1):
+        """
+        Exécute `fn()` et comptabilise `items` éléments pour l'étape `name`.
+
+        Avec `repeat` > 1, seul le meilleur temps est retenu (étapes rapides,
+        sensibles au bruit de mesure).
+        """
+        best = None
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        self.add(name, best, items)
+        return result
+
+    def add(self, name, seconds, items):
+        stage = self.stages.setdefault(name, {"items": 0, "seconds": 0.0})
+        stage["items"] += items
+        stage["seconds"] += seconds
+
+    def skip(self, name, reason):
+        self.stages[name] = {"skipped": reason}
+
+    def summary(self):
+        out = {}
+        for name, s in self.stages.items():
+            if "skipped" in s:
+                out[name] = s
+            else:
+                out[name] = {**s, "seconds": round(s["seconds"], 4),
+                             "per_sec": round(s["items"] / s["seconds"], 2) if s["seconds"] else None}
+        return out
+
+
+class _KnownRotation(OrientationTracker):
+    """Tracker qui renvoie l'orientation connue (vérité terrain), sans détection."""
+
+    def __init__(self, rotation):
+        super().__init__()
+        self.rotation = rotation
+
+    def detect(self, gray):
+        return self.rotation
+
+
+def _tesseract_version(config):
+    try:
+        out = subprocess.run([config.tesseract_cmd, "--version"], capture_output=True, text=True)
+        return (out.stdout or out.stderr).splitlines()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def bench_stages(corpus_dir, truth, config, max_scanned=20, repeat=5):
+    """
+    Débit de chaque étape, mesurée isolément sur les pages du corpus.
+    """
+    timer = StageTimer()
+    scanned = [(name, n) for name, doc in truth.items()
+               for n, page in enumerate(doc["pages"], start=1) if page["scanned"]][:max_scanned]
+
+    # ── rendu → orientation (OSD) → nettoyage → OCR (pages scannées) ──
+    cleaned, osd_calls = [], 0
+    for name, n in scanned:
+        path = os.path.join(corpus_dir, name)
+        try:
+            [(_, gray)] = timer.measure("render", lambda: list(pdf2image_wrapper.iter_pdf_images(
+                path, dpi=config.image_dpi, pages=[n], grayscale=True)), 1)
+        except Exception as e:
+            for stage in ("render", "orientation", "clean"):
+                timer.skip(stage, f"{type(e).__name__}: {e}")
+            break
+        rotation = truth[name]["pages"][n - 1]["rotation"]
+        if "orientation" not in timer.stages or "skipped" not in timer.stages["orientation"]:
+            tracker = OrientationTracker()
+            try:
+                timer.measure("orientation", lambda: tracker.detect(gray), 1)
+                osd_calls += tracker.osd_calls
+            except Exception as e:
+                timer.skip("orientation", f"{type(e).__name__}: {e}")
+        # Nettoyage seul : l'orientation connue est imposée au tracker
+        cleaned.append(timer.measure("clean", lambda: image_cleaner.preprocess(
+            gray, _KnownRotation(rotation), config.ocr_upscale), 1))
+    if "orientation" in timer.stages and "skipped" not in timer.stages["orientation"]:
+        timer.stages["orientation"]["osd_calls"] = osd_calls
+    if not scanned:
+        for stage in ("render", "orientation", "clean", "ocr"):
+            timer.skip(stage, "aucune page scannée dans le corpus")
+    elif cleaned:
+        try:
+            timer.measure("ocr", lambda: tesseract_engine.extract_texts(cleaned), len(cleaned))
+        except Exception as e:
+            timer.skip("ocr", f"{type(e).__name__}: {e}")
+    else:
+        timer.skip("ocr", "aucune page rendue")
+
+    # ── regex / structuration / validation (texte connu des pages) ──
+    texts, page_records = [], {}
+    for name, doc in truth.items():
+        path = os.path.join(corpus_dir, name)
+        for n, page in enumerate(pdf_pipeline.read_text_layer(path, config, list(range(1, len(doc["pages"]) + 1))),
+                                 start=1):
+            if page is not None:
+                texts.append((name, n, page))
+    parsed = timer.measure("regex", lambda: [extract_data_with_regex(t) for _, _, t in texts], len(texts), repeat)
+    for (name, n, _), models in zip(texts, parsed):
+        page_records.setdefault(name, {})[n] = models
+
+    records = []
+    for name, pages in page_records.items():
+        raw = [pages.get(n, []) for n in range(1, max(pages) + 1)]
+        recs, _ = timer.measure("structurize", lambda: pandas_processor.structurize(raw, name), len(raw), repeat)
+        records.extend(recs)
+
+    load_schemas(config.schema_file)
+    timer.measure("validate", lambda: validate_json(records), len(records), repeat)
+    return timer.summary()
+
+
+def bench_end_to_end(corpus_dir, truth, config):
+    """
+    Débit de bout en bout de `main_cli.main` et exactitude de sa sortie.
+    """
+    n_pages = sum(len(d["pages"]) for d in truth.values())
+    with tempfile.TemporaryDirectory(prefix="geniepdf_bench_") as tmp:
+        config.pdf_input_directory = corpus_dir
+        config.json_output_path = os.path.join(tmp, "results.json")
+        config.output_format = "json"
+        config.incremental = False
+        config.use_cache = False
+        t0 = time.perf_counter()
+        main_cli.main(config)
+        seconds = time.perf_counter() - t0
+        records = main_cli.load_extracted_data(config.json_output_path)
+    return {
+        "documents": len(truth),
+        "pages": n_pages,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(n_pages / seconds, 3) if seconds else None,
+        "workers": config.max_workers,
+        "output_written": bool(records),
+    }, field_accuracy(truth, records)
+
+
+def compare(current, previous):
+    """
+    Affiche l'évolution des débits par rapport à un résultat précédent.
+
+    :return: Liste des étapes en régression (baisse > REGRESSION_THRESHOLD).
+    """
+    regressions = []
+    rows = [(name, s.get("per_sec"), previous.get("stages", {}).get(name, {}).get("per_sec"))
+            for name, s in current["stages"].items()]
+    rows.append(("end_to_end", current["end_to_end"].get("pages_per_sec"),
+                 previous.get("end_to_end", {}).get("pages_per_sec")))
+    print(f"\n{'étape':<14}{'avant':>12}{'après':>12}{'évolution':>12}")
+    for name, now, before in rows:
+        if not now or not before:
+            print(f"{name:<14}{before or '—':>12}{now or '—':>12}")
+            continue
+        change = now / before - 1
+        flag = "  ⚠️" if change < -REGRESSION_THRESHOLD else ""
+        print(f"{name:<14}{before:>12}{now:>12}{change:>+11.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    acc_now = current.get("accuracy", {}).get("overall")
+    acc_before = previous.get("accuracy", {}).get("overall")
+    print(f"{'exactitude':<14}{acc_before if acc_before is not None else '—':>12}"
+          f"{acc_now if acc_now is not None else '—':>12}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="data/bench_corpus", help="Dossier du corpus (généré s'il est absent).")
+    parser.add_argument("--docs", type=int, default=20, help="Documents à générer si le corpus est absent.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--regenerate", action="store_true", help="Régénère le corpus même s'il existe.")
+    parser.add_argument("--output", help="Fichier JSON de résultats (défaut : benchmarks/results/<date>.json).")
+    parser.add_argument("--compare", help="Résultat JSON précédent à comparer.")
+    parser.add_argument("--workers", type=int, help="Processus pour le bout en bout (défaut : config).")
+    parser.add_argument("--repeat", type=int, default=5, help="Répétitions des étapes rapides (meilleur temps).")
+    parser.add_argument("--skip-e2e", action="store_true", help="Ne mesure que les étapes.")
+    args = parser.parse_args()
+
+    if args.regenerate and os.path.isdir(args.corpus):
+        shutil.rmtree(args.corpus)
+    if not os.path.isfile(os.path.join(args.corpus, "ground_truth.json")):
+        print(f"📄 Génération du corpus dans {args.corpus}…")
+        generate_corpus(args.corpus, docs=args.docs, seed=args.seed)
+    truth = load_ground_truth(args.corpus)
+
+    config = load_config()
+    if args.workers is not None:
+        config.max_workers = args.workers
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "tesseract": _tesseract_version(config),
+        },
+        "corpus": {
+            "path": os.path.abspath(args.corpus),
+            "documents": len(truth),
+            "pages": sum(len(d["pages"]) for d in truth.values()),
+            "scanned_pages": sum(p["scanned"] for d in truth.values() for p in d["pages"]),
+        },
+        "settings": {"image_dpi": config.image_dpi, "ocr_upscale": config.ocr_upscale,
+                     "ocr_batch_size": config.ocr_batch_size, "use_text_layer": config.use_text_layer},
+    }
+
+    print("⏱️ Étapes…")
+    results["stages"] = bench_stages(args.corpus, truth, config, repeat=args.repeat)
+    if not args.skip_e2e:
+        print("⏱️ Bout en bout (main_cli.main)…")
+        results["end_to_end"], results["accuracy"] = bench_end_to_end(args.corpus, truth, config)
+    else:
+        results["end_to_end"], results["accuracy"] = {}, {}
+
+    for name, s in results["stages"].items():
+        print(f"  {name:<12} " + (f"ignorée ({s['skipped']})" if "skipped" in s else f"{s['per_sec']} /s"))
+    if results["end_to_end"]:
+        print(f"  bout en bout {results['end_to_end']['pages_per_sec']} pages/s, "
+              f"exactitude {results['accuracy']['overall']}")
+
+    output = args.output or os.path.join(os.path.dirname(__file__), "results",
+                                         datetime.now().strftime("%Y-%m-%d_%H-%M-%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"✅ Résultats écrits dans {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print(f"⚠️ Régressions : {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
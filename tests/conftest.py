@@ -1,7 +1,12 @@
 import io
+import os
+import sys
 from PIL import Image
 import pytest
 
+# Ajouter 'app/' au PYTHONPATH (comme app.py)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
 @pytest.fixture
 def dummy_images():
     # retourne 2 pages A4 blanches (RGB)
@@ -9,10 +14,12 @@ def dummy_images():
 
 @pytest.fixture
 def monkeypatch_pdf(monkeypatch, dummy_images):
-    # Intercepte pdf2image.convert_from_path
+    # Intercepte pdf2image.convert_from_path (et la copie importée par le wrapper)
     import pdf2image
-    monkeypatch.setattr(pdf2image, "convert_from_path",
-                        lambda *a, **k: dummy_images)
+    from pdf_tools import pdf2image_wrapper
+    for module in (pdf2image, pdf2image_wrapper):
+        monkeypatch.setattr(module, "convert_from_path",
+                            lambda *a, **k: dummy_images)
     return monkeypatch
 
 @pytest.fixture
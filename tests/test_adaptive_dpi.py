@@ -0,0 +1,43 @@
+from ocr import tesseract_engine
+from ocr.tesseract_engine import PageQuality
+from services import pdf_pipeline
+from utils.config import Config
+
+TSV = "\n".join([
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+    "1\t1\t0\t0\t0\t0\t0\t0\t1240\t1754\t-1\t",
+    "5\t1\t1\t1\t1\t1\t10\t10\t80\t30\t96.5\tPIECE",
+    "5\t1\t1\t1\t1\t2\t100\t10\t60\t20\t90.5\tCopy",
+    "5\t1\t1\t1\t1\t3\t170\t10\t10\t20\t-1\t ",
+    "5\t2\t1\t1\t1\t1\t10\t10\t40\t12\t41\tHOLE",
+])
+
+
+def test_parse_tsv():
+    q = tesseract_engine.parse_tsv(TSV)
+    assert q[1] == PageQuality(2, 93.5, 25.0)
+    assert q[2] == PageQuality(1, 41.0, 12.0)
+
+
+def test_only_weak_pages_are_rerendered(monkeypatch):
+    config = Config()
+    config.adaptive_dpi, config.use_cache = True, False
+    config.min_dpi, config.image_dpi = 150, 300
+    renders = []
+
+    def fake_render(path, dpi, thread_count, window, pages, grayscale, timeout=None):
+        renders.append((dpi, list(pages)))
+        return ((n, (n, dpi)) for n in pages)
+
+    def fake_ocr(images, timeout=None):
+        # Page 2 illisible à 150 dpi (petits caractères), tout est lisible à 300 dpi
+        return [(f"p{n}@{dpi}", PageQuality(5, 40.0 if (n, dpi) == (2, 150) else 90.0, 30.0))
+                for n, dpi in images]
+
+    monkeypatch.setattr(pdf_pipeline.pdf2image_wrapper, "iter_pdf_images", fake_render)
+    monkeypatch.setattr(pdf_pipeline.image_cleaner, "preprocess", lambda img, tracker=None, upscale=1.0: img)
+    monkeypatch.setattr(pdf_pipeline.tesseract_engine, "extract_texts_with_quality", fake_ocr)
+
+    texts = pdf_pipeline.ocr_page_texts("doc.pdf", [1, 2, 3], config)
+    assert texts == ["p1@150", "p2@300", "p3@150"]
+    assert renders == [(150, [1, 2, 3]), (300, [2])]
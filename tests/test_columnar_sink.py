@@ -0,0 +1,81 @@
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+from services.columnar_sink import ColumnarWriter, MODEL_SCHEMAS, read_dataset, to_table
+
+
+def records(pdf, n):
+    out = []
+    for i in range(n):
+        out.append({"model": "piece", "file": pdf, "page": i + 1, "source": "ocr", "copyNumber": i,
+                    "diameter": 12.5, "nitrogen": i % 2 == 0, "status": "NEW"})
+        out.append({"model": "tool", "file": pdf, "page": i + 1, "source": "text_layer",
+                    "copyNumber": "abc", "totalStack": 3})
+    return out
+
+
+def test_one_typed_dataset_per_model_in_row_groups(tmp_path):
+    out = str(tmp_path / "out")
+    with ColumnarWriter(out, row_group_size=4) as writer:
+        for n in range(3):                               # le lot arrive document par document
+            writer.write_records(records(f"doc{n}.pdf", 5))
+    assert writer.rows_written == {"piece": 15, "tool": 15}
+
+    (piece_file,) = os.listdir(os.path.join(out, "piece"))
+    meta = pq.ParquetFile(os.path.join(out, "piece", piece_file)).metadata
+    assert meta.num_rows == 15 and meta.num_row_groups == 4
+    pieces = read_dataset(out, "piece")
+    assert pieces.schema == MODEL_SCHEMAS["piece"]
+    assert pieces.column("copyNumber").to_pylist()[:5] == [0, 1, 2, 3, 4]
+    tools = read_dataset(out, "tool")
+    assert tools.schema.field("totalStack").type == pa.float64()
+    assert set(tools.column("copyNumber").to_pylist()) == {None}   # valeur hors type → nulle
+
+
+def test_feather_partitioned_by_source_date_replaces_previous_run(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b"%PDF")
+    os.utime(pdf, (1_700_000_000, 1_700_000_000))       # 2023-11-14
+    out = str(tmp_path / "out")
+    with ColumnarWriter(out, "feather", partition_by_date=True) as writer:
+        writer.write_records(records(str(pdf), 2))
+    (part,) = os.listdir(os.path.join(out, "piece", "date=2023-11-14"))
+    assert feather.read_table(os.path.join(out, "piece", "date=2023-11-14", part)).num_rows == 2
+
+    # Une exécution interrompue laisse l'ancien jeu de données intact
+    with pytest.raises(RuntimeError):
+        with ColumnarWriter(out, "feather", partition_by_date=True) as writer:
+            writer.write_records(records(str(pdf), 3))
+            writer._flush(("piece", "2023-11-14"))
+            raise RuntimeError
+    assert os.listdir(os.path.join(out, "piece", "date=2023-11-14")) == [part]
+
+    writer = ColumnarWriter(out, "feather", partition_by_date=True)
+    writer.run_id = "suivante"
+    with writer:
+        writer.write_records(records(str(pdf), 3))
+    assert os.listdir(os.path.join(out, "piece", "date=2023-11-14")) == ["part-suivante.feather"]
+    assert read_dataset(out, "piece", "feather").num_rows == 3
+
+
+def test_only_own_parts_replaced_and_bool_strings_parsed(tmp_path):
+    out = tmp_path / "out"
+    (out / "piece").mkdir(parents=True)
+    foreign = out / "piece" / "part-autre-outil.parquet"      # fichier d'un autre producteur
+    foreign.write_bytes(b"PAR1")
+    for run_id, nitrogen in (("premiere", "false"), ("seconde", "oui")):
+        writer = ColumnarWriter(str(out))
+        writer.run_id = run_id
+        with writer:
+            writer.write_records([{"model": "piece", "file": "a.pdf", "page": 1, "nitrogen": nitrogen}])
+    assert sorted(os.listdir(out / "piece")) == ["part-autre-outil.parquet", "part-seconde.parquet"]
+    assert pq.read_table(out / "piece" / "part-seconde.parquet").column("nitrogen").to_pylist() == [True]
+    assert to_table([{"nitrogen": "false"}, {"nitrogen": "peut-être"}, {"nitrogen": 0}],
+                    MODEL_SCHEMAS["piece"]).column("nitrogen").to_pylist() == [False, None, False]
+
+    with pytest.raises(ValueError):
+        ColumnarWriter(str(tmp_path / "results.json"))          # un fichier JSON n'est pas un dossier
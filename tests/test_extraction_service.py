@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from services import extraction_service
+from services.extraction_service import Cancelled, ExtractionService
+from utils.config import load_config
+
+
+class FakeStages:
+    """
+    Étapes simulées : chaque image vit du rendu jusqu'à l'OCR ; on compte les
+    images vivantes et les étapes actives en même temps.
+    """
+
+    def __init__(self, monkeypatch, counts, delay=0.01):
+        self.lock = threading.Lock()
+        self.alive = self.max_alive = 0
+        self.active = set()
+        self.overlap = set()
+        self.delay = delay
+        self.counts = counts
+
+        def prepare(path, config):
+            n = counts[path]
+            # Pages paires : couche texte ; impaires : scannées
+            return n, [f"Copy number: {p}" if p % 2 == 0 else None for p in range(1, n + 1)], None
+
+        def render(path, pages, config, dpi=None, degraded=None):
+            for n in pages:
+                with self.work("render"):
+                    if path == "broken.pdf" and n == 3:
+                        raise RuntimeError("pdftoppm a échoué")
+                    with self.lock:
+                        self.alive += 1
+                        self.max_alive = max(self.max_alive, self.alive)
+                yield n, f"{path}:{n}"
+
+        def clean(image, orientation, config):
+            with self.work("clean"):
+                return image
+
+        def ocr(images, config, labels, layouts):
+            with self.work("ocr"):
+                with self.lock:
+                    self.alive -= len(images)
+                return [(f"Copy number: {img.rsplit(':', 1)[1]}", None, False) for img in images]
+
+        monkeypatch.setattr(extraction_service, "prepare_document", prepare)
+        monkeypatch.setattr(extraction_service, "render_pages", render)
+        monkeypatch.setattr(extraction_service, "clean_page", clean)
+        monkeypatch.setattr(extraction_service, "ocr_images", ocr)
+        monkeypatch.setattr(extraction_service, "extract_data_with_regex",
+                            lambda text: [{"model": "piece", "copyNumber": int(text.rsplit(" ", 1)[1])}])
+
+    def work(self, stage):
+        stages = self
+
+        class _Work:
+            def __enter__(self):
+                with stages.lock:
+                    stages.active.add(stage)
+                    if len(stages.active) > 1:
+                        stages.overlap.add(frozenset(stages.active))
+                time.sleep(stages.delay)
+
+            def __exit__(self, *exc):
+                with stages.lock:
+                    stages.active.discard(stage)
+
+        return _Work()
+
+
+def make_config(**values):
+    config = load_config()
+    config.use_cache = False
+    config.adaptive_dpi = False
+    config.ocr_batch_size = 2
+    config.render_window = 2
+    config.pipeline_render_workers = 2
+    config.pipeline_clean_workers = 2
+    config.pipeline_ocr_workers = 1
+    config.pipeline_queue_size = 2
+    for key, value in values.items():
+        setattr(config, key, value)
+    return config
+
+
+def copy_numbers(pages):
+    return [[m.get("copyNumber") for m in models] for models in pages]
+
+
+def test_stages_overlap_with_bounded_images_in_flight(monkeypatch):
+    counts = {"a.pdf": 12, "b.pdf": 5, "empty.pdf": 0, "broken.pdf": 4}
+    stages = FakeStages(monkeypatch, counts)
+    service = ExtractionService(make_config())
+
+    incomplete = set()
+    docs = dict(service.iter_documents(list(counts), incomplete))
+
+    assert docs["empty.pdf"] == []
+    assert incomplete == {"broken.pdf"}
+    assert copy_numbers(docs["a.pdf"]) == [[n] for n in range(1, 13)]
+    assert copy_numbers(docs["b.pdf"]) == [[n] for n in range(1, 6)]
+    # Page en échec : vide, le reste du document est conservé
+    assert copy_numbers(docs["broken.pdf"]) == [[1], [2], [], [4]]
+    assert {m["source"] for m in docs["a.pdf"][0]} == {"ocr"}
+    assert {m["source"] for m in docs["a.pdf"][1]} == {"text_layer"}
+
+    assert any({"render", "ocr"} <= s for s in stages.overlap)
+    # Files bornées : rendu en cours + files render→clean→ocr + lot OCR
+    assert stages.max_alive <= 2 + 2 * 2 + 2 + 2
+
+
+def test_cancel_stops_queued_work(monkeypatch):
+    counts = {f"doc{i}.pdf": 6 for i in range(20)}
+    FakeStages(monkeypatch, counts, delay=0.02)
+    service = ExtractionService(make_config())
+
+    seen = []
+    t0 = time.perf_counter()
+    with pytest.raises(Cancelled):
+        for path, _ in service.iter_documents(list(counts)):
+            seen.append(path)
+            service.cancel()
+    assert len(seen) < len(counts)
+    assert time.perf_counter() - t0 < 5
+
+
+def test_parse_error_empties_page_not_run(monkeypatch):
+    counts = {"a.pdf": 4, "b.pdf": 3}
+    FakeStages(monkeypatch, counts, delay=0)
+
+    def parse(text):
+        n = int(text.rsplit(" ", 1)[1])
+        if n == 3:
+            float("3.5.5")                  # ex. « Diameter: 3.5.5 »
+        return [{"model": "piece", "copyNumber": n}]
+
+    monkeypatch.setattr(extraction_service, "extract_data_with_regex", parse)
+    incomplete = set()
+    docs = dict(ExtractionService(make_config()).iter_documents(list(counts), incomplete))
+
+    assert copy_numbers(docs["a.pdf"]) == [[1], [2], [], [4]]
+    assert copy_numbers(docs["b.pdf"]) == [[1], [2], []]
+    assert incomplete == {"a.pdf", "b.pdf"}
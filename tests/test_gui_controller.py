@@ -1,12 +1,31 @@
-import json
+import fitz
 import pandas as pd
-from src.gui_controller import launch_gui  # on testera process_data isolément
-from src.gui_controller import process_data  # si vous l'avez exposée
+from controllers.gui_controller import launch_gui  # on testera process_data isolément
+from controllers import gui_controller
+from controllers.gui_controller import process_data, to_dataframe
+from utils.config import Config
 
-def test_process_data(monkeypatch_pdf, monkeypatch_ocr, tmp_path):
-    # Crée un faux PDF
+def test_process_data(tmp_path, monkeypatch):
+    # PDF numérique (couche texte) : ni rendu ni OCR nécessaires
     pdf = tmp_path / "file.pdf"
-    pdf.write_bytes(b"%PDF-1.4\n%EOF")
-    df, collections = process_data([str(pdf)])
-    assert isinstance(df, pd.DataFrame) and not df.empty
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "PIECE Copy # 2\nStatus: ACTIVE\nCustomer code: C-12")
+    doc.save(str(pdf))
+    config = Config()
+    config.use_cache = False
+    progress = []
+
+    def no_dataframe(records):
+        raise AssertionError("DataFrame construit pendant le traitement")
+
+    monkeypatch.setattr(gui_controller.pandas_processor, "to_dataframe", no_dataframe)
+    records, collections = process_data([str(pdf)], config, lambda *a: progress.append(a))
+    monkeypatch.undo()
+    assert records and all(r["file"] == str(pdf) for r in records)
+    df = to_dataframe(records + records)
+    assert isinstance(df, pd.DataFrame) and len(df) == len(records)
     assert isinstance(collections, list) and collections  # au moins un élément
+    # Avancement à la page près : la dernière mesure couvre tout le lot
+    last = progress[-1][0]
+    assert (last.pages_done, last.pages_total, last.files_done, last.files_total) == (1, 1, 1, 1)
+    assert last.current == str(pdf) and last.percent == 100
@@ -1,7 +1,33 @@
+import cv2
 import numpy as np
-from src.pdf_tools import image_cleaner
+from pdf_tools import image_cleaner
+from pdf_tools.orientation import OrientationTracker
 from PIL import Image
 
-def test_preprocess_returns_numpy(dummy_images):
+def test_preprocess_returns_numpy(dummy_images, monkeypatch_ocr):
     result = image_cleaner.preprocess(dummy_images[0])
     assert isinstance(result, (np.ndarray, Image.Image))
+
+
+def _page():
+    img = np.full((800, 600), 255, np.uint8)
+    for i in range(10):
+        cv2.putText(img, "Piece Copy Location Status", (40, 80 + 60 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return img
+
+
+def test_preprocess_gray_in_place(monkeypatch):
+    monkeypatch.setattr(image_cleaner, "deskew", lambda gray: gray)
+    tracker = OrientationTracker()
+    tracker.rotation = 0
+    page = _page()
+    out = image_cleaner.preprocess(page, tracker)
+    assert out is page                          # même tampon, aucune copie
+    assert out.dtype == np.uint8 and out.ndim == 2
+    assert set(np.unique(out)) <= {0, 255}
+
+
+def test_upscale_setting(monkeypatch_ocr):
+    out = image_cleaner.preprocess(_page(), upscale=2)
+    assert out.shape == (1600, 1200)
+    assert image_cleaner.cleaning_profile(2) != image_cleaner.cleaning_profile(1)
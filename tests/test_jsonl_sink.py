@@ -0,0 +1,47 @@
+import math
+
+import main_cli
+from services.jsonl_sink import JsonlWriter, jsonl_to_grouped, read_jsonl
+from utils.config import load_config
+
+
+def test_writer_roundtrip_last_write_wins(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with JsonlWriter(path) as w:
+        w.write_document({"file": "a.pdf", "pages": [{"model": "piece", "page": 1, "height": math.nan}]})
+        w.write_document({"file": "b.pdf", "pages": []})
+    with JsonlWriter(path, append=True) as w:      # exécution incrémentale suivante
+        w.write_deleted("b.pdf")
+        w.write_document({"file": "a.pdf", "pages": [{"model": "tool", "page": 2}]})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"file": "c.pdf", "pa')            # ligne tronquée (arrêt brutal)
+
+    assert len(list(read_jsonl(path))) == 4
+    assert jsonl_to_grouped(path) == [{"file": "a.pdf", "pages": [{"model": "tool", "page": 2}]}]
+
+
+def test_compact_encoding(tmp_path):
+    path = tmp_path / "out.jsonl"
+    with JsonlWriter(str(path)) as w:
+        w.write_document({"file": "a.pdf", "pages": [{"model": "piece", "status": None, "page": 1}]})
+    assert path.read_text(encoding="utf-8") == '{"file":"a.pdf","pages":[{"model":"piece","page":1}]}\n'
+
+
+def test_non_incremental_run_rewrites_file(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with JsonlWriter(path) as w:
+        w.write_document({"file": "a.pdf", "pages": []})
+    with JsonlWriter(path) as w:                   # nouveau lot complet : on repart de zéro
+        w.write_document({"file": "b.pdf", "pages": []})
+    assert [d["file"] for d in read_jsonl(path)] == ["b.pdf"]
+
+
+def test_jsonl_format_refuses_json_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = tmp_path / "results.json"
+    output.write_text("[]", encoding="utf-8")
+    config = load_config()
+    config.pdf_input_directory, config.json_output_path = str(tmp_path), str(output)
+    config.output_format, config.incremental = "jsonl", False
+    main_cli.main(config)
+    assert output.read_text(encoding="utf-8") == "[]"
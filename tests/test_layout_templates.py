@@ -0,0 +1,97 @@
+import numpy as np
+
+from ocr import layout_templates
+from services import pdf_pipeline
+from services.regex_parser import extract_data_with_regex
+from utils import metrics, time_budget
+from utils.config import load_config
+from utils.time_budget import StageTimeout
+
+
+def make_config(**values):
+    config = load_config()
+    config.use_layouts = True
+    config.layout_dir = ""
+    config.ocr_timeout = 0
+    for key, value in values.items():
+        setattr(config, key, value)
+    return config
+
+
+def test_builtin_templates_cover_known_types():
+    templates = layout_templates.load_templates()
+    assert set(templates) == {"facture", "plan", "requisition"}
+    for template in templates.values():
+        page = np.zeros((1000, 1000), np.uint8)
+        area = sum(crop.size for _, crop in template.crops(page))
+        assert 0 < area < page.size / 2          # bien moins de pixels que la page entière
+        assert template.profile.startswith(f"layout-{template.doc_type}-")
+
+    config = make_config()
+    assert layout_templates.for_document("data/ORDER_1234.pdf", config).doc_type == "requisition"
+    assert layout_templates.for_document("data/scan_0001.pdf", config) is None
+    assert pdf_pipeline.document_layout("data/ORDER_1234.pdf", make_config(use_layouts=False)) is None
+
+
+def test_regions_ocr_falls_back_to_full_page(monkeypatch):
+    calls = []
+
+    def fake_ocr(images, timeout=None, psm=None):
+        calls.append((psm, [img.shape for img in images]))
+        out = []
+        for img in images:
+            if psm is None:
+                out.append(f"pleine page {img[0, 0]}\f")
+            elif img[0, 0] == 1 and psm == 6:
+                out.append("PO Number: 4521\nContact: Jean Tremblay\n\f")
+            elif img[0, 0] == 1:
+                out.append("Tool number: T-88\nStatus: OPEN\n\f")
+            else:
+                out.append("illisible\f")
+        return out
+
+    monkeypatch.setattr(pdf_pipeline.tesseract_engine, "extract_texts", fake_ocr)
+    config = make_config()
+    layout = layout_templates.load_templates()["requisition"]
+    pages = [np.full((1100, 850), 1, np.uint8),        # suit le gabarit
+             np.full((1100, 850), 2, np.uint8),        # proportions justes, mots repères absents
+             np.full((850, 1100), 3, np.uint8)]        # paysage : ne suit pas le gabarit
+
+    texts = pdf_pipeline.ocr_texts(pages, config, [1, 2, 3], layout)
+
+    # Zones des deux pages portrait en un appel par PSM, puis pleine page pour les autres
+    assert [psm for psm, _ in calls] == [4, 6, None]
+    assert calls[0][1] == [(275, 850)] * 2 and calls[1][1] == [(220, 850)] * 2
+    assert calls[2][1] == [(1100, 850), (850, 1100)]
+    assert texts[1:] == ["pleine page 2\f", "pleine page 3\f"]
+    [req] = [m for m in extract_data_with_regex(texts[0]) if m["model"] == "requisition"]
+    assert req["customerPurchaseNumber"] == "4521" and req["toolNumber"] == "T-88"
+    assert req["requisitionStatus"] == "OPEN"
+
+
+def test_layout_changes_text_cache_key():
+    config = make_config()
+    layout = layout_templates.load_templates()["facture"]
+    image_key, text_key = pdf_pipeline.cache_keys("abc", config)
+    keyed = pdf_pipeline.cache_keys("abc", config, layout)
+    assert keyed[0] == image_key and keyed[1] != text_key
+
+
+def test_regions_timeout_is_reported_then_full_page(monkeypatch):
+    calls = []
+
+    def fake_ocr(images, timeout=None, psm=None):
+        calls.append(psm)
+        if psm is not None:
+            raise StageTimeout("ocr", timeout)
+        return ["PO Number: 4521\f" for _ in images]
+
+    monkeypatch.setattr(pdf_pipeline.tesseract_engine, "extract_texts", fake_ocr)
+    metrics.reset()
+    layout = layout_templates.load_templates()["requisition"]
+    texts = pdf_pipeline.ocr_texts([np.zeros((1100, 850), np.uint8)], make_config(ocr_timeout=5), [7], layout)
+
+    assert texts == ["PO Number: 4521\f"] and calls == [4, None]
+    [entry] = time_budget.timed_out_pages()
+    assert (entry["page"], entry["budgets"], entry["failed"]) == (7, ["ocr"], False)
+    metrics.reset()
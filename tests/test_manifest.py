@@ -0,0 +1,51 @@
+import os
+
+import main_cli
+from utils.config import load_config
+from utils.manifest import Manifest
+
+
+def test_diff_new_changed_unchanged_deleted(tmp_path):
+    a, b, c = (tmp_path / n for n in ("a.pdf", "b.pdf", "c.pdf"))
+    for f in (a, b, c):
+        f.write_bytes(b"%PDF " + f.name.encode())
+
+    manifest = Manifest(str(tmp_path / "m.json"))
+    first = manifest.diff([str(a), str(b), str(c)])
+    assert sorted(first.new) == sorted([str(a), str(b), str(c)])
+    for p in first.to_process:
+        manifest.record(p)
+    manifest.save()
+
+    b.write_bytes(b"%PDF b v2")                          # contenu modifié
+    os.utime(c, (1, 1))                                  # simple touch
+    a_reloaded = Manifest.load(manifest.path)
+    second = a_reloaded.diff([str(b), str(c)])           # a supprimé
+
+    assert second.changed == [str(b)]
+    assert second.unchanged == [str(c)]
+    assert second.deleted == [str(a)]
+    assert second.stale == {str(a), str(b)}
+
+
+def test_incomplete_new_document_not_duplicated(tmp_path, monkeypatch):
+    (tmp_path / "input").mkdir()
+    pdf = tmp_path / "input" / "scan.pdf"
+    pdf.write_bytes(b"%PDF scan")
+    config = load_config()
+    config.pdf_input_directory = str(tmp_path / "input")
+    config.json_output_path = str(tmp_path / "out.json")
+    config.incremental, config.output_format, config.result_db, config.metrics = True, "json", "", False
+    monkeypatch.chdir(tmp_path)
+
+    def fake_iter_documents(pdf_files, config, incomplete=None):
+        for path in pdf_files:
+            incomplete.add(path)                         # une page hors budget à chaque exécution
+            yield path, [[{"model": "piece", "copyNumber": 1}], [{"model": "piece", "copyNumber": 2}]]
+
+    monkeypatch.setattr(main_cli.engine, "iter_documents", fake_iter_documents)
+    for _ in range(2):
+        main_cli.main(config)
+        records = main_cli.load_extracted_data(config.json_output_path)
+        assert [r["copyNumber"] for r in records] == [1, 2]
+    assert Manifest.load(f"{config.json_output_path}.manifest.json").entries == {}
@@ -0,0 +1,159 @@
+import concurrent.futures
+import threading
+import time
+
+import fitz
+
+from services import extraction_service, page_scheduler, pdf_pipeline
+from services.extraction_service import ExtractionService
+from utils.config import load_config
+from utils.memory_budget import A4_POINTS, MemoryBudget, page_footprint
+
+MB = 2 ** 20
+A0_POINTS = (2384, 3370)
+
+
+def test_footprint_follows_page_size_dpi_and_upscale():
+    a4 = page_footprint(A4_POINTS, 300)
+    assert 60 * MB < a4 < 80 * MB
+    assert page_footprint(A0_POINTS, 300) > 15 * a4
+    assert page_footprint(A4_POINTS, 150) < a4 / 3
+    assert page_footprint(A4_POINTS, 300, upscale=2) > 2.5 * a4
+
+
+def test_budget_admits_oversized_page_alone():
+    memory = MemoryBudget(100)
+    assert memory.try_acquire(60 * MB)
+    assert not memory.try_acquire(60 * MB)
+    memory.release(60 * MB)
+    assert memory.try_acquire(300 * MB)         # seule en cours : admise
+    assert not memory.try_acquire(1)
+    memory.release(300 * MB)
+    assert MemoryBudget(0).try_acquire(10 ** 12)  # illimité
+
+
+class InFlight:
+    """
+    Mémoire estimée des pages en cours de traitement, et son maximum.
+    """
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.lock = threading.Lock()
+        self.current = self.peak = 0
+
+    def footprints(self, path, pages, config, native_text=True):
+        return [self.sizes[path] for _ in pages]
+
+    def hold(self, path, pages, delay=0.02):
+        with self.lock:
+            self.current += self.sizes[path] * len(pages)
+            self.peak = max(self.peak, self.current)
+        time.sleep(delay)
+        with self.lock:
+            self.current -= self.sizes[path] * len(pages)
+
+
+def make_config(**values):
+    config = load_config()
+    config.use_cache = False
+    config.adaptive_dpi = False
+    config.max_memory_mb = 250
+    for key, value in values.items():
+        setattr(config, key, value)
+    return config
+
+
+def test_pool_admits_batches_within_budget(monkeypatch):
+    counts = {"forms.pdf": 8, "plan.pdf": 2}
+    flight = InFlight({"forms.pdf": 70 * MB, "plan.pdf": 1100 * MB})
+    monkeypatch.setattr(page_scheduler, "count_pages", lambda path: counts[path])
+    monkeypatch.setattr(page_scheduler, "page_footprints", flight.footprints)
+
+    def fake_process_pages(path, batch, config, orientation=None, incomplete=None):
+        flight.hold(path, batch)
+        return [[{"model": "piece", "copyNumber": n}] for n in batch]
+
+    monkeypatch.setattr(page_scheduler, "process_pages", fake_process_pages)
+    config = make_config(ocr_batch_size=1)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        docs = dict(page_scheduler.iter_documents(list(counts), config, executor))
+
+    assert [p[0]["copyNumber"] for p in docs["forms.pdf"]] == list(range(1, 9))
+    assert len(docs["plan.pdf"]) == 2
+    # Trois formulaires A4 au plus ensemble ; chaque plan A0 passe seul
+    assert flight.peak == 1100 * MB
+
+
+def test_pipeline_admits_pages_within_budget(monkeypatch):
+    counts = {"a.pdf": 10, "b.pdf": 6}
+    flight = InFlight({"a.pdf": 70 * MB, "b.pdf": 70 * MB})
+    alive = {}
+
+    def prepare(path, config):
+        return counts[path], [None] * counts[path], None
+
+    def render(path, pages, config, dpi=None, degraded=None):
+        for n in pages:
+            with flight.lock:
+                flight.current += flight.sizes[path]
+                flight.peak = max(flight.peak, flight.current)
+                alive[path, n] = True
+            yield n, (path, n)
+
+    def ocr(images, config, labels, layouts):
+        time.sleep(0.01)
+        with flight.lock:
+            for path, n in images:
+                flight.current -= flight.sizes[path]
+        return [(f"Copy {n}", None, False) for _, n in images]
+
+    monkeypatch.setattr(extraction_service, "prepare_document", prepare)
+    monkeypatch.setattr(extraction_service, "render_pages", render)
+    monkeypatch.setattr(extraction_service, "clean_page", lambda image, orientation, config: image)
+    monkeypatch.setattr(extraction_service, "ocr_images", ocr)
+    monkeypatch.setattr(extraction_service.pdf_pipeline, "page_footprints", flight.footprints)
+    monkeypatch.setattr(extraction_service, "extract_data_with_regex",
+                        lambda text: [{"model": "piece", "copyNumber": int(text.split()[1])}])
+    config = make_config(ocr_batch_size=2, render_window=1, pipeline_render_workers=4,
+                         pipeline_clean_workers=4, pipeline_ocr_workers=4, pipeline_queue_size=8)
+    service = ExtractionService(config)
+
+    docs = dict(service.iter_documents(list(counts)))
+
+    assert [p[0]["copyNumber"] for p in docs["a.pdf"]] == list(range(1, 11))
+    assert len(alive) == 16
+    assert flight.peak <= 3 * 70 * MB
+    assert service.memory.in_use == 0
+
+
+def test_text_layer_pages_are_admitted_without_waiting(tmp_path, monkeypatch):
+    def make_pdf(name, text, n_pages):
+        doc = fitz.open()
+        for _ in range(n_pages):
+            page = doc.new_page(width=A4_POINTS[0], height=A4_POINTS[1])
+            if text:
+                page.insert_text((72, 72), text)
+        doc.save(str(tmp_path / name))
+        return str(tmp_path / name)
+
+    digital = [make_pdf(f"digital{i}.pdf", "Customer code: CL-0042 — PIECE Copy 3 Status NEW", 1) for i in range(3)]
+    scanned = make_pdf("scanned.pdf", None, 3)
+    config = make_config(max_memory_mb=100, use_text_layer=True, text_layer_min_chars=30, ocr_upscale=1.0,
+                         ocr_batch_size=1)
+
+    assert pdf_pipeline.page_footprints(digital[0], [1], config) == [0]
+    assert all(f > 60 * MB for f in pdf_pipeline.page_footprints(scanned, [1, 2, 3], config))
+
+    # Les trois pages numériques sont en cours ensemble (un seul A4 rendu tiendrait dans 100 Mo)
+    together = threading.Barrier(3, timeout=5)
+
+    def fake_process_pages(path, batch, config, orientation=None, incomplete=None):
+        together.wait()
+        return [[{"model": "piece"}] for _ in batch]
+
+    monkeypatch.setattr(page_scheduler, "process_pages", fake_process_pages)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        docs = dict(page_scheduler.iter_documents(digital, config, executor))
+    assert all(docs[path] == [[{"model": "piece"}]] for path in digital)
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from services import page_scheduler
+from utils import metrics
+from utils.config import load_config
+
+
+def test_spans_labels_and_summary(tmp_path):
+    metrics.reset()
+    with metrics.labels(file="a.pdf"):
+        for n in range(1, 101):
+            metrics.record("ocr", n / 1000, page=n)
+        with metrics.span("parse", page=1):
+            pass
+    stats = metrics.summary()
+    assert list(stats) == ["ocr", "parse"]            # ordre du pipeline
+    assert stats["ocr"]["count"] == 100 and stats["ocr"]["max"] == 0.1
+    assert (stats["ocr"]["p50"], stats["ocr"]["p95"], stats["ocr"]["p99"]) == \
+        pytest.approx((0.05, 0.095, 0.099), rel=0.01)
+    assert metrics.spans() == []                      # agrégats seulement, rien de brut gardé
+
+    json_path, prom_path = metrics.write(str(tmp_path / "m.json"))
+    out = json.load(open(json_path))
+    assert out["summary"]["ocr"]["count"] == 100 and "spans" not in out
+    prom = open(prom_path).read()
+    [p99] = [line for line in prom.splitlines() if line.startswith('geniepdf_stage_seconds{stage="ocr",quantile="0.99"}')]
+    assert float(p99.split()[-1]) == pytest.approx(0.099, rel=0.01)
+    assert 'geniepdf_stage_seconds_count{stage="parse"} 1' in prom
+    metrics.reset()
+
+
+def test_raw_spans_kept_only_on_request(tmp_path):
+    metrics.reset()
+    metrics.record("ocr", 0.2, file="a.pdf")
+    metrics.record("timeout", 5.0, budget="ocr", outcome="fallback", file="a.pdf", page=1)
+    assert [s["stage"] for s in metrics.spans()] == ["timeout"]    # bilan des dépassements
+    metrics.keep_spans(True)
+    try:
+        metrics.record("ocr", 0.3, file="b.pdf")
+        json_path, _ = metrics.write(str(tmp_path / "m.json"))
+    finally:
+        metrics.keep_spans(False)
+    out = json.load(open(json_path))
+    assert [s["file"] for s in out["spans"]] == ["a.pdf", "b.pdf"]   # dépassement, puis tout
+    assert out["summary"]["ocr"]["count"] == 2                        # résumé : toute l'exécution
+    metrics.reset()
+
+
+def test_run_batch_returns_worker_spans(monkeypatch):
+    metrics.reset()
+    metrics.record("structurize", 0.1)               # mesure antérieure du processus parent
+
+    def fake_process_pages(path, batch, config, orientation=None, incomplete=None):
+        with metrics.span("parse", page=batch[0]):
+            return [[] for _ in batch]
+
+    monkeypatch.setattr(page_scheduler, "process_pages", fake_process_pages)
+    results, spans, incomplete, rotation = page_scheduler.run_batch("a.pdf", [1, 2], load_config(), submitted_at=0)
+    assert results == [[], []] and incomplete == set() and rotation is None
+    assert [s["stage"] for s in spans] == ["queue_wait", "parse"]
+    assert list(metrics.summary()) == ["structurize"]   # mesures du worker renvoyées, pas agrégées ici
+    metrics.reset()
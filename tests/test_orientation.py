@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+from pdf_tools import orientation
+
+WORDS = "Piece Copy Location Status Customer code diameter height tool number profile".split()
+
+
+def text_page(lines=25, w=1240, h=1754):
+    img = np.full((h, w), 255, np.uint8)
+    for i in range(lines):
+        txt = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(6))
+        cv2.putText(img, txt, (60, 80 + 60 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    return img
+
+
+def test_geometry_helpers():
+    page = text_page()
+    turned = cv2.rotate(page, cv2.ROTATE_90_CLOCKWISE)
+    assert orientation.text_line_axis(page) == "horizontal"
+    assert orientation.text_line_axis(turned) == "vertical"
+    assert orientation.looks_upright(page)
+    assert not orientation.looks_upright(cv2.rotate(page, cv2.ROTATE_180))
+
+
+def test_tracker_propagates_rotation(monkeypatch):
+    osd_inputs = []
+    monkeypatch.setattr(orientation, "osd_rotation", lambda img, timeout=None: osd_inputs.append(img.shape) or 270)
+    page = text_page()
+    turned = cv2.rotate(page, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    tracker = orientation.OrientationTracker()
+
+    assert tracker.detect(turned) == 270     # première page tournée → OSD
+    assert tracker.detect(turned) == 270     # page suivante : orientation réutilisée
+    assert tracker.detect(page) == 0         # page à l'endroit : pas d'OSD
+    assert tracker.osd_calls == 1
+    assert max(osd_inputs[0]) <= orientation.THUMBNAIL_MAX_SIDE
+
+
+def test_inverted_page_after_upright_one_runs_osd(monkeypatch):
+    osd_calls = []
+    monkeypatch.setattr(orientation, "osd_rotation", lambda img, timeout=None: osd_calls.append(img.shape) or 180)
+    page = text_page()
+    flipped = cv2.rotate(page, cv2.ROTATE_180)
+    assert orientation.looks_inverted(flipped) and not orientation.looks_inverted(page)
+    tracker = orientation.OrientationTracker()
+
+    assert tracker.detect(page) == 0         # à l'endroit : pas d'OSD
+    assert tracker.detect(flipped) == 180    # à l'envers : l'orientation précédente n'est pas reprise
+    assert tracker.detect(flipped) == 180    # puis réutilisée pour la page suivante
+    assert len(osd_calls) == 1
@@ -0,0 +1,44 @@
+import numpy as np
+from services import pdf_pipeline
+from utils import page_cache
+from utils.config import load_config
+
+
+def test_put_get_and_lru_eviction(tmp_path):
+    cache = page_cache.PageCache(str(tmp_path / "c.sqlite"), max_bytes=250)
+    for i in range(3):
+        cache.put_text(f"k{i}", "x" * 100)
+    # k0 est le plus ancien → évincé pour repasser sous 90 % de la limite
+    assert cache.get_text("k0") is None
+    assert cache.get_text("k2") == "x" * 100
+    assert cache.total_size() <= 250
+
+    img = np.arange(64, dtype=np.uint8).reshape(8, 8)
+    cache.max_bytes = 10_000
+    cache.put_image("img", img)
+    assert np.array_equal(cache.get_image("img"), img)
+
+
+def test_second_run_skips_render_and_ocr(tmp_path, monkeypatch):
+    config = load_config()
+    config.cache_path = str(tmp_path / "pages.sqlite")
+    config.use_text_layer = False
+    monkeypatch.setattr(pdf_pipeline.page_hash, "page_fingerprints",
+                        lambda path, pages: [f"fp{n}" for n in pages])
+    rendered, ocr_calls = [], []
+
+    def fake_iter(path, pages=None, **kwargs):
+        for n in pages:
+            rendered.append(n)
+            yield n, np.zeros((4, 4), np.uint8)
+
+    monkeypatch.setattr(pdf_pipeline.pdf2image_wrapper, "iter_pdf_images", fake_iter)
+    monkeypatch.setattr(pdf_pipeline.image_cleaner, "preprocess", lambda img, tracker=None, upscale=1.0: img)
+    monkeypatch.setattr(pdf_pipeline.tesseract_engine, "extract_texts",
+                        lambda imgs, timeout=None: ocr_calls.append(len(imgs)) or ["PIECE Copy 2"] * len(imgs))
+
+    first = pdf_pipeline.process_pages("doc.pdf", [1, 2], config)
+    second = pdf_pipeline.process_pages("doc.pdf", [1, 2], config)
+
+    assert first == second
+    assert rendered == [1, 2] and ocr_calls == [2]
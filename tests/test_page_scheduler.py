@@ -0,0 +1,98 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from services import page_scheduler
+from utils.config import load_config
+from utils.progress import Cancelled, PageProgress
+
+
+def test_iter_documents_reassembles_pages_in_order(monkeypatch):
+    counts = {"big.pdf": 4, "small.pdf": 1, "empty.pdf": 0, "slow.pdf": 2}
+    monkeypatch.setattr(page_scheduler, "count_pages", lambda path: counts[path])
+
+    def fake_process_pages(path, batch, config, orientation=None, incomplete=None):
+        if path == "big.pdf" and 3 in batch:
+            raise RuntimeError("page illisible")
+        if path == "slow.pdf" and 2 in batch:
+            incomplete.add(2)                  # page hors budget, rendue vide
+        return [[{"model": "piece", "copyNumber": n}] for n in batch]
+
+    monkeypatch.setattr(page_scheduler, "process_pages", fake_process_pages)
+    config = load_config()
+    config.ocr_batch_size = 2
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        incomplete = set()
+        docs = dict(page_scheduler.iter_documents(list(counts), config, executor, incomplete=incomplete))
+
+    # Lot en erreur ou page hors budget : document à retraiter (mode incrémental)
+    assert incomplete == {"big.pdf", "slow.pdf"}
+    assert docs["empty.pdf"] == []
+    assert docs["small.pdf"] == [[{"model": "piece", "copyNumber": 1}]]
+    big = docs["big.pdf"]
+    assert [p[0]["copyNumber"] if p else None for p in big] == [1, 2, None, None]
+
+
+def test_plan_tasks_skips_unreadable_files(monkeypatch):
+    def fake_count(path):
+        if path == "broken.pdf":
+            raise RuntimeError("corrompu")
+        return 2
+
+    monkeypatch.setattr(page_scheduler, "count_pages", fake_count)
+    tasks, counts = page_scheduler.plan_tasks(["a.pdf", "broken.pdf"], batch_size=1)
+    assert tasks == [("a.pdf", [1]), ("a.pdf", [2])]
+    assert counts == {"a.pdf": 2}
+
+
+def test_progress_by_page_and_cancel_drops_queued_batches(monkeypatch):
+    counts = {f"doc{i}.pdf": 4 for i in range(10)}
+    monkeypatch.setattr(page_scheduler, "count_pages", lambda path: counts[path])
+    processed = []
+
+    def slow_process_pages(path, batch, config, orientation=None, incomplete=None):
+        time.sleep(0.02)
+        processed.append((path, batch))
+        return [[] for _ in batch]
+
+    monkeypatch.setattr(page_scheduler, "process_pages", slow_process_pages)
+    config = load_config()
+    config.ocr_batch_size = 1
+    snapshots = []
+    progress = PageProgress(len(counts), snapshots.append)
+    cancel = threading.Event()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(Cancelled):
+            for path, _ in page_scheduler.iter_documents(list(counts), config, executor, progress, cancel):
+                cancel.set()
+    assert snapshots[-1].pages_total == 40
+    assert snapshots[-1].files_done >= 1
+    # Les lots encore en file ne sont jamais lancés
+    assert len(processed) < 40
+
+
+def test_later_batches_reuse_first_batch_orientation(monkeypatch):
+    counts = {"scan.pdf": 9, "other.pdf": 2}
+    monkeypatch.setattr(page_scheduler, "count_pages", lambda path: counts[path])
+    seen = {}
+
+    def fake_process_pages(path, batch, config, orientation=None, incomplete=None):
+        seen[path, batch[0]] = orientation.rotation
+        if path == "scan.pdf" and batch[0] == 1:
+            time.sleep(0.05)               # OSD de la première page
+            orientation.rotation = 90
+        return [[] for _ in batch]
+
+    monkeypatch.setattr(page_scheduler, "process_pages", fake_process_pages)
+    config = load_config()
+    config.ocr_batch_size = 2
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        list(page_scheduler.iter_documents(list(counts), config, executor))
+
+    assert seen["scan.pdf", 1] is None and seen["other.pdf", 1] is None
+    assert [seen["scan.pdf", n] for n in (3, 5, 7, 9)] == [90] * 4
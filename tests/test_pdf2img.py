@@ -1,6 +1,6 @@
 import os
 import pytest
-from src.pdf_tools import pdf2image_wrapper as pw
+from pdf_tools import pdf2image_wrapper as pw
 
 def test_missing_file_raises():
     with pytest.raises(FileNotFoundError):
@@ -0,0 +1,24 @@
+from PIL import Image
+from pdf_tools import pdf2image_wrapper as pw
+
+
+def test_page_windows():
+    assert list(pw._page_windows([1, 2, 3, 5, 6], 2)) == [[1, 2], [3], [5, 6]]
+
+
+def test_iter_pdf_images_renders_by_window(monkeypatch, tmp_path):
+    pdf = tmp_path / "dummy.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n%EOF")
+    calls = []
+
+    def fake_convert(path, dpi, first_page, last_page, thread_count, grayscale=False, timeout=None):
+        calls.append((first_page, last_page, dpi, thread_count))
+        return [Image.new("L", (10, 10)) for _ in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(pw, "convert_from_path", fake_convert)
+    monkeypatch.setattr(pw, "get_page_count", lambda path: 5)
+
+    pages = pw.iter_pdf_images(str(pdf), dpi=150, thread_count=4, window=2)
+    assert calls == []                          # rien n'est rendu avant consommation
+    assert [n for n, _ in pages] == [1, 2, 3, 4, 5]
+    assert calls == [(1, 2, 150, 2), (3, 4, 150, 2), (5, 5, 150, 1)]
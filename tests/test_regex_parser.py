@@ -0,0 +1,39 @@
+from services.regex_parser import extract_data_with_regex, extract_piece, extract_tool
+
+
+CUSTOMER = "CUSTOMER\nNickname: ACME-01\nTel : (514) 555-1234\nCompany name: Acme Inc.\nPROFILE\nProfilé 6063 anodisé\n"
+PIECE = "PIECE Copy # 3 Location: A-12/B Status: ACTIVE Type: HOLLOW\nDiameter: 12,5 Height: 40.2 nitride\n"
+
+
+def test_customer_and_profile():
+    res = extract_data_with_regex(CUSTOMER)
+    customer = next(r for r in res if r["model"] == "customer")
+    assert customer["nickname"] == "ACME-01"
+    assert customer["phone"] == "(514) 555-1234"
+    assert customer["companyName"] == "Acme Inc."
+    assert customer["billingAddress"] is None
+    assert {"model": "profile", "description": "Profilé 6063 anodisé"} in res
+
+
+def test_piece_fields_keep_order():
+    [piece] = extract_piece(PIECE)
+    assert list(piece) == ["copyNumber", "location", "status", "type", "diameter", "height",
+                           "nitrogen", "surfaceNitrogen", "toBeManufactured", "customerCode"]
+    assert piece["copyNumber"] == 3
+    assert piece["location"] == "A-12/B"
+    assert piece["diameter"] == 12.5
+    assert piece["height"] == 40.2
+    assert piece["nitrogen"] is True and piece["surfaceNitrogen"] is False
+
+
+def test_tool_blocks():
+    tools = extract_tool("Copy 1 DBF Press list: P1 interlock\nCopy 2 H2\nTotal stack: 80\n")
+    assert [t["copyNumber"] for t in tools] == [1, 2]
+    assert tools[0]["assemblyType"] == "DBF" and tools[0]["canBeInterlock"] is True
+    assert tools[1]["totalStack"] == 80.0
+
+
+def test_case_trap_fallback():
+    # « ſ » (s long) est assimilé à « s » par re.I : le repli motif par motif le trouve
+    [piece] = extract_piece("PIECE ſtatus: OK")
+    assert piece["status"] == "OK"
@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.result_store import ResultStore, find
+
+
+def records(pdf, n, customer="C-1"):
+    out = []
+    for i in range(n):
+        out.append({"model": "piece", "file": pdf, "page": i + 1, "source": "ocr", "copyNumber": i,
+                    "diameter": 12.5, "nitrogen": i % 2 == 0, "customerCode": customer})
+        out.append({"model": "requisition", "file": pdf, "page": i + 1, "toolNumber": f"T-{i}",
+                    "cavityQuantity": 2, "note": "hors table"})
+    return out
+
+
+def test_bulk_insert_indexed_and_queryable(tmp_path):
+    db = str(tmp_path / "results.sqlite")
+    with ResultStore(db, batch_rows=50) as store:
+        for n in range(20):
+            store.write_document(f"doc{n}.pdf", records(f"doc{n}.pdf", 10, customer=f"C-{n % 4}"))
+    assert store.rows_written == 400
+
+    conn = sqlite3.connect(db)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"piece_customerCode", "piece_copyNumber", "piece_file",
+            "requisition_toolNumber", "tool_customerCode"} <= indexes
+    plan = " ".join(str(r) for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM piece WHERE customerCode = 'C-1'"))
+    assert "piece_customerCode" in plan
+    assert conn.execute("SELECT COUNT(*) FROM files").fetchone() == (20,)
+    conn.close()
+
+    pieces = find(db, "piece", customerCode="C-1")
+    assert len(pieces) == 50
+    assert pieces[0]["copyNumber"] == 0 and pieces[0]["diameter"] == 12.5
+    (req,) = find(db, "requisition", file="doc3.pdf", toolNumber="T-7")
+    assert req["note"] == "hors table" and req["cavityQuantity"] == 2   # champ imprévu conservé
+
+
+def test_reprocessed_file_replaces_its_rows(tmp_path):
+    db = str(tmp_path / "results.sqlite")
+    with ResultStore(db) as store:
+        store.write_document("a.pdf", records("a.pdf", 5))
+        store.write_document("b.pdf", records("b.pdf", 5))
+    with ResultStore(db) as store:
+        store.write_document("a.pdf", records("a.pdf", 2, customer="C-9"))
+        store.delete_file("b.pdf")
+
+    assert len(find(db, "piece")) == 2
+    assert {r["customerCode"] for r in find(db, "piece", file="a.pdf")} == {"C-9"}
+    assert find(db, "requisition", file="b.pdf") == []
+
+
+def test_writer_failure_never_blocks_producers(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite"), flush_interval=0)
+    release = threading.Event()
+
+    def failing_write(conn, batch):
+        release.wait()                                 # la file se remplit pendant ce temps
+        raise sqlite3.OperationalError("disk I/O error")
+
+    store._write_batch = failing_write
+    failures = []
+
+    def produce(n):
+        try:
+            store.write_document(f"doc{n}.pdf", records(f"doc{n}.pdf", 1))
+        except RuntimeError as e:
+            failures.append(e)
+
+    # Plus de producteurs bloqués sur la file pleine qu'elle n'a de places
+    producers = [threading.Thread(target=produce, args=(n,), daemon=True) for n in range(600)]
+    for producer in producers:
+        producer.start()
+    time.sleep(0.2)
+    release.set()
+    for producer in producers:
+        producer.join(timeout=10)
+    assert not any(p.is_alive() for p in producers) and failures
+    with pytest.raises(RuntimeError):
+        store.close()
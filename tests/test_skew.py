@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+import pytest
+from pdf_tools import image_cleaner, skew
+
+WORDS = "Piece Copy Location Status Customer code diameter height tool number profile".split()
+
+
+def text_page(lines=30, w=2480, h=3508):
+    img = np.full((h, w), 255, np.uint8)
+    for i in range(lines):
+        txt = " ".join(WORDS[(i + k) % len(WORDS)] for k in range(7))
+        cv2.putText(img, txt, (150, 250 + 100 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.8, 0, 3)
+    return img
+
+
+def _rotate(img, angle):
+    h, w = img.shape
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0)
+    return cv2.warpAffine(img, m, (w, h), borderValue=255)
+
+
+@pytest.mark.parametrize("angle", [-6.4, -1.3, 0.0, 0.7, 4.25])
+def test_estimate_within_precision(angle):
+    page = text_page()
+    assert abs(skew.estimate_skew(_rotate(page, angle)) - angle) <= skew.SKEW_PRECISION
+
+
+def test_blank_page():
+    assert skew.estimate_skew(np.full((800, 600), 255, np.uint8)) == 0.0
+
+
+def test_deskew_straightens():
+    page = text_page()
+    fixed = image_cleaner.deskew(_rotate(page, 3.0))
+    assert abs(skew.estimate_skew(fixed)) <= skew.SKEW_PRECISION
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(__file__), "..", "app.py")
+HEAVY = {"tkinter", "pandas", "cv2", "pytesseract", "pdf2image"}
+
+
+def imported(*args, cwd):
+    proc = subprocess.run([sys.executable, "-X", "importtime", APP, *args], cwd=cwd,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return {line.rsplit("|", 1)[-1].strip() for line in proc.stderr.splitlines() if line.startswith("import time:")}
+
+
+def test_cli_start_imports_no_heavy_module(tmp_path):
+    (tmp_path / "input").mkdir()
+    assert not HEAVY & imported("--help", cwd=tmp_path)
+    modules = imported("--input", str(tmp_path / "input"), "--output", str(tmp_path / "out.json"), cwd=tmp_path)
+    assert "main_cli" in modules
+    assert not HEAVY & modules
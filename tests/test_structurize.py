@@ -0,0 +1,98 @@
+import math
+import random
+
+from collections.abc import Mapping
+
+import pandas as pd
+
+from data_structuring.pandas_processor import structurize, to_dataframe
+from services.regex_parser import extract_data_with_regex
+
+
+def reference_structurize(raw_pages, file_path):
+    # Implémentation pandas précédente (référence d'équivalence)
+    recs = []
+    for p_idx, page in enumerate(raw_pages, start=1):
+        if not page:
+            continue
+        for model in page:
+            if not isinstance(model, Mapping):
+                continue
+            item = model.copy()
+            item["file"] = file_path
+            item["page"] = p_idx
+            recs.append(item)
+    if not recs:
+        return pd.DataFrame(), [{"file": file_path, "pages": []}]
+    df = pd.json_normalize(recs, sep="_")
+    df = df.dropna(axis=1, how="all")
+    payload_cols = df.columns.difference(["file", "page", "model"])
+    df = df.dropna(how="all", subset=payload_cols)
+    if "page" in df.columns:
+        df["page"] = df["page"].astype("Int64")
+    grouped = (
+        df.sort_values(["file", "page"])
+          .groupby("file", sort=False, as_index=False)
+          .agg(pages=("model", lambda _: []))
+          .to_dict(orient="records")
+    )
+    pages_per_file = (
+        df.sort_values(["file", "page"])
+          .groupby("file", sort=False)
+          .apply(lambda g: g.to_dict(orient="records"))
+    )
+    for d in grouped:
+        d["pages"] = pages_per_file[d["file"]]
+    return df.reset_index(drop=True), grouped
+
+
+def present(records):
+    # Le DataFrame complète chaque ligne par des NaN (colonnes des autres modèles)
+    return [{k: v for k, v in r.items() if not (v is None or (isinstance(v, float) and math.isnan(v)))}
+            for r in records]
+
+
+def assert_equivalent(raw_pages, file_path="doc.pdf"):
+    ref_df, ref_grouped = reference_structurize(raw_pages, file_path)
+    records, grouped = structurize(raw_pages, file_path)
+    assert records == present(ref_df.to_dict(orient="records"))
+    assert [g["file"] for g in grouped] == [g["file"] for g in ref_grouped]
+    assert [g["pages"] for g in grouped] == [present(g["pages"]) for g in ref_grouped]
+
+
+def test_equivalent_on_edge_cases():
+    assert_equivalent([])
+    assert_equivalent([[], None, ["texte", 3]])
+    assert_equivalent([
+        [{"model": "piece", "copyNumber": 3, "location": None, "diameter": 12.5}],
+        [],
+        [{"model": "customer", "nickname": "CL-01", "contact": {"phone": "555", "fax": None}},
+         {"model": "profile", "description": "Rail", "tags": ["a", "b"]}],
+        [{"model": "tool", "description": None}, {"model": "piece", "copyNumber": 4}],
+    ])
+
+
+def page_text(rng):
+    kind = rng.choice(["piece", "tool", "customer", "empty"])
+    if kind == "piece":
+        return (f"PIECE Copy # {rng.randint(1, 40)} Location: A-{rng.randint(1, 99)}/B "
+                f"Status: {rng.choice(['ACTIVE', 'NEW'])}\nDiameter: {rng.randint(5, 300)},5 Height: 40.2\n")
+    if kind == "tool":
+        return (f"Copy {rng.randint(1, 20)}\nDBF\nPress list: P1, P3\nTotal stack: {rng.randint(20, 400)}.5\n"
+                f"Description: Matrice creuse\n")
+    if kind == "customer":
+        return "CUSTOMER\nNickname: CL-01\nPhone: (514) 555-1234\nCompany name: Acme Inc.\nPROFILE\nRail\n"
+    return "page sans contenu reconnu"
+
+
+def test_equivalent_on_parsed_pages():
+    rng = random.Random(7)
+    for _ in range(30):
+        assert_equivalent([extract_data_with_regex(page_text(rng)) for _ in range(rng.randint(1, 5))])
+
+
+def test_dataframe_built_at_aggregation():
+    records, _ = structurize([[{"model": "piece", "copyNumber": 3}], [{"model": "tool", "pressList": "P1"}]], "a.pdf")
+    df = to_dataframe(records)
+    assert list(df["page"]) == [1, 2] and str(df["page"].dtype) == "Int64"
+    assert to_dataframe([]).empty
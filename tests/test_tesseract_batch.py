@@ -0,0 +1,28 @@
+import subprocess
+from PIL import Image
+from ocr import tesseract_engine
+
+
+def test_extract_texts_single_run(monkeypatch):
+    calls = []
+
+    def fake_run(cmd, capture_output, timeout=None):
+        calls.append(cmd)
+        with open(cmd[1], encoding="utf-8") as f:
+            assert len(f.read().split()) == 3      # une ligne par image
+        return subprocess.CompletedProcess(cmd, 0, stdout="p1\n\fp2\n\f\f".encode(), stderr=b"")
+
+    monkeypatch.setattr(tesseract_engine.subprocess, "run", fake_run)
+    imgs = [Image.new("L", (20, 20), "white") for _ in range(3)]
+    texts = tesseract_engine.extract_texts(imgs)
+
+    assert len(calls) == 1
+    assert texts == ["p1\n\f", "p2\n\f", "\f"]
+
+
+def test_extract_texts_falls_back_per_page(monkeypatch):
+    monkeypatch.setattr(tesseract_engine.subprocess, "run",
+                        lambda cmd, capture_output, timeout=None: subprocess.CompletedProcess(cmd, 0, b"seul\f", b""))
+    monkeypatch.setattr(tesseract_engine, "extract_text", lambda img, langs=None, timeout=None, psm=None: "page\f")
+    imgs = [Image.new("L", (20, 20), "white") for _ in range(2)]
+    assert tesseract_engine.extract_texts(imgs) == ["page\f", "page\f"]
@@ -0,0 +1,56 @@
+import fitz
+from pdf_tools import text_layer
+from services import pdf_pipeline
+from utils.config import load_config
+
+TEXT = "PIECE Copy 3 Location A-12 Status OK\nCustomer code C-77"
+
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for content in pages:
+        page = doc.new_page()
+        if content:
+            page.insert_text((72, 72), content)
+    doc.save(str(path))
+    return str(path)
+
+
+def test_is_text_usable():
+    assert text_layer.is_text_usable(TEXT)
+    assert not text_layer.is_text_usable("")
+    assert not text_layer.is_text_usable("abc")
+    assert not text_layer.is_text_usable("�" * 40)
+
+
+def test_extract_page_texts(tmp_path):
+    pdf = make_pdf(tmp_path / "mixed.pdf", [TEXT, None])
+    texts = text_layer.extract_page_texts(pdf)
+    assert len(texts) == 2
+    assert "Customer code" in texts[0]
+    assert texts[1] is None
+
+
+def test_extract_pages_routes_per_page(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "mixed.pdf", [TEXT, None])
+    rendered = []
+
+    def fake_iter(path, pages=None, **kwargs):
+        for n in pages:
+            rendered.append(n)
+            yield n, "img"
+
+    monkeypatch.setattr(pdf_pipeline.pdf2image_wrapper, "iter_pdf_images", fake_iter)
+    monkeypatch.setattr(pdf_pipeline.image_cleaner, "preprocess", lambda img, tracker=None, upscale=1.0: img)
+    monkeypatch.setattr(pdf_pipeline.tesseract_engine, "extract_texts",
+                        lambda imgs, timeout=None: ["PIECE Copy 7 Status SCAN" for _ in imgs])
+
+    config = load_config()
+    config.use_cache = False
+    pages = pdf_pipeline.extract_pages(pdf, config)
+
+    assert rendered == [2]                      # seule la page scannée est rendue
+    assert pages[0][0]["source"] == pdf_pipeline.SOURCE_TEXT_LAYER
+    assert pages[0][0]["customerCode"] == "C-77"
+    assert pages[1][0]["source"] == pdf_pipeline.SOURCE_OCR
+    assert pages[1][0]["copyNumber"] == 7
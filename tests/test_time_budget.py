@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pytest
+
+from ocr import tesseract_engine
+from services import pdf_pipeline
+from utils import metrics, time_budget
+from utils.config import load_config
+from utils.time_budget import StageTimeout
+
+
+@pytest.fixture
+def config():
+    config = load_config()
+    config.use_cache = False
+    config.use_text_layer = False
+    config.adaptive_dpi = False
+    config.image_dpi, config.fallback_dpi, config.fallback_psm = 300, 150, 6
+    config.render_timeout = config.ocr_timeout = 1
+    config.render_window = 2
+    metrics.reset()
+    yield config
+    metrics.reset()
+
+
+def test_subprocess_is_killed_when_budget_runs_out():
+    t0 = time.perf_counter()
+    with pytest.raises(StageTimeout) as err:
+        tesseract_engine._run(["sleep", "5"], timeout=0.2)
+    assert err.value.stage == "ocr"
+    assert time.perf_counter() - t0 < 2
+
+
+def test_timed_out_pages_retry_on_cheaper_path_then_fail(config, monkeypatch):
+    renders, ocr_calls = [], []
+
+    def fake_render(path, dpi, thread_count, window, pages, grayscale, timeout=None):
+        for start in range(0, len(pages), window):
+            run = pages[start:start + window]
+            renders.append((dpi, run))
+            # Page 3 : dessin vectoriel énorme, trop lent même à basse résolution
+            if 3 in run or (4 in run and dpi == 300):
+                raise StageTimeout("render", timeout * len(run))
+            for n in run:
+                yield n, np.full((40, 40), n, np.uint8)
+
+    def fake_ocr(images, timeout=None, psm=None):
+        ocr_calls.append((len(images), psm, images[0].shape))
+        # Page 1 : photo bruitée, interminable quel que soit le chemin
+        if any(img[0, 0] == 1 for img in images):
+            raise StageTimeout("ocr", timeout)
+        return [f"PIECE Copy {img[0, 0]} Status SCAN" for img in images]
+
+    monkeypatch.setattr(pdf_pipeline.pdf2image_wrapper, "iter_pdf_images", fake_render)
+    monkeypatch.setattr(pdf_pipeline.image_cleaner, "preprocess", lambda img, tracker=None, upscale=1.0: img)
+    monkeypatch.setattr(pdf_pipeline.tesseract_engine, "extract_texts", fake_ocr)
+
+    pages = pdf_pipeline.process_pages("doc.pdf", [1, 2, 3, 4], config)
+
+    # Fenêtre 3–4 hors budget : chaque page est reprise seule à 150 dpi
+    assert renders == [(300, [1, 2]), (300, [3, 4]), (150, [3]), (150, [4])]
+    # Lot OCR hors budget : reprise page par page, image réduite et PSM 6
+    assert ocr_calls[0] == (3, None, (40, 40))
+    assert {c[1:] for c in ocr_calls[1:]} == {(6, (20, 20))}
+    assert pages[0] == [] and pages[2] == []                       # pages abandonnées
+    assert pages[1][0]["copyNumber"] == 2 and pages[3][0]["copyNumber"] == 4
+
+    report = {(p["page"], tuple(p["budgets"]), p["failed"]) for p in time_budget.timed_out_pages()}
+    assert report == {(1, ("ocr",), True), (2, ("ocr",), False),
+                      (3, ("render",), True), (4, ("render", "ocr"), False)}
+    assert "abandonnée" in time_budget.format_report(time_budget.timed_out_pages())
@@ -0,0 +1,128 @@
+import json
+import math
+import os
+import threading
+from types import MappingProxyType
+
+import pytest
+
+from utils import schema_manager, validator
+from utils.schema_manager import SchemaRegistry
+from services.regex_parser import extract_data_with_regex
+from utils.validator import ErrorSink, RecordValidator, validate_json
+
+PIECE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"copyNumber": {"type": "integer"}, "status": {"type": "string"}},
+        "required": ["copyNumber"],
+    },
+}
+
+
+def use_schemas(monkeypatch, **schemas):
+    monkeypatch.setattr(schema_manager, "schemas", lambda: MappingProxyType({"default": {}, **schemas}))
+
+
+def test_records_routed_by_doc_type_or_file_and_bad_record_set_aside(monkeypatch, tmp_path):
+    use_schemas(monkeypatch, plan=PIECE_SCHEMA)
+    records = [
+        {"model": "piece", "copyNumber": 3, "status": "NEW", "nickname": math.nan,    # colonne d'un autre modèle
+         "file": "plan_A12.pdf"},
+        {"model": "piece", "copyNumber": "trois", "file": "plan_A12.pdf", "page": 2},
+        {"model": "plan", "nickname": "CL-01"},              # nom de modèle ≠ schéma : schéma par défaut
+        {"doc_type": "plan", "model": "piece", "copyNumber": 4},
+    ]
+    sink = ErrorSink(str(tmp_path / "errors.log"))
+    with RecordValidator(sink=sink) as v:
+        valid = v.filter(records)
+        assert sink.errors and not (tmp_path / "errors.log").exists()   # tampon jusqu'à la fermeture
+    assert valid == [records[0], records[2], records[3]]
+    assert (v.valid, v.invalid) == (3, 1)
+    error = json.loads(open(sink.path, encoding="utf-8").read())
+    assert (error["fichier"], error["page"], error["type_detecte"], error["chemin"]) == \
+        ("plan_A12.pdf", 2, "plan", ["copyNumber"])
+
+
+def test_parser_output_passes_with_real_schemas(tmp_path):
+    text = ("PIECE Copy 2 Status NEW Diameter 12.5\n"
+            "PO Number: 4521\nContact: Jean Tremblay\nTool number: T-88\nStatus: OPEN\n")
+    # Les schémas de document (plan, requisition, facture) ne décrivent aucun modèle du parser
+    for name in ("scan_0001.pdf", "plan_2024.pdf", "purchase_order_17.pdf", "facture_3.pdf"):
+        records = [dict(m, file=f"data/{name}", page=1) for m in extract_data_with_regex(text)]
+        assert {r["model"] for r in records} >= {"piece", "requisition"}
+        with RecordValidator(sink=ErrorSink(str(tmp_path / "errors.log"))) as v:
+            assert v.filter(records) == records
+
+
+def test_validator_compiled_once_per_schema_version(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    use_schemas(monkeypatch, piece=PIECE_SCHEMA)
+    built = []
+    real = validator.validator_for
+    monkeypatch.setattr(validator, "validator_for", lambda s: built.append(s) or real(s))
+    validator._VALIDATORS.pop("piece", None)
+
+    assert validate_json([{"doc_type": "piece", "copyNumber": n} for n in range(50)])
+    assert built == [PIECE_SCHEMA]
+    # Schéma rechargé (nouvel objet) : le validateur est reconstruit
+    use_schemas(monkeypatch, piece=dict(PIECE_SCHEMA))
+    assert not validate_json({"doc_type": "piece"})
+    assert len(built) == 2
+    assert (tmp_path / "validation_errors.log").exists()
+
+
+def write_schema(directory, doc_type, schema):
+    path = directory / f"{doc_type}_schema.json"
+    path.write_text(json.dumps(schema), encoding="utf-8")
+    return path
+
+
+def test_registry_reloads_only_changed_files(tmp_path, monkeypatch):
+    write_schema(tmp_path, "plan", {"type": "object", "required": ["numero_plan"]})
+    write_schema(tmp_path, "piece", PIECE_SCHEMA)
+    registry = SchemaRegistry(str(tmp_path))
+    first = registry.refresh()
+    assert set(first) == {"plan", "piece", "default"}
+    with pytest.raises(TypeError):
+        first["plan"] = {}                                   # instantané immuable
+
+    assert registry.refresh() is first                      # rien n'a changé : même instantané
+    reads = []
+    real_loads = schema_manager.json.loads
+    monkeypatch.setattr(schema_manager.json, "loads", lambda raw: reads.append(raw) or real_loads(raw))
+    path = write_schema(tmp_path, "plan", {"type": "object", "required": ["titre_plan"]})
+    os.utime(path, ns=(1, 1))                               # mtime forcé : le changement est vu
+    second = registry.refresh()
+    assert len(reads) == 1                                  # seul le fichier modifié est relu
+    assert second["plan"]["required"] == ["titre_plan"]
+    assert second["piece"] is first["piece"]                # schéma inchangé : même objet (validateur en cache)
+    assert first["plan"]["required"] == ["numero_plan"]     # l'ancien instantané n'est pas modifié
+
+    (tmp_path / "piece_schema.json").unlink()
+    registry.only = "plan"
+    assert set(registry.refresh()) == {"plan", "default"}
+
+
+def test_registry_readers_never_see_partial_snapshot(tmp_path):
+    for n in range(5):
+        write_schema(tmp_path, f"t{n}", {"type": "object"})
+    registry = SchemaRegistry(str(tmp_path), reload_interval=0)
+    registry.refresh()
+    stop, seen = threading.Event(), []
+
+    def reader():
+        while not stop.is_set():
+            seen.append(len(registry.schemas()))
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for n in range(20):
+        write_schema(tmp_path, "t0", {"type": "object", "title": str(n)})
+        registry.refresh()
+    stop.set()
+    for t in threads:
+        t.join()
+    assert seen and set(seen) == {6}